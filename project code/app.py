@@ -1,17 +1,15 @@
+from config import Config
+from startup import PROFILER, LazyService, ServiceProxy
+
+if Config.STARTUP_PROFILE:
+    PROFILER.install()
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
 from streamlit_option_menu import option_menu
-import time
+import os
 
-# Import custom modules
-from database import DatabaseManager
-from watson_ai import WatsonAIService
-from utils import *
-from config import Config
+# Heavy modules (pandas, plotly, pyarrow, scipy, pymongo) are imported by the pages and services that use them
 
 # Page configuration
 st.set_page_config(
@@ -88,21 +86,105 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize services
+def build_database():
+    from database import DatabaseManager
+    return DatabaseManager()
+
+def build_watson_ai(db_service):
+    from disease_engine import DiseaseScoringEngine
+    from response_cache import ResponseCache
+    from watson_ai import WatsonAIService
+    
+    service = WatsonAIService()
+    
+    def rebuild_engine(data):
+        engine = DiseaseScoringEngine(data.diseases, canonicalize=data.terms.canonicalize)
+        service.disease_engine = engine if len(engine) else None
+    
+    def attach_database(db_manager):
+        if Config.RESPONSE_CACHE_PERSIST and db_manager.db is not None:
+            service.cache = ResponseCache(collection=db_manager.generation_cache_collection)
+        engine = DiseaseScoringEngine(db_manager.get_diseases(), canonicalize=db_manager.canonicalize)
+        service.disease_engine = engine if len(engine) else None
+        # Curator edits to the diseases collection reach the scoring engine without a restart
+        db_manager.reference.subscribe(rebuild_engine)
+    
+    # The AI service works without the database; the persistent cache and scoring engine
+    # are attached whenever a database build succeeds, including a retry after a failure
+    db_service.on_ready(attach_database)
+    return service
+
 @st.cache_resource
 def init_services():
-    db_manager = DatabaseManager()
-    watson_ai = WatsonAIService()
-    return db_manager, watson_ai
+    """Start building the database and AI services in the background; pages wait only when they use them"""
+    db_service = LazyService("database", build_database).start()
+    ai_service = LazyService("watson_ai", lambda: build_watson_ai(db_service)).start()
+    return db_service, ai_service
+
+db_service, ai_service = init_services()
+db_manager = ServiceProxy(db_service)
+watson_ai = ServiceProxy(ai_service)
+
+@st.cache_resource
+def get_remedy_resolver():
+    """Remedy lookup shared by all sessions: curated data, then saved generations, then Watson AI"""
+    from remedy_resolver import RemedyResolver
+    return RemedyResolver(db_manager, watson_ai)
+
+@st.cache_resource(max_entries=4)
+def load_archive_frame(path, modified, user_id):
+    """One user's archived readings, rebuilt only when the file changes.
 
-db_manager, watson_ai = init_services()
+    Kept as a resource rather than cache_data so the frame stays a view over the mapped file
+    instead of being pickled and copied on every rerun.
+    """
+    from archive import archive_frame, open_archive
+    return archive_frame(open_archive(path), user_id)
+
+@st.cache_resource(max_entries=24)
+def load_archive_rollups(path, modified, user_id, metric):
+    """Chart rollups of one archived metric, built once per archive file"""
+    from downsampling import build_rollups
+    return build_rollups(load_archive_frame(path, modified, user_id), metric)
 
 # Initialize session state
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
 if 'selected_symptoms' not in st.session_state:
     st.session_state.selected_symptoms = []
-if 'health_data' not in st.session_state:
-    st.session_state.health_data = generate_sample_health_data()
+
+def init_chat_state():
+    """Load conversation memory the first time the chat page is opened"""
+    from conversation import ConversationMemory
+    
+    if 'conversation' not in st.session_state:
+        st.session_state.conversation = ConversationMemory.from_history(
+            db_manager.get_chat_history(Config.DEFAULT_USER_ID, limit=Config.CHAT_HISTORY_LOAD)
+        )
+        st.session_state.conversation.summarize = watson_ai.summarize_conversation
+    if 'chat_history' not in st.session_state:
+        st.session_state.chat_history = st.session_state.conversation.recent(Config.CHAT_PAGE_SIZE)
+
+def init_health_state():
+    """Build the sample health series and its insights the first time analytics is opened"""
+    from health_buffer import HealthDataBuffer
+    from insights import HealthInsightsEngine
+    from utils import generate_sample_health_data
+    
+    if 'health_data' not in st.session_state:
+        st.session_state.health_data = HealthDataBuffer.from_frame(generate_sample_health_data())
+    if 'health_insights' not in st.session_state:
+        st.session_state.health_insights = HealthInsightsEngine.from_frame(st.session_state.health_data.to_frame())
+
+def show_startup_profile():
+    """Import and service initialization timings, when STARTUP_PROFILE is enabled"""
+    report = PROFILER.report()
+    with st.sidebar.expander("⏱️ Startup profile"):
+        st.caption("Slowest imports (self time)")
+        for row in report["imports"]:
+            st.text(f"{row['self'] * 1000:8.1f} ms  {row['module']}")
+        st.caption("Service initialization")
+        for row in report["phases"]:
+            st.text(f"{row['seconds'] * 1000:8.1f} ms  {row['phase']}")
+        st.caption(f"Services ready: database={db_service.ready}, watson_ai={ai_service.ready}")
 
 def main():
     # Main header
@@ -138,6 +220,9 @@ def main():
         show_health_analytics()
     elif selected == "Treatment Plans":
         show_treatment_plans()
+    
+    if Config.STARTUP_PROFILE:
+        show_startup_profile()
 
 def show_home_page():
     st.markdown("## Welcome to HealthAI Platform")
@@ -225,8 +310,9 @@ def show_symptoms_checker():
         # Custom symptom input
         custom_symptom = st.text_input("Add custom symptom:")
         if st.button("Add Custom Symptom") and custom_symptom:
-            if custom_symptom.lower() not in selected_symptoms:
-                selected_symptoms.append(custom_symptom.lower())
+            custom_symptom = db_manager.canonicalize(custom_symptom)
+            if custom_symptom and custom_symptom not in selected_symptoms:
+                selected_symptoms.append(custom_symptom)
         
         st.session_state.selected_symptoms = selected_symptoms
         
@@ -301,10 +387,11 @@ def show_home_remedies():
         
         # Generate remedy button
         if st.button("🌿 Generate Natural Remedy", type="primary") and condition:
-            with st.spinner("Generating natural remedy with IBM Watson AI..."):
-                remedy = watson_ai.generate_remedy(condition)
-                st.session_state.current_remedy = remedy
+            with st.spinner("Finding a natural remedy..."):
+                resolved = get_remedy_resolver().resolve(condition)
+                st.session_state.current_remedy = resolved.remedy
                 st.session_state.remedy_condition = condition
+                st.session_state.remedy_source = resolved.label
     
     with col2:
         st.markdown("### Remedy Details")
@@ -314,6 +401,8 @@ def show_home_remedies():
             condition = st.session_state.get('remedy_condition', 'Unknown')
             
             st.markdown(f"### {remedy.get('title', f'Natural Remedy for {condition.title()}')}")
+            if 'remedy_source' in st.session_state:
+                st.caption(f"Source: {st.session_state.remedy_source}")
             
             # Duration
             if 'duration' in remedy:
@@ -359,18 +448,37 @@ def show_home_remedies():
         st.info("🥗 Use fresh, organic ingredients when possible")
         st.info("👂 Listen to your body and adjust remedies as needed")
 
+def render_chat_turn(user_msg, ai_msg):
+    st.markdown(f'<div class="chat-user">👤 **You:** {user_msg}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="chat-ai">🤖 **HealthAI:** {ai_msg}</div>', unsafe_allow_html=True)
+
 def show_patient_chat():
     st.markdown("## 💬 Patient Chat")
     st.markdown("Get instant answers to your health questions from our IBM Watson AI assistant.")
+    init_chat_state()
+    
+    # Older messages are paged in from the database instead of being kept in session state. Pages
+    # count back from the oldest visible message, so queued writes and new turns never shift them
+    oldest_shown = st.session_state.chat_history[0][2] if st.session_state.chat_history else None
+    earlier = db_manager.count_chat_messages(Config.DEFAULT_USER_ID, before=oldest_shown)
+    if earlier > 0:
+        with st.expander(f"🕘 Earlier messages ({earlier})"):
+            pages = (earlier + Config.CHAT_PAGE_SIZE - 1) // Config.CHAT_PAGE_SIZE
+            page = st.number_input("Page (1 = most recent)", min_value=1, max_value=pages, value=1)
+            records = db_manager.get_chat_history(
+                Config.DEFAULT_USER_ID, limit=Config.CHAT_PAGE_SIZE,
+                skip=(page - 1) * Config.CHAT_PAGE_SIZE, before=oldest_shown
+            )
+            for record in reversed(records):
+                render_chat_turn(record['message'], record['response'])
     
     # Chat interface
     chat_container = st.container()
     
     with chat_container:
-        # Display chat history
-        for i, (user_msg, ai_msg) in enumerate(st.session_state.chat_history):
-            st.markdown(f'<div class="chat-user">👤 **You:** {user_msg}</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="chat-ai">🤖 **HealthAI:** {ai_msg}</div>', unsafe_allow_html=True)
+        # Display the most recent page of the conversation
+        for user_msg, ai_msg, _ in st.session_state.chat_history:
+            render_chat_turn(user_msg, ai_msg)
     
     # Chat input
     st.markdown("---")
@@ -403,14 +511,28 @@ def show_patient_chat():
     
     # Process chat message
     if send_button and user_input:
-        with st.spinner("Getting response from IBM Watson AI..."):
-            ai_response = watson_ai.chat_response(user_input)
-            
-            # Add to chat history
-            st.session_state.chat_history.append((user_input, ai_response))
+        memory = st.session_state.conversation
+        context = memory.context()
+        if Config.WATSON_STREAM_CHAT:
+            # Render tokens as they arrive; write_stream returns the full text
+            with chat_container:
+                st.markdown(f'<div class="chat-user">👤 **You:** {user_input}</div>', unsafe_allow_html=True)
+                ai_response = st.write_stream(watson_ai.chat_response_stream(user_input, context))
+        else:
+            with st.spinner("Getting response from IBM Watson AI..."):
+                ai_response = watson_ai.chat_response(user_input, context)
+        
+        if ai_response:
+            # Add to the visible page and the model's memory
+            timestamp = datetime.now()
+            st.session_state.chat_history.append((user_input, ai_response, timestamp))
+            del st.session_state.chat_history[:-Config.CHAT_PAGE_SIZE]
+            memory.add(user_input, ai_response, timestamp)
             
-            # Save to database
-            db_manager.save_chat_message("user_001", user_input, ai_response)
+            # Save to database with the current conversation digest
+            db_manager.save_chat_message(
+                Config.DEFAULT_USER_ID, user_input, ai_response, summary=memory.digest(), timestamp=timestamp
+            )
             
             # Rerun to update chat display
             st.rerun()
@@ -420,8 +542,14 @@ def show_patient_chat():
     st.warning("⚠️ **Medical Disclaimer:** This AI assistant provides general health information only. For medical emergencies, call emergency services immediately.")
 
 def show_health_analytics():
+    import pandas as pd
+    from archive import list_archives
+    from ingest import ingest_file
+    from utils import create_health_chart, create_risk_pie_chart
+    
     st.markdown("## 📊 Health Analytics Dashboard")
     st.markdown("Monitor your health metrics and gain AI-powered insights.")
+    init_health_state()
     
     # Health metrics input
     st.markdown("### 📝 Record Health Metrics")
@@ -452,16 +580,33 @@ def show_health_analytics():
         }
         
         # Add to session data
-        st.session_state.health_data = pd.concat([
-            st.session_state.health_data,
-            pd.DataFrame([new_data])
-        ], ignore_index=True)
+        st.session_state.health_data.append(new_data)
+        st.session_state.health_insights.update(new_data)
         
         # Save to database
-        db_manager.save_health_metrics(new_data)
+        db_manager.save_health_metrics(new_data, Config.DEFAULT_USER_ID)
         
         st.success("✅ Health metrics saved successfully!")
     
+    with st.expander("📥 Import readings from a CSV, Parquet or JSON-lines export"):
+        upload = st.file_uploader("Wearable or device export", type=["csv", "parquet", "jsonl", "ndjson", "json"])
+        if upload is not None and st.button("Import File"):
+            progress_text = st.empty()
+            
+            def show_progress(report):
+                progress_text.text(f"{report.rows_read:,} rows read, {report.rows_inserted:,} imported "
+                                   f"({report.rows_per_second:,.0f} rows/s)")
+            
+            try:
+                report = ingest_file(db_manager, upload, user_id=Config.DEFAULT_USER_ID, device="upload", progress=show_progress)
+                st.success(f"✅ Imported {report.rows_inserted:,} readings "
+                           f"({report.duplicates:,} duplicates and {report.invalid_rows:,} invalid rows skipped).")
+                if report.expired_rows:
+                    st.warning(f"{report.expired_rows:,} readings are older than the {Config.METRICS_RAW_RETENTION_DAYS}-day "
+                               f"retention for raw readings and were not imported.")
+            except ValueError as e:
+                st.error(f"Could not import file: {e}")
+    
     # Health metrics visualization
     st.markdown("---")
     st.markdown("### 📈 Health Trends")
@@ -476,18 +621,55 @@ def show_health_analytics():
         'Temperature': 'temperature'
     }
     
-    selected_metric = st.selectbox("Select metric to visualize:", list(metric_options.keys()))
+    range_options = {
+        'All time': None,
+        'Last 7 days': 7,
+        'Last 30 days': 30,
+        'Last year': 365
+    }
+    
+    metric_col, range_col = st.columns([2, 1])
+    with metric_col:
+        selected_metric = st.selectbox("Select metric to visualize:", list(metric_options.keys()))
+    with range_col:
+        selected_range = st.selectbox("Time range:", list(range_options.keys()))
     metric_key = metric_options[selected_metric]
     
     # Create and display chart
     if not st.session_state.health_data.empty:
-        fig = create_health_chart(st.session_state.health_data, metric_key, selected_metric)
-        st.plotly_chart(fig, use_container_width=True)
+        buffer = st.session_state.health_data
+        start = datetime.now() - timedelta(days=range_options[selected_range]) if range_options[selected_range] else None
+        end = None
+        # Box-selecting part of the chart zooms in; the rollup level is picked for the visible range
+        zoom = st.session_state.get('chart_zoom')
+        if zoom:
+            start, end = zoom
+            zoom_col, reset_col = st.columns([4, 1])
+            zoom_col.caption(f"Zoomed to {start:%Y-%m-%d %H:%M} – {end:%Y-%m-%d %H:%M}")
+            if reset_col.button("Reset zoom"):
+                del st.session_state.chart_zoom
+                # A new chart key drops the box selection that set the zoom
+                st.session_state.chart_generation = st.session_state.get('chart_generation', 0) + 1
+                st.rerun()
+        fig = create_health_chart(
+            buffer.to_frame(), metric_key, selected_metric, max_points=Config.CHART_MAX_POINTS,
+            rollups=buffer.rollups(metric_key), start=start, end=end
+        )
+        event = st.plotly_chart(
+            fig, use_container_width=True, on_select="rerun", selection_mode="box",
+            key=f"health_trend_{st.session_state.get('chart_generation', 0)}"
+        )
+        boxes = event.selection.get("box", []) if event else []
+        if boxes and boxes[0].get("x"):
+            selected = tuple(sorted(pd.to_datetime(boxes[0]["x"]).to_pydatetime()))
+            if selected != zoom:
+                st.session_state.chart_zoom = selected
+                st.rerun()
         
         # Current metrics display
         st.markdown("### 📋 Current Metrics")
         
-        latest_data = st.session_state.health_data.iloc[-1]
+        latest_data = st.session_state.health_data.latest()
         
         col1, col2, col3 = st.columns(3)
         
@@ -513,12 +695,7 @@ def show_health_analytics():
             # AI-generated health insights
             st.markdown("#### 🤖 AI Health Insights")
             
-            insights = [
-                "✅ Heart rate shows good variability, indicating healthy cardiovascular fitness.",
-                "✅ Blood pressure readings are within normal range. Continue maintaining a healthy lifestyle.",
-                "✅ Blood glucose levels are stable and within healthy parameters.",
-                "ℹ️ Weight is stable. Consider tracking diet and exercise for optimal health."
-            ]
+            insights = st.session_state.health_insights.insights()
             
             for insight in insights:
                 if insight.startswith("✅"):
@@ -530,11 +707,46 @@ def show_health_analytics():
         
         with col2:
             # Risk distribution pie chart
-            fig_pie = create_risk_pie_chart()
+            fig_pie = create_risk_pie_chart(st.session_state.health_insights.risk_distribution())
             st.plotly_chart(fig_pie, use_container_width=True)
     
     else:
         st.info("No health data available. Please record some metrics to see visualizations.")
+    
+    # Recorded history, aggregated by the database
+    st.markdown("---")
+    st.markdown("### 🗄️ Recorded History")
+    
+    summary_unit = st.selectbox("Summarize by:", ["day", "week", "month", "hour"], format_func=str.title)
+    summary = pd.DataFrame(db_manager.get_health_metrics_summary(
+        Config.DEFAULT_USER_ID, unit=summary_unit, metrics=[metric_key]
+    ))
+    
+    if not summary.empty:
+        stat_columns = [f"{metric_key}_min", f"{metric_key}_mean", f"{metric_key}_max"]
+        st.line_chart(summary.set_index('bucket')[stat_columns])
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+    else:
+        st.info("No recorded metrics yet. Saved readings will be summarized here.")
+    
+    archives = list_archives()
+    if archives:
+        st.markdown("### 📦 Archived History")
+        archive_path = st.selectbox("Archive:", archives, format_func=os.path.basename)
+        modified = os.path.getmtime(archive_path)
+        archived = load_archive_frame(archive_path, modified, Config.DEFAULT_USER_ID)
+        if not archived.empty and metric_key in archived:
+            rollups = None
+            if len(archived) > Config.CHART_MAX_POINTS:
+                rollups = load_archive_rollups(archive_path, modified, Config.DEFAULT_USER_ID, metric_key)
+            st.plotly_chart(
+                create_health_chart(archived, metric_key, f"{selected_metric} (archived)",
+                                    max_points=Config.CHART_MAX_POINTS, rollups=rollups),
+                use_container_width=True
+            )
+            st.caption(f"{len(archived):,} archived readings from {archived['date'].min():%Y-%m-%d} to {archived['date'].max():%Y-%m-%d}")
+        else:
+            st.info("This archive has no readings for the current user.")
 
 def show_treatment_plans():
     st.markdown("## 📋 AI Treatment Plan Generator")
@@ -567,10 +779,9 @@ def show_treatment_plans():
         # Generate treatment plan
         if st.button("📋 Generate Treatment Plan", type="primary") and selected_condition:
             with st.spinner("Generating personalized treatment plan with IBM Watson AI..."):
-                # Simulate treatment plan generation
-                time.sleep(2)
-                
-                treatment_plans = generate_treatment_plan(selected_condition, patient_age, patient_weight)
+                treatment_plans = watson_ai.generate_treatment_plan(
+                    selected_condition, patient_age, patient_weight, allergies, current_meds
+                )
                 st.session_state.treatment_plans = treatment_plans
                 st.session_state.treatment_condition = selected_condition
     
@@ -602,75 +813,5 @@ def show_treatment_plans():
     st.markdown("---")
     st.warning("⚠️ **Medical Disclaimer:** These AI-generated treatment plans are for informational purposes only. Always consult with qualified healthcare providers before starting any treatment.")
 
-def generate_treatment_plan(condition, age, weight):
-    """Generate treatment plan based on condition"""
-    plans = {
-        "Hypertension": [
-            {
-                "type": "medication",
-                "title": "ACE Inhibitor",
-                "description": "Lisinopril 10mg once daily to lower blood pressure",
-                "duration": "3 months initially",
-                "frequency": "Once daily, morning"
-            },
-            {
-                "type": "lifestyle",
-                "title": "Dietary Modifications",
-                "description": "Low sodium diet (less than 2300mg/day), increase potassium-rich foods",
-                "duration": "Ongoing",
-                "frequency": "Daily"
-            },
-            {
-                "type": "activity",
-                "title": "Regular Exercise",
-                "description": "Moderate aerobic exercise 30 minutes daily, 5 days per week",
-                "duration": "Ongoing",
-                "frequency": "5 times per week"
-            }
-        ],
-        "Type 2 Diabetes": [
-            {
-                "type": "medication",
-                "title": "Metformin",
-                "description": "Metformin 500mg twice daily with meals to control blood sugar",
-                "duration": "6 months, then review",
-                "frequency": "Twice daily with meals"
-            },
-            {
-                "type": "lifestyle",
-                "title": "Diabetic Diet Plan",
-                "description": "Carbohydrate counting, portion control, regular meal timing",
-                "duration": "Ongoing",
-                "frequency": "Every meal"
-            }
-        ],
-        "Common Cold": [
-            {
-                "type": "medication",
-                "title": "Symptom Relief",
-                "description": "OTC pain relievers for aches and fever",
-                "duration": "5-7 days",
-                "frequency": "As needed"
-            },
-            {
-                "type": "lifestyle",
-                "title": "Rest and Hydration",
-                "description": "Adequate sleep, increased fluid intake",
-                "duration": "Until recovery",
-                "frequency": "Continuous"
-            }
-        ]
-    }
-    
-    return plans.get(condition, [
-        {
-            "type": "consultation",
-            "title": "Medical Consultation",
-            "description": "Comprehensive evaluation by healthcare provider",
-            "duration": "1 visit initially",
-            "frequency": "As recommended"
-        }
-    ])
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
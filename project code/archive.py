@@ -0,0 +1,171 @@
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from config import Config
+from memory_store import METRIC_COLUMNS
+
+# Arrow schemas for the exportable collections; timestamps are naive, as stored
+ARCHIVE_SCHEMAS = {
+    "health_metrics": pa.schema(
+        [("timestamp", pa.timestamp("us")), ("user_id", pa.string()), ("device", pa.string())]
+        + [(name, pa.float64()) for name in METRIC_COLUMNS]
+    ),
+    "chat_history": pa.schema([
+        ("timestamp", pa.timestamp("us")), ("user_id", pa.string()),
+        ("message", pa.string()), ("response", pa.string())
+    ])
+}
+
+FORMATS = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+
+def detect_format(path: str) -> str:
+    """Archive format from a file name"""
+    for suffix, fmt in FORMATS.items():
+        if str(path).lower().endswith(suffix):
+            return fmt
+    raise ValueError(f"Unsupported archive type: {path}")
+
+
+def record_batches(db_manager, collection: str, user_id=None, start=None, end=None,
+                   batch_size=None) -> Iterator[pa.RecordBatch]:
+    """Convert each cursor batch straight into an Arrow record batch"""
+    schema = ARCHIVE_SCHEMAS[collection]
+    batches = db_manager.iter_documents(collection, user_id, start, end, batch_size or Config.EXPORT_BATCH_SIZE)
+    for documents in batches:
+        columns = [pa.array([doc.get(f.name) for doc in documents], type=f.type) for f in schema]
+        yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def export_collection(db_manager, collection: str, path: str, fmt: Optional[str] = None,
+                      user_id=None, start=None, end=None, batch_size=None) -> int:
+    """Stream a collection into a Parquet or Feather file one user at a time; returns the number of rows written"""
+    if collection not in ARCHIVE_SCHEMAS:
+        raise ValueError(f"Unsupported export collection: {collection}")
+    fmt = fmt or detect_format(path)
+    schema = ARCHIVE_SCHEMAS[collection]
+    tmp_path = f"{path}.tmp"
+
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+    elif fmt == "feather":
+        # Uncompressed Arrow IPC (Feather v2) so readers can memory-map columns without decoding
+        writer = pa.ipc.new_file(tmp_path, schema)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    rows = 0
+    users = [user_id] if user_id else db_manager.export_users(collection, start, end)
+    try:
+        with writer:
+            for user in users:
+                # Each cursor batch is written as it arrives; exporting user by user keeps a user's
+                # batches contiguous so readers select them whole instead of filtering mixed batches
+                for batch in record_batches(db_manager, collection, user, start, end, batch_size):
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows
+
+
+def archive_cold_history(db_manager, older_than_days: int, directory: Optional[str] = None,
+                         fmt: str = "feather", user_id=None):
+    """Export readings older than a cutoff to a file, then remove them from the database"""
+    directory = directory or Config.ARCHIVE_DIR
+    os.makedirs(directory, exist_ok=True)
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    suffix = "parquet" if fmt == "parquet" else "feather"
+    path = os.path.join(directory, f"health_metrics_before_{cutoff:%Y%m%d}.{suffix}")
+
+    rows = export_collection(db_manager, "health_metrics", path, fmt, user_id=user_id, end=cutoff)
+    deleted = db_manager.delete_health_metrics(cutoff, user_id) if rows else 0
+    if deleted and deleted != rows:
+        logging.warning(f"Archived {rows} readings to {path} but deleted {deleted}")
+    return path, rows
+
+
+def list_archives(directory: Optional[str] = None) -> List[str]:
+    """Archive files in a directory, newest first"""
+    directory = directory or Config.ARCHIVE_DIR
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith(tuple(FORMATS))]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def open_archive(path: str) -> pa.Table:
+    """Memory-map an archive; Feather columns are used in place, Parquet pages are decoded on read"""
+    if detect_format(path) == "feather":
+        return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return pq.read_table(path, memory_map=True)
+
+
+def user_table(table: pa.Table, user_id: str) -> pa.Table:
+    """Rows for one user, reusing whole chunks that hold only that user instead of filtering a copy"""
+    selected = []
+    for batch in table.to_batches():
+        users = batch.column(batch.schema.get_field_index("user_id"))
+        if batch.num_rows and pc.all(pc.equal(users, user_id)).as_py():
+            selected.append(batch)
+        elif pc.any(pc.equal(users, user_id)).as_py():
+            # Archives written before exports were grouped by user mix users within a batch
+            selected.append(batch.filter(pc.equal(users, user_id)))
+    return pa.Table.from_batches(selected, table.schema)
+
+
+def archive_frame(table: pa.Table, user_id=None) -> pd.DataFrame:
+    """Health metrics archive as a chart-ready frame with a 'date' column.
+
+    A user whose rows fit in one export batch is a single chunk, so null-free numeric columns of a
+    Feather archive stay views over the mapped file; longer histories are concatenated once.
+    """
+    if user_id:
+        table = user_table(table, user_id)
+    frame = table.to_pandas(split_blocks=True)
+    return frame.rename(columns={"timestamp": "date"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export health metrics or chat history to Parquet/Feather")
+    parser.add_argument("collection", choices=sorted(ARCHIVE_SCHEMAS), help="Collection to export")
+    parser.add_argument("path", nargs="?", help="Output file (.parquet, .feather or .arrow)")
+    parser.add_argument("--user", help="Only export this user_id")
+    parser.add_argument("--older-than", type=int, metavar="DAYS",
+                        help="Archive health metrics older than DAYS to ARCHIVE_DIR and remove them from the database")
+    parser.add_argument("--format", choices=["parquet", "feather"], default="feather", help="Format for --older-than")
+    parser.add_argument("--batch-size", type=int, default=Config.EXPORT_BATCH_SIZE, help="Documents per record batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from database import DatabaseManager
+    db_manager = DatabaseManager()
+
+    try:
+        if args.older_than is not None:
+            if args.collection != "health_metrics":
+                parser.error("--older-than only applies to health_metrics")
+            path, rows = archive_cold_history(db_manager, args.older_than, fmt=args.format, user_id=args.user)
+        else:
+            if not args.path:
+                parser.error("an output path is required")
+            path = args.path
+            rows = export_collection(db_manager, args.collection, path, user_id=args.user, batch_size=args.batch_size)
+    finally:
+        db_manager.close()
+
+    print(f"Wrote {rows:,} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from config import Config
+from normalize import canonicalize
+
+SYMPTOM_SEPARATORS = re.compile(r"[;,|]")
+
+# Where a record's predictions came from
+SOURCE_WATSON = "watson"
+SOURCE_FALLBACK = "fallback"
+
+
+@dataclass
+class BatchReport:
+    """Running totals for one batch run"""
+    records: int = 0
+    predicted: int = 0
+    skipped: int = 0
+    deduplicated: int = 0
+    fallback: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def records_per_second(self) -> float:
+        return (self.predicted + self.deduplicated) / self.elapsed if self.elapsed else 0.0
+
+
+def parse_symptoms(value) -> List[str]:
+    """Symptoms from a list or a ';', ',' or '|' separated string"""
+    if isinstance(value, (list, tuple)):
+        items = value
+    elif value is None or (isinstance(value, float) and pd.isna(value)):
+        items = []
+    else:
+        items = SYMPTOM_SEPARATORS.split(str(value))
+    return [str(s).strip() for s in items if str(s).strip()]
+
+
+def symptom_key(symptoms: List[str]) -> Tuple[str, ...]:
+    """Order-insensitive identity of a symptom set, with aliases and typos folded to canonical terms"""
+    return tuple(sorted({canonicalize(s) for s in symptoms}))
+
+
+def read_records(path: str, id_column: str = "record_id", symptoms_column: str = "symptoms",
+                 chunksize: int = 10000) -> Iterator[Tuple[str, List[str]]]:
+    """(record_id, symptoms) pairs from a CSV or JSON-lines intake file, read in chunks"""
+    if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+        chunks = pd.read_json(path, lines=True, chunksize=chunksize, dtype={id_column: str})
+    else:
+        chunks = pd.read_csv(path, chunksize=chunksize, dtype={id_column: str})
+
+    row = 0
+    for chunk in chunks:
+        if symptoms_column not in chunk.columns:
+            raise ValueError(f"Input file needs a '{symptoms_column}' column")
+        ids = chunk[id_column] if id_column in chunk.columns else pd.Series(range(row, row + len(chunk)), dtype=str)
+        for record_id, symptoms in zip(ids, chunk[symptoms_column]):
+            yield str(record_id), parse_symptoms(symptoms)
+        row += len(chunk)
+
+
+def load_checkpoint(output_path: str, retry_fallback: bool = False) -> Set[str]:
+    """Record ids already written to the output file, so a rerun resumes after them.
+
+    With retry_fallback, rows answered by the local engine are dropped from the file so the
+    rerun sends them to Watson again.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    tmp_path = f"{output_path}.tmp"
+    kept = open(tmp_path, "w", encoding="utf-8") if retry_fallback else None
+    try:
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                    record_id = row["record_id"]
+                except (ValueError, KeyError):
+                    # A line cut short by a crash is rewritten on resume
+                    continue
+                if kept is not None:
+                    if row.get("source") == SOURCE_FALLBACK:
+                        continue
+                    kept.write(line)
+                done.add(record_id)
+        if kept is not None:
+            kept.close()
+            os.replace(tmp_path, output_path)
+    finally:
+        if kept is not None:
+            kept.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return done
+
+
+def predict(watson_ai, symptoms: List[str]) -> Dict[str, Any]:
+    """Predictions for a symptom set, labelled with whether Watson or the local fallback produced them"""
+    predictions = watson_ai.predict_disease(symptoms, fallback=False)
+    if predictions is not None:
+        return {"predictions": predictions, "source": SOURCE_WATSON}
+    return {"predictions": watson_ai.fallback_prediction(symptoms), "source": SOURCE_FALLBACK}
+
+
+def _truncate_partial_line(output_path: str):
+    """Drop a trailing line without a newline left by an interrupted write"""
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+
+
+def run_batch(watson_ai, input_path: str, output_path: str, workers: Optional[int] = None,
+              id_column: str = "record_id", symptoms_column: str = "symptoms",
+              progress_every: int = 1000, retry_fallback: bool = False) -> BatchReport:
+    """Predict every record in an intake file, appending one JSON line per record to output_path"""
+    workers = workers or Config.BATCH_WORKERS
+    report = BatchReport()
+    _truncate_partial_line(output_path)
+    done = load_checkpoint(output_path, retry_fallback)
+
+    # Records with the same symptom set share one prediction
+    waiting: Dict[Tuple[str, ...], List[Tuple[str, List[str]]]] = {}
+    in_flight = {}
+    max_in_flight = workers * 4
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-predict") as executor, \
+            open(output_path, "a", encoding="utf-8") as out:
+
+        def write_result(record_id: str, symptoms: List[str], result: Dict[str, Any]):
+            out.write(json.dumps({"record_id": record_id, "symptoms": symptoms, **result}, default=str) + "\n")
+
+        def collect(futures):
+            for future in futures:
+                key = in_flight.pop(future)
+                try:
+                    result = {**future.result(), "error": None}
+                    report.predicted += 1
+                    if result["source"] == SOURCE_FALLBACK:
+                        report.fallback += 1
+                except Exception as e:
+                    logging.error(f"Prediction failed for {key}: {e}")
+                    result = {"predictions": [], "source": None, "error": str(e)}
+                    report.failed += 1
+                records = waiting.pop(key)
+                report.deduplicated += len(records) - 1
+                for record_id, symptoms in records:
+                    write_result(record_id, symptoms, result)
+                if progress_every and (report.predicted + report.failed) % progress_every == 0:
+                    out.flush()
+                    logging.info(f"{report.records:,} records read, {report.predicted:,} predicted "
+                                 f"({report.records_per_second:,.1f} records/s)")
+            out.flush()
+
+        for record_id, symptoms in read_records(input_path, id_column, symptoms_column):
+            report.records += 1
+            if record_id in done:
+                report.skipped += 1
+                continue
+            if not symptoms:
+                write_result(record_id, symptoms, {"predictions": [], "source": None, "error": "no symptoms"})
+                report.failed += 1
+                continue
+
+            key = symptom_key(symptoms)
+            if key in waiting:
+                waiting[key].append((record_id, symptoms))
+                continue
+            waiting[key] = [(record_id, symptoms)]
+            in_flight[executor.submit(predict, watson_ai, list(key))] = key
+
+            # Keep a bounded window of submissions so huge files never queue up in memory
+            if len(in_flight) >= max_in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+        collect(list(in_flight))
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a file of patient symptom sets with the disease prediction engine")
+    parser.add_argument("input", help="CSV or JSON-lines file with record_id and symptoms columns")
+    parser.add_argument("output", help="JSON-lines results file; rerunning resumes after the records already in it")
+    parser.add_argument("--workers", type=int, default=Config.BATCH_WORKERS, help="concurrent predictions")
+    parser.add_argument("--rate", type=float, default=Config.BATCH_RATE_LIMIT, help="Watson requests per second (0 = unlimited)")
+    parser.add_argument("--id-column", default="record_id", help="column holding the record id")
+    parser.add_argument("--symptoms-column", default="symptoms", help="column holding the symptoms")
+    parser.add_argument("--retry-fallback", action="store_true",
+                        help="send records answered by the local fallback engine on an earlier run to Watson again")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from database import DatabaseManager
+    from disease_engine import DiseaseScoringEngine
+    from http_transport import HTTPTransport, RateLimiter
+    from response_cache import ResponseCache
+    from watson_ai import WatsonAIService
+
+    db_manager = DatabaseManager()
+    cache_collection = None
+    if Config.RESPONSE_CACHE_PERSIST and db_manager.db is not None:
+        cache_collection = db_manager.generation_cache_collection
+    disease_engine = DiseaseScoringEngine(db_manager.get_diseases(), canonicalize=db_manager.canonicalize)
+    watson_ai = WatsonAIService(
+        transport=HTTPTransport(pool_size=args.workers, rate_limiter=RateLimiter(args.rate) if args.rate > 0 else None),
+        cache=ResponseCache(collection=cache_collection),
+        disease_engine=disease_engine if len(disease_engine) else None
+    )
+
+    try:
+        report = run_batch(watson_ai, args.input, args.output, workers=args.workers,
+                           id_column=args.id_column, symptoms_column=args.symptoms_column,
+                           retry_fallback=args.retry_fallback)
+    finally:
+        watson_ai.close()
+        db_manager.close()
+
+    print(f"Read {report.records:,} records in {report.elapsed:.1f}s: {report.predicted:,} predicted, "
+          f"{report.deduplicated:,} reused, {report.skipped:,} already done, {report.failed:,} failed; "
+          f"{report.fallback:,} predictions came from the local fallback engine (rerun with --retry-fallback to retry them)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Per-reading append cost of HealthDataBuffer against the pd.concat it replaced.
+
+Runs without a database:
+    python benchmarks/bench_health_buffer.py --readings 100000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from health_buffer import HealthDataBuffer
+
+
+def reading(i, start):
+    return {"date": start + timedelta(minutes=i), "heart_rate": 60 + i % 40, "systolic_bp": 120, "diastolic_bp": 80,
+            "glucose": 95, "weight": 70.0, "temperature": 36.6}
+
+
+def checkpoints(limit):
+    point = 1000
+    while point <= limit:
+        yield point
+        point *= 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=100_000)
+    parser.add_argument("--concat-limit", type=int, default=10_000, help="stop the pd.concat run here; it is quadratic")
+    parser.add_argument("--window", type=int, default=1000, help="appends timed at each checkpoint")
+    args = parser.parse_args()
+    start = datetime(2024, 1, 1)
+
+    buffer = HealthDataBuffer()
+    frame = pd.DataFrame([reading(0, start)]).iloc[:0]
+    print(f"{'readings':>10} | {'buffer append':>15} | {'pd.concat append':>16}")
+    done = 0
+    for point in checkpoints(args.readings):
+        # Fill up to just before the checkpoint untimed, then time a window of appends there
+        target = point - args.window
+        for i in range(done, target):
+            buffer.append(reading(i, start))
+        started = time.perf_counter()
+        for i in range(target, point):
+            buffer.append(reading(i, start))
+        buffer_us = (time.perf_counter() - started) / args.window * 1e6
+
+        concat = "skipped"
+        if point <= args.concat_limit:
+            for i in range(len(frame), target):
+                frame = pd.concat([frame, pd.DataFrame([reading(i, start)])], ignore_index=True)
+            started = time.perf_counter()
+            for i in range(target, point):
+                frame = pd.concat([frame, pd.DataFrame([reading(i, start)])], ignore_index=True)
+            concat = f"{(time.perf_counter() - started) / args.window * 1e6:,.1f} us"
+        done = point
+        print(f"{point:>10,} | {buffer_us:>12,.2f} us | {concat:>16}")
+
+    started = time.perf_counter()
+    buffer.to_frame()
+    print(f"to_frame over {len(buffer):,} readings: {(time.perf_counter() - started) * 1e3:.2f} ms (views, no copy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Query latency of DatabaseManager's read paths before and after its declared indexes exist.
+
+Needs a MongoDB server at MONGODB_URI; writes to a scratch database that is dropped afterwards.
+    python benchmarks/bench_indexes.py --readings 1000000 --users 100
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pymongo import DESCENDING, MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_timeseries import load, synthetic_readings, timed
+from config import Config
+from database import CHAT_FIELDS, INDEXES, METRIC_FIELDS, REMEDY_FIELDS
+from migrations import load_seed
+
+
+def chat_messages(users, per_user, start):
+    for user in range(users):
+        for i in range(per_user):
+            yield {"user_id": f"user_{user:04d}", "message": f"question {i}", "response": f"answer {i}",
+                   "timestamp": start + timedelta(minutes=i)}
+
+
+def queries(user_id):
+    """The manager's hot reads: (collection, filter, sort, projection, limit)"""
+    return {
+        "remedy by condition": ("remedies", {"condition": "common cold"}, None, REMEDY_FIELDS, 1),
+        "latest 30 readings": ("health_metrics", {"meta.user_id": user_id}, [("timestamp", DESCENDING)], METRIC_FIELDS, 30),
+        "latest 50 chat messages": ("chat_history", {"user_id": user_id}, [("timestamp", DESCENDING)], CHAT_FIELDS, 50)
+    }
+
+
+def run_query(db, collection, query, sort, projection, limit):
+    cursor = db[collection].find(query, projection).limit(limit)
+    if sort:
+        cursor = cursor.sort(sort)
+    return list(cursor)
+
+
+def plan_stage(db, collection, query, sort, projection, limit):
+    cursor = db[collection].find(query, projection).limit(limit)
+    if sort:
+        cursor = cursor.sort(sort)
+    plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    stages = []
+    while plan:
+        stages.append(plan.get("stage"))
+        plan = plan.get("inputStage")
+    return " <- ".join(s for s in stages if s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--chat-per-user", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    client = MongoClient(Config.MONGODB_URI)
+    db = client["healthai_bench_indexes"]
+    client.drop_database(db.name)
+    start = datetime(2024, 1, 1)
+    try:
+        started = time.perf_counter()
+        # Plain collections, so the unindexed run really is a collection scan
+        load(db.health_metrics, synthetic_readings(args.readings, args.users, start))
+        load(db.chat_history, chat_messages(args.users, args.chat_per_user, start))
+        remedies = load_seed("remedies")
+        for i in range(args.users * 10):
+            remedies.append({"condition": f"condition {i}", "title": f"Remedy {i}"})
+        db.remedies.insert_many(remedies)
+        print(f"Loaded {args.readings:,} readings and {args.users * args.chat_per_user:,} chat messages "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        reads = queries("user_0042")
+        results = {}
+        for phase in ("without indexes", "with indexes"):
+            if phase == "with indexes":
+                for collection in ("remedies", "health_metrics", "chat_history"):
+                    for keys, options in INDEXES[collection]:
+                        db[collection].create_index(keys, **options)
+            for label, spec in reads.items():
+                p50, p99 = timed(lambda: run_query(db, *spec), args.repeat)
+                results.setdefault(label, []).append(p50)
+                print(f"{phase:>16} | {label:<24} p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  plan {plan_stage(db, *spec)}")
+
+        for label, (before, after) in results.items():
+            print(f"{label:<24} {before / after if after else float('inf'):,.0f}x faster with indexes")
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
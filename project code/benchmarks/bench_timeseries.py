@@ -0,0 +1,107 @@
+"""Storage footprint and range-query latency of flat vs time-series health_metrics, plus rollup reads.
+
+Needs a MongoDB 5.0+ server at MONGODB_URI; writes to a scratch database that is dropped afterwards.
+    python benchmarks/bench_timeseries.py --readings 1000000 --users 100
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from pymongo import ASCENDING, DESCENDING, MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from memory_store import METRIC_COLUMNS
+
+
+def synthetic_readings(count, users, start):
+    """Readings one minute apart per user, values drawn around typical ranges"""
+    rng = np.random.default_rng(7)
+    per_user = count // users
+    for user in range(users):
+        base = rng.normal([72, 120, 80, 95, 70, 36.6], [8, 10, 6, 12, 5, 0.3], size=(per_user, len(METRIC_COLUMNS)))
+        for i in range(per_user):
+            doc = {name: float(value) for name, value in zip(METRIC_COLUMNS, base[i])}
+            doc["timestamp"] = start + timedelta(minutes=i)
+            doc["meta"] = {"user_id": f"user_{user:04d}", "device": "bench"}
+            yield doc
+
+
+def load(collection, docs, batch_size=10000):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def timed(fn, repeat):
+    """p50 and p99 latency in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def storage(db, name):
+    stats = db.command("collStats", name)
+    return stats.get("storageSize", 0) + stats.get("totalIndexSize", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    client = MongoClient(Config.MONGODB_URI)
+    db = client["healthai_bench_timeseries"]
+    client.drop_database(db.name)
+    start = datetime(2024, 1, 1)
+    try:
+        db.create_collection("flat")
+        db.flat.create_index([("meta.user_id", ASCENDING), ("timestamp", DESCENDING)])
+        db.create_collection("series", timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": Config.METRICS_GRANULARITY})
+        db.series.create_index([("meta.user_id", ASCENDING), ("timestamp", DESCENDING)])
+
+        for name in ("flat", "series"):
+            started = time.perf_counter()
+            load(db[name], synthetic_readings(args.readings, args.users, start))
+            print(f"{name:>7}: loaded {args.readings:,} readings in {time.perf_counter() - started:.1f}s, "
+                  f"{storage(db, name) / 2 ** 20:,.1f} MiB data + indexes")
+
+        # One user's week, as the analytics page would request it
+        query = {"meta.user_id": "user_0001", "timestamp": {"$gte": start, "$lt": start + timedelta(days=7)}}
+        for name in ("flat", "series"):
+            p50, p99 = timed(lambda: list(db[name].find(query, {"_id": 0})), args.repeat)
+            print(f"{name:>7}: 7-day range query p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+        # Daily summary straight from raw readings vs from a precomputed daily tier
+        group = {"_id": {"user_id": "$meta.user_id", "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}}}, "count": {"$sum": 1}}
+        for metric in METRIC_COLUMNS:
+            group[f"{metric}_mean"] = {"$avg": f"${metric}"}
+        db.series.aggregate([{"$group": group}, {"$set": {"user_id": "$_id.user_id", "bucket": "$_id.bucket"}}, {"$out": "daily"}])
+        db.daily.create_index([("user_id", ASCENDING), ("bucket", DESCENDING)])
+        raw = [{"$match": {"meta.user_id": "user_0001"}}, {"$group": group}]
+        p50, p99 = timed(lambda: list(db.series.aggregate(raw)), args.repeat)
+        print(f"  daily summary from raw readings: p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+        p50, p99 = timed(lambda: list(db.daily.find({"user_id": "user_0001"}, {"_id": 0})), args.repeat)
+        print(f"  daily summary from rollup tier:  p50 {p50:.1f} ms, p99 {p99:.1f} ms "
+              f"({storage(db, 'daily') / 2 ** 20:,.2f} MiB)")
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
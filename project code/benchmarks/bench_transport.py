@@ -0,0 +1,110 @@
+"""Request latency of HTTPTransport against bare requests.post, using a local stub server.
+
+Runs without network access or credentials:
+    python benchmarks/bench_transport.py --requests 2000 --threads 8 --error-rate 0.05
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from http_transport import CircuitBreaker, HTTPTransport
+
+BODY = json.dumps({"results": [{"generated_text": "Rest and drink plenty of fluids."}]}).encode()
+
+
+def stub_server(latency, error_rate):
+    """Keep-alive server answering POSTs after a fixed delay, with a share of 503s"""
+    rng = random.Random(7)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; with Nagle on, keep-alive clients would
+        # measure the peer's delayed-ACK timer instead of the transport
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            with lock:
+                failed = rng.random() < error_rate
+            body = b"{}" if failed else BODY
+            self.send_response(503 if failed else 200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+
+def run(send, count, threads):
+    """Latencies in ms and the share of calls that ended in a 200"""
+    def one(_):
+        started = time.perf_counter()
+        try:
+            ok = send().status_code == 200
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(one, range(count)))
+    latencies = np.array([r[0] for r in results])
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), sum(r[1] for r in results) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.002, help="stub server delay per request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="share of requests answered with 503")
+    args = parser.parse_args()
+    # Retry warnings would otherwise be printed for every 503
+    logging.basicConfig(level=logging.ERROR)
+
+    # Short backoff so the retry cost reflects round trips rather than sleeping
+    Config.WATSON_BACKOFF_BASE = 0.01
+    Config.WATSON_BACKOFF_MAX = 0.05
+    server = stub_server(args.latency, args.error_rate)
+    url = f"http://127.0.0.1:{server.server_port}/ml/v1/text/generation"
+    payload = {"input": "What should I do for a headache?", "parameters": {"max_new_tokens": 200}}
+    transport = HTTPTransport(pool_size=args.threads, breaker=CircuitBreaker(min_calls=args.requests + 1))
+
+    print(f"{args.requests:,} requests on {args.threads} threads, {args.latency * 1000:g} ms server time, "
+          f"{args.error_rate:.0%} 503s")
+    try:
+        for label, send in (
+            ("requests.post", lambda: requests.post(url, json=payload)),
+            ("HTTPTransport.post", lambda: transport.post(url, json=payload))
+        ):
+            p50, p99, success = run(send, args.requests, args.threads)
+            print(f"{label:>20}: p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  success {success:.1%}")
+    finally:
+        transport.close()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,86 @@ class Config:
     IBM_WATSON_URL = os.getenv('IBM_WATSON_URL')
     IBM_WATSON_PROJECT_ID = os.getenv('IBM_WATSON_PROJECT_ID')
     
+    IBM_IAM_TOKEN_URL = os.getenv('IBM_IAM_TOKEN_URL', 'https://iam.cloud.ibm.com/identity/token')
+    IBM_IAM_REFRESH_MARGIN = float(os.getenv('IBM_IAM_REFRESH_MARGIN', '300'))
+    
+    # Watson HTTP Transport Configuration
+    WATSON_CONNECT_TIMEOUT = float(os.getenv('WATSON_CONNECT_TIMEOUT', '3.05'))
+    WATSON_READ_TIMEOUT = float(os.getenv('WATSON_READ_TIMEOUT', '30'))
+    WATSON_POOL_SIZE = int(os.getenv('WATSON_POOL_SIZE', '10'))
+    WATSON_STREAM_CHAT = os.getenv('WATSON_STREAM_CHAT', 'true').lower() == 'true'
+    WATSON_EARLY_STOP = os.getenv('WATSON_EARLY_STOP', 'true').lower() == 'true'
+    WATSON_MAX_CONCURRENCY = int(os.getenv('WATSON_MAX_CONCURRENCY', '10'))
+    WATSON_RATE_LIMIT = float(os.getenv('WATSON_RATE_LIMIT', '0'))  # requests per second, 0 = unlimited
+    WATSON_MAX_RETRIES = int(os.getenv('WATSON_MAX_RETRIES', '3'))
+    WATSON_BACKOFF_BASE = float(os.getenv('WATSON_BACKOFF_BASE', '0.5'))
+    WATSON_BACKOFF_MAX = float(os.getenv('WATSON_BACKOFF_MAX', '8'))
+    WATSON_BREAKER_ERROR_RATE = float(os.getenv('WATSON_BREAKER_ERROR_RATE', '0.5'))
+    WATSON_BREAKER_WINDOW = int(os.getenv('WATSON_BREAKER_WINDOW', '20'))
+    WATSON_BREAKER_MIN_CALLS = int(os.getenv('WATSON_BREAKER_MIN_CALLS', '5'))
+    WATSON_BREAKER_COOLDOWN = float(os.getenv('WATSON_BREAKER_COOLDOWN', '30'))
+    
+    # Response Cache Configuration
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '2048'))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '86400'))
+    RESPONSE_CACHE_PERSIST = os.getenv('RESPONSE_CACHE_PERSIST', 'true').lower() == 'true'
+    
     # MongoDB Configuration
     MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
     MONGODB_DATABASE = os.getenv('MONGODB_DATABASE', 'healthai_db')
+    MONGODB_TIMEOUT_MS = int(os.getenv('MONGODB_TIMEOUT_MS', '5000'))
+    MONGODB_PERCENTILES = os.getenv('MONGODB_PERCENTILES', 'true').lower() == 'true'  # $percentile needs MongoDB 7.0+
+    
+    # Schema Migration Configuration
+    MIGRATIONS_COLLECTION = os.getenv('MIGRATIONS_COLLECTION', 'schema_meta')
+    MIGRATION_LOCK_TTL = int(os.getenv('MIGRATION_LOCK_TTL', '300'))  # seconds before a crashed migrator's lock can be taken over
+    MIGRATION_LOCK_WAIT = int(os.getenv('MIGRATION_LOCK_WAIT', '60'))  # seconds to wait for another replica's migration before startup fails
+    
+    # Reference Data Cache Configuration
+    REFERENCE_CACHE_WATCH = os.getenv('REFERENCE_CACHE_WATCH', 'true').lower() == 'true'  # change streams need a replica set
+    REFERENCE_POLL_INTERVAL = float(os.getenv('REFERENCE_POLL_INTERVAL', '60'))
+    
+    # Term Normalization Configuration
+    NORMALIZE_MAX_DISTANCE = int(os.getenv('NORMALIZE_MAX_DISTANCE', '2'))  # typo edits tolerated in terms of 8+ characters
+    
+    # Storage Backend Configuration ('mongo' or 'memory')
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mongo').lower()
+    MEMORY_MAX_METRICS = int(os.getenv('MEMORY_MAX_METRICS', '100000'))
+    MEMORY_MAX_CHAT_PER_USER = int(os.getenv('MEMORY_MAX_CHAT_PER_USER', '500'))
+    MEMORY_SNAPSHOT_PATH = os.getenv('MEMORY_SNAPSHOT_PATH', '')
+    
+    # Health Metrics Retention Configuration
+    METRICS_GRANULARITY = os.getenv('METRICS_GRANULARITY', 'minutes')
+    METRICS_RAW_RETENTION_DAYS = int(os.getenv('METRICS_RAW_RETENTION_DAYS', '90'))
+    METRICS_HOURLY_RETENTION_DAYS = int(os.getenv('METRICS_HOURLY_RETENTION_DAYS', '730'))
+    ROLLUP_ENABLED = os.getenv('ROLLUP_ENABLED', 'true').lower() == 'true'
+    ROLLUP_INTERVAL = float(os.getenv('ROLLUP_INTERVAL', '900'))
+    
+    INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', '50000'))
+    
+    # Batch Prediction Configuration
+    BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '8'))
+    BATCH_RATE_LIMIT = float(os.getenv('BATCH_RATE_LIMIT', '5'))
+    
+    # Conversation Memory Configuration
+    CHAT_CONTEXT_TOKENS = int(os.getenv('CHAT_CONTEXT_TOKENS', '600'))
+    CHAT_SUMMARY_TOKENS = int(os.getenv('CHAT_SUMMARY_TOKENS', '200'))
+    CHAT_HISTORY_LOAD = int(os.getenv('CHAT_HISTORY_LOAD', '50'))
+    CHAT_PAGE_SIZE = int(os.getenv('CHAT_PAGE_SIZE', '10'))
+    
+    # Archive Configuration
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archives')
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '10000'))
+    
+    # Write-behind Queue Configuration
+    WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND_ENABLED', 'true').lower() == 'true'
+    WRITE_BATCH_SIZE = int(os.getenv('WRITE_BATCH_SIZE', '100'))
+    WRITE_FLUSH_INTERVAL = float(os.getenv('WRITE_FLUSH_INTERVAL', '0.5'))
+    WRITE_QUEUE_MAX_SIZE = int(os.getenv('WRITE_QUEUE_MAX_SIZE', '10000'))
+    WRITE_QUEUE_PUT_TIMEOUT = float(os.getenv('WRITE_QUEUE_PUT_TIMEOUT', '1.0'))
     
     # Application Configuration
-    APP_SECRET_KEY = os.getenv('APP_SECRET_KEY', 'healthai-secret-key')
\ No newline at end of file
+    APP_SECRET_KEY = os.getenv('APP_SECRET_KEY', 'healthai-secret-key')
+    DEFAULT_USER_ID = os.getenv('DEFAULT_USER_ID', 'user_001')
+    CHART_MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', '1000'))
+    STARTUP_PROFILE = os.getenv('STARTUP_PROFILE', 'false').lower() == 'true'
\ No newline at end of file
@@ -0,0 +1,118 @@
+import re
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from prompts import CHARS_PER_TOKEN, estimate_tokens
+
+Turn = Tuple[str, str]
+
+
+def format_turns(turns: List[Turn]) -> str:
+    """Turns as a plain transcript for prompts"""
+    return "\n".join(f"Patient: {message}\nAssistant: {response}" for message, response in turns)
+
+
+SENTENCE_END = re.compile(r"(?<=[.?!])\s")
+
+
+def extractive_summary(summary: str, turns: List[Turn], max_tokens: int) -> str:
+    """Digest built from the first sentence of each patient message, used when the model is unavailable"""
+    sentences = SENTENCE_END.split(summary) if summary else []
+    for message, _ in turns:
+        first_sentence = SENTENCE_END.split(" ".join(message.split()), maxsplit=1)[0]
+        ending = "" if first_sentence.endswith((".", "?", "!")) else "."
+        sentences.append(f"Patient asked: {first_sentence}{ending}")
+
+    # Keep the most recent whole sentences that fit the budget
+    budget = max_tokens * CHARS_PER_TOKEN
+    kept, size = [], 0
+    for sentence in reversed(sentences):
+        if size + len(sentence) + bool(kept) > budget:
+            break
+        kept.append(sentence)
+        size += len(sentence) + 1
+    if not kept and sentences:
+        # A single sentence longer than the budget keeps its opening words
+        kept = [sentences[-1][:budget].rsplit(" ", 1)[0]]
+    return " ".join(reversed(kept))
+
+
+class ConversationMemory:
+    """Token-budgeted window of recent chat turns plus a rolling summary of older turns"""
+
+    def __init__(self, summarize: Optional[Callable[[str, List[Turn]], str]] = None,
+                 window_tokens=None, summary_tokens=None):
+        self.summarize = summarize
+        self.window_tokens = window_tokens or Config.CHAT_CONTEXT_TOKENS
+        self.summary_tokens = summary_tokens or Config.CHAT_SUMMARY_TOKENS
+        self.turns: deque = deque()
+        self.turn_tokens: deque = deque()
+        self.summary = ""
+        self.summarized_through: Optional[datetime] = None
+        self._timestamps: deque = deque()
+
+    @classmethod
+    def from_history(cls, records: List[Dict[str, Any]], summarize=None, **kwargs) -> "ConversationMemory":
+        """Rebuild memory from stored chat records (newest first), resuming from the latest persisted digest"""
+        memory = cls(summarize, **kwargs)
+        digest = next((r["summary"] for r in records if r.get("summary")), None)
+        if digest:
+            memory.summary = digest.get("text", "")
+            memory.summarized_through = digest.get("through")
+        for record in reversed(records):
+            if memory.summarized_through and record["timestamp"] <= memory.summarized_through:
+                continue
+            memory.add(record["message"], record["response"], record["timestamp"])
+        return memory
+
+    @property
+    def window_size(self) -> int:
+        """Estimated tokens in the window of recent turns"""
+        return sum(self.turn_tokens)
+
+    def add(self, message: str, response: str, timestamp: Optional[datetime] = None):
+        """Append a turn, folding the oldest turns into the summary once the window is over budget"""
+        self.turns.append((message, response))
+        self.turn_tokens.append(estimate_tokens(format_turns([(message, response)])))
+        self._timestamps.append(timestamp or datetime.now())
+        if self.window_size > self.window_tokens:
+            self._compact()
+
+    def _compact(self):
+        # Evict down to half the budget so summarization runs every few turns rather than every turn
+        evicted = []
+        while len(self.turns) > 1 and self.window_size > self.window_tokens // 2:
+            evicted.append(self.turns.popleft())
+            self.turn_tokens.popleft()
+            self.summarized_through = self._timestamps.popleft()
+        if not evicted:
+            return
+
+        summary = None
+        if self.summarize is not None:
+            summary = self.summarize(self.summary, evicted)
+        if not summary:
+            summary = extractive_summary(self.summary, evicted, self.summary_tokens)
+        self.summary = summary
+
+    def recent(self, count: int) -> List[Tuple[str, str, datetime]]:
+        """Latest turns in the window as (message, response, timestamp), oldest first"""
+        turns = list(zip(self.turns, self._timestamps))[-count:] if count > 0 else []
+        return [(message, response, timestamp) for (message, response), timestamp in turns]
+
+    def context(self) -> str:
+        """Summary and recent turns for the chat prompt"""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of earlier conversation: {self.summary}")
+        if self.turns:
+            parts.append(f"Recent conversation:\n{format_turns(list(self.turns))}")
+        return "\n".join(parts)
+
+    def digest(self) -> Optional[Dict[str, Any]]:
+        """Summary state persisted with each chat record so memory survives restarts"""
+        if not self.summary:
+            return None
+        return {"text": self.summary, "through": self.summarized_through}
@@ -1,154 +1,608 @@
 import pymongo
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
 from config import Config
-import pandas as pd
-from datetime import datetime
+from write_queue import WriteBehindQueue
+from memory_store import InMemoryStore, METRIC_COLUMNS
+from rollups import RollupScheduler, bucket_start
+from migrations import MigrationLockTimeout, MigrationRunner, load_seed
+from reference_cache import ReferenceCache
+from datetime import datetime, timedelta
 import logging
+import threading
+
+# Indexes declared per collection as (keys, options)
+INDEXES = {
+    "diseases": [
+        ([("name", ASCENDING)], {"name": "name_1", "unique": True}),
+        ([("symptoms", ASCENDING)], {"name": "symptoms_1"})
+    ],
+    "remedies": [
+        ([("condition", ASCENDING)], {"name": "condition_1", "unique": True})
+    ],
+    "generated_remedies": [
+        ([("condition", ASCENDING)], {"name": "condition_1", "unique": True})
+    ],
+    "health_metrics": [
+        ([("meta.user_id", ASCENDING), ("timestamp", DESCENDING)], {"name": "meta.user_id_1_timestamp_-1"}),
+        ([("timestamp", DESCENDING)], {"name": "timestamp_-1"})
+    ],
+    "health_metrics_hourly": [
+        ([("user_id", ASCENDING), ("bucket", DESCENDING)], {"name": "user_id_1_bucket_-1"}),
+        ([("bucket", ASCENDING)], {"name": "bucket_ttl", "expireAfterSeconds": Config.METRICS_HOURLY_RETENTION_DAYS * 86400})
+    ],
+    "health_metrics_daily": [
+        ([("user_id", ASCENDING), ("bucket", DESCENDING)], {"name": "user_id_1_bucket_-1"})
+    ],
+    "chat_history": [
+        ([("user_id", ASCENDING), ("timestamp", DESCENDING)], {"name": "user_id_1_timestamp_-1"})
+    ]
+}
+
+# Read projections trim documents on the wire; none is a covered query, since each returns fields
+# outside its index (and time-series reads always unpack buckets), so explain reports covered=False
+DISEASE_FIELDS = {"_id": 0, "name": 1, "symptoms": 1, "probability_base": 1, "risk_level": 1, "description": 1, "recommendations": 1}
+REMEDY_FIELDS = {"_id": 0, "condition": 1, "title": 1, "ingredients": 1, "instructions": 1, "benefits": 1, "precautions": 1, "duration": 1}
+METRIC_FIELDS = {"_id": 0, "user_id": "$meta.user_id", "device": "$meta.device", "timestamp": 1, "date": 1, "heart_rate": 1, "systolic_bp": 1, "diastolic_bp": 1, "glucose": 1, "weight": 1, "temperature": 1}
+SUMMARY_UNITS = ("hour", "day", "week", "month")
+SUMMARY_PERCENTILES = (0.5, 0.95)
+
+# Rollup tiers: $dateTrunc unit -> summary collection
+ROLLUP_COLLECTIONS = {"hour": "health_metrics_hourly", "day": "health_metrics_daily"}
+ROLLUP_BUCKET_SIZES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+CHAT_FIELDS = {"_id": 0, "user_id": 1, "message": 1, "response": 1, "timestamp": 1, "summary": 1}
+
+# Projections used when streaming whole collections out to archive files
+EXPORT_FIELDS = {"health_metrics": METRIC_FIELDS, "chat_history": CHAT_FIELDS}
+
+def plan_stages(explained):
+    """Plan stage names and index names from explain output.
+
+    Plain collections report queryPlanner at the top level. Finds on time-series collections run
+    as an aggregation over the buckets, so the plan sits under stages[0]["$cursor"] and the later
+    pipeline stages (bucket unpacking, sort, projection) are listed by name.
+    """
+    plans, stages, indexes = [], [], []
+    if "queryPlanner" in explained:
+        plans.append(explained["queryPlanner"].get("winningPlan", {}))
+    for stage in explained.get("stages", []):
+        if "$cursor" in stage:
+            plans.append(stage["$cursor"].get("queryPlanner", {}).get("winningPlan", {}))
+        else:
+            stages.extend(stage)
+    
+    pending = plans[::-1]
+    while pending:
+        stage = pending.pop()
+        if stage.get("stage"):
+            stages.append(stage["stage"])
+        if stage.get("indexName"):
+            indexes.append(stage["indexName"])
+        pending.extend(stage.get("inputStages", []))
+        if "inputStage" in stage:
+            pending.append(stage["inputStage"])
+        if "queryPlan" in stage:
+            pending.append(stage["queryPlan"])
+    return stages, indexes
 
 class DatabaseManager:
     def __init__(self):
+        self.memory = None
+        # Set once the declared indexes are in place
+        self.ready = threading.Event()
+        if Config.STORAGE_BACKEND == "memory":
+            self._use_memory_store()
+            return
+        
         try:
-            self.client = MongoClient(Config.MONGODB_URI)
+            self.client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=Config.MONGODB_TIMEOUT_MS)
             self.db = self.client[Config.MONGODB_DATABASE]
             self.symptoms_collection = self.db.symptoms
             self.remedies_collection = self.db.remedies
             self.health_metrics_collection = self.db.health_metrics
             self.chat_history_collection = self.db.chat_history
             self.diseases_collection = self.db.diseases
+            self.generation_cache_collection = self.db.generation_cache
+            self.generated_remedies_collection = self.db.generated_remedies
+            self.writer = None
+            self.rollups = None
+            
+            # One schema-version read when up to date; otherwise apply pending migrations (time-series
+            # health_metrics, reference data) under a lock shared by all replicas before any write
+            MigrationRunner(self).run()
+            
+            # Diseases and remedies are served from a process-wide snapshot kept current by a watcher
+            self.reference = ReferenceCache(self._load_reference_data, self.db).start()
+            
+            # Index builds run off the caller's thread
+            threading.Thread(target=self._bootstrap, name="db-bootstrap", daemon=True).start()
             
-            # Initialize collections with sample data
-            self._initialize_data()
+            # Chat and metrics writes are flushed in batches off the script thread
+            if Config.WRITE_BEHIND_ENABLED:
+                self.writer = WriteBehindQueue(self.db)
             
+            # Keep the hourly/daily summary tiers up to date
+            if Config.ROLLUP_ENABLED:
+                self.rollups = RollupScheduler(self)
+            
+        except MigrationLockTimeout:
+            # Another replica is mid-migration; falling back to memory would hide a half-started
+            # replica, so fail and let the next start find the finished schema
+            self.client.close()
+            raise
         except Exception as e:
             logging.error(f"Database connection error: {e}")
             # Fallback to in-memory storage
-            self.client = None
-            self.db = None
+            self._use_memory_store()
     
-    def _initialize_data(self):
-        """Initialize database with sample medical data"""
-        if self.db is None:
+    def _use_memory_store(self):
+        """Serve every query from the in-process store instead of MongoDB"""
+        self.client = None
+        self.db = None
+        self.writer = None
+        self.rollups = None
+        self.memory = InMemoryStore()
+        self.memory.seed(load_seed("diseases"), load_seed("remedies"))
+        self.reference = ReferenceCache(lambda: (self.memory.get_diseases(), self.memory.get_remedies()))
+        self.ready.set()
+    
+    def _bootstrap(self):
+        """Create indexes, then mark the manager ready"""
+        try:
+            # Make sure every read path is index-backed
+            self._ensure_indexes()
+        except Exception as e:
+            logging.error(f"Database bootstrap error: {e}")
+        finally:
+            self.ready.set()
+    
+    def _ensure_health_metrics_collection(self):
+        """Create health_metrics as a time-series collection, migrating a legacy flat collection"""
+        existing = {c["name"]: c for c in self.db.list_collections(filter={"name": "health_metrics"})}
+        if "health_metrics" in existing:
+            if existing["health_metrics"].get("type") != "timeseries":
+                logging.warning("health_metrics is a flat collection, migrating to a time-series collection")
+                self.migrate_health_metrics_to_timeseries()
             return
-            
-        # Sample diseases data
-        diseases_data = [
-            {
-                "name": "Common Cold",
-                "symptoms": ["runny nose", "sneezing", "mild fever", "cough", "sore throat"],
-                "probability_base": 0.85,
-                "risk_level": "low",
-                "description": "A viral infection affecting the upper respiratory tract"
-            },
-            {
-                "name": "Seasonal Allergies",
-                "symptoms": ["sneezing", "itchy eyes", "runny nose", "congestion"],
-                "probability_base": 0.72,
-                "risk_level": "low",
-                "description": "Allergic reaction to seasonal allergens like pollen"
-            },
-            {
-                "name": "Tension Headache",
-                "symptoms": ["headache", "neck stiffness", "fatigue", "stress"],
-                "probability_base": 0.68,
-                "risk_level": "low",
-                "description": "Most common type of headache caused by stress or tension"
-            },
-            {
-                "name": "Gastroenteritis",
-                "symptoms": ["nausea", "vomiting", "diarrhea", "abdominal pain", "fever"],
-                "probability_base": 0.45,
-                "risk_level": "medium",
-                "description": "Inflammation of stomach and intestines, often viral"
+        self._create_health_metrics_collection()
+    
+    def _create_health_metrics_collection(self):
+        self.db.create_collection(
+            "health_metrics",
+            timeseries={
+                "timeField": "timestamp",
+                "metaField": "meta",
+                "granularity": Config.METRICS_GRANULARITY
             },
-            {
-                "name": "Hypertension",
-                "symptoms": ["headache", "dizziness", "chest pain", "fatigue"],
-                "probability_base": 0.35,
-                "risk_level": "high",
-                "description": "High blood pressure condition requiring medical attention"
-            }
-        ]
+            expireAfterSeconds=Config.METRICS_RAW_RETENTION_DAYS * 86400
+        )
+    
+    def migrate_health_metrics_to_timeseries(self, batch_size=1000):
+        """Move a flat health_metrics collection into a new time-series collection"""
+        if self.db is None:
+            return 0
+        legacy_name = "health_metrics_legacy"
+        if legacy_name not in self.db.list_collection_names():
+            self.db.health_metrics.rename(legacy_name)
+        if "health_metrics" not in self.db.list_collection_names():
+            self._create_health_metrics_collection()
+        
+        migrated = 0
+        batch = []
+        cursor = self.db[legacy_name].find({"timestamp": {"$type": "date"}}, {"_id": 0}).batch_size(batch_size)
+        for doc in cursor:
+            batch.append(self._metrics_document(doc, doc.get("user_id", Config.DEFAULT_USER_ID), doc.get("device", "manual")))
+            if len(batch) >= batch_size:
+                self.db.health_metrics.insert_many(batch, ordered=False)
+                migrated += len(batch)
+                batch = []
+        if batch:
+            self.db.health_metrics.insert_many(batch, ordered=False)
+            migrated += len(batch)
+        
+        # Backfill the summary tiers from the full history
+        for unit in ROLLUP_COLLECTIONS:
+            self.rollup_health_metrics(unit)
         
-        # Sample remedies data
-        remedies_data = [
-            {
-                "condition": "common cold",
-                "title": "Natural Cold Relief",
-                "ingredients": ["Honey (2 tbsp)", "Fresh ginger (1 inch)", "Lemon juice (1 tbsp)", "Warm water (1 cup)", "Turmeric powder (1/2 tsp)"],
-                "instructions": [
-                    "Grate fresh ginger and steep in hot water for 5 minutes",
-                    "Strain the ginger tea and add honey while warm",
-                    "Add fresh lemon juice and turmeric powder",
-                    "Stir well and drink 2-3 times daily"
-                ],
-                "benefits": ["Boosts immune system", "Reduces inflammation", "Soothes throat irritation"],
-                "duration": "3-5 days"
+        logging.info(f"Migrated {migrated} health metrics; {legacy_name} can be dropped once verified")
+        return migrated
+    
+    @staticmethod
+    def _metrics_document(metrics_data, user_id, device):
+        """Shape a reading for the time-series collection, with user and device as metadata"""
+        document = {k: v for k, v in metrics_data.items() if k not in ("_id", "user_id", "device", "meta")}
+        document["meta"] = {"user_id": user_id, "device": device}
+        return document
+    
+    def raw_metrics_cutoff(self):
+        """Oldest reading the raw collection keeps before TTL expiry; None when nothing expires"""
+        if self.db is None:
+            return None
+        return datetime.utcnow() - timedelta(days=Config.METRICS_RAW_RETENTION_DAYS)
+    
+    def refresh_rollups(self, since):
+        """Recompute every rollup tier from the bucket containing since, e.g. after a backfill"""
+        for unit in ROLLUP_COLLECTIONS:
+            self.rollup_health_metrics(unit, since=bucket_start(since, unit))
+    
+    def rollup_health_metrics(self, unit, since=None):
+        """Recompute per-user summary buckets since a point in time and merge them into the rollup tier"""
+        if self.db is None:
+            return False
+        match = {"timestamp": {"$gte": since}} if since else {}
+        group = {
+            "_id": {
+                "user_id": "$meta.user_id",
+                "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": unit}}
             },
-            {
-                "condition": "headache",
-                "title": "Tension Headache Relief",
-                "ingredients": ["Peppermint oil (2-3 drops)", "Lavender oil (2-3 drops)", "Carrier oil", "Cold compress"],
-                "instructions": [
-                    "Mix essential oils with carrier oil",
-                    "Gently massage temples and forehead",
-                    "Apply cold compress to forehead for 15 minutes",
-                    "Rest in a dark, quiet room"
-                ],
-                "benefits": ["Reduces muscle tension", "Promotes relaxation", "Natural pain relief"],
-                "duration": "30 minutes to 2 hours"
-            }
-        ]
+            "count": {"$sum": 1}
+        }
+        for metric in METRIC_COLUMNS:
+            group[f"{metric}_min"] = {"$min": f"${metric}"}
+            group[f"{metric}_max"] = {"$max": f"${metric}"}
+            group[f"{metric}_mean"] = {"$avg": f"${metric}"}
         
-        # Insert data if collections are empty
-        if self.diseases_collection.count_documents({}) == 0:
-            self.diseases_collection.insert_many(diseases_data)
+        pipeline = [
+            {"$match": match},
+            {"$group": group},
+            {"$set": {"user_id": "$_id.user_id", "bucket": "$_id.bucket"}},
+            {"$merge": {"into": ROLLUP_COLLECTIONS[unit], "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+        try:
+            self.health_metrics_collection.aggregate(pipeline, allowDiskUse=True)
+            return True
+        except Exception as e:
+            logging.error(f"Error rolling up health metrics by {unit}: {e}")
+            return False
+    
+    def _ensure_indexes(self):
+        """Create the declared indexes; create_index is a no-op when they already exist"""
+        for collection_name, indexes in INDEXES.items():
+            for keys, options in indexes:
+                try:
+                    self.db[collection_name].create_index(keys, **options)
+                except Exception as e:
+                    logging.error(f"Error creating index {options.get('name')} on {collection_name}: {e}")
+    
+    def explain(self, collection_name, query, sort=None, projection=None):
+        """Explain a query, flagging collection scans and reporting whether the index alone answers it"""
+        if self.db is None:
+            return None
+        cursor = self.db[collection_name].find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        stages, indexes = plan_stages(cursor.explain())
         
-        if self.remedies_collection.count_documents({}) == 0:
-            self.remedies_collection.insert_many(remedies_data)
+        collscan = "COLLSCAN" in stages
+        if collscan:
+            logging.warning(f"Query on {collection_name} uses COLLSCAN: {query}")
+        # Covered means no stage had to load documents after the index scan
+        covered = "IXSCAN" in stages and not {"FETCH", "COLLSCAN", "$_internalUnpackBucket"} & set(stages)
+        return {"collection": collection_name, "stages": stages, "indexes": indexes, "collscan": collscan, "covered": covered}
+    
+    def check_query_plans(self, user_id=Config.DEFAULT_USER_ID):
+        """Explain the manager's own read paths"""
+        return [
+            self.explain("remedies", {"condition": "common cold"}, projection=REMEDY_FIELDS),
+            self.explain("health_metrics", {"meta.user_id": user_id}, sort=[("timestamp", DESCENDING)], projection=METRIC_FIELDS),
+            self.explain("chat_history", {"user_id": user_id}, sort=[("timestamp", DESCENDING)], projection=CHAT_FIELDS)
+        ]
+    
+    def _load_reference_data(self):
+        return (
+            list(self.diseases_collection.find({}, DISEASE_FIELDS)),
+            list(self.remedies_collection.find({}, REMEDY_FIELDS))
+        )
     
     def get_diseases(self):
-        """Get all diseases from database"""
-        if self.db is None:
-            return []
-        return list(self.diseases_collection.find({}, {"_id": 0}))
+        """Get all diseases from the reference cache"""
+        return self.reference.get_diseases()
+    
+    def get_diseases_by_symptom(self, symptom):
+        """Diseases listing a symptom, from the reference cache"""
+        return self.reference.get_diseases_by_symptom(symptom)
     
     def get_remedy(self, condition):
-        """Get remedy for specific condition"""
+        """Get remedy for specific condition from the reference cache"""
+        return self.reference.get_remedy(condition)
+    
+    def match_term(self, text):
+        """Closest known symptom or condition to free text, allowing aliases and typos"""
+        return self.reference.match_term(text)
+    
+    def canonicalize(self, text):
+        """Canonical form of a symptom or condition entered as free text"""
+        return self.reference.canonicalize(text)
+    
+    def get_generated_remedy(self, condition):
+        """Remedy previously generated for a normalized condition"""
         if self.db is None:
-            return None
-        return self.remedies_collection.find_one({"condition": condition.lower()}, {"_id": 0})
+            return self.memory.get_generated_remedy(condition)
+        return self.generated_remedies_collection.find_one({"condition": condition}, REMEDY_FIELDS)
     
-    def save_health_metrics(self, metrics_data):
-        """Save health metrics to database"""
+    def save_generated_remedy(self, condition, remedy, model_id, prompt_version):
+        """Keep a generated remedy for reuse; the first one saved for a condition wins"""
+        remedy_data = {
+            **remedy,
+            "condition": condition,
+            "model_id": model_id,
+            "prompt_version": prompt_version,
+            "created_at": datetime.now()
+        }
         if self.db is None:
-            return False
+            return self.memory.save_generated_remedy(remedy_data)
+        self.generated_remedies_collection.update_one(
+            {"condition": condition}, {"$setOnInsert": remedy_data}, upsert=True
+        )
+        return True
+    
+    def save_health_metrics(self, metrics_data, user_id=Config.DEFAULT_USER_ID, device="manual"):
+        """Save health metrics to database"""
         try:
-            metrics_data['timestamp'] = datetime.now()
-            self.health_metrics_collection.insert_one(metrics_data)
+            # Stamp a copy; the caller keeps using its own dict, e.g. in the session's buffer
+            metrics_data = dict(metrics_data, timestamp=datetime.utcnow())
+            if self.db is None:
+                metrics_data['user_id'] = user_id
+                return self.memory.save_health_metrics(metrics_data)
+            document = self._metrics_document(metrics_data, user_id, device)
+            if self.writer is not None:
+                return self.writer.enqueue("health_metrics", document)
+            self.health_metrics_collection.insert_one(document)
             return True
         except Exception as e:
             logging.error(f"Error saving health metrics: {e}")
             return False
     
-    def get_health_metrics(self, limit=30):
-        """Get recent health metrics"""
+    def get_health_metrics(self, limit=30, user_id=None):
+        """Get recent health metrics, optionally for a single user"""
         if self.db is None:
-            return []
-        return list(self.health_metrics_collection.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit))
+            return self.memory.get_health_metrics(limit, user_id)
+        query = {"meta.user_id": user_id} if user_id else {}
+        return list(self.health_metrics_collection.find(query, METRIC_FIELDS).sort("timestamp", DESCENDING).limit(limit))
     
-    def save_chat_message(self, user_id, message, response):
-        """Save chat conversation"""
+    def insert_health_metrics(self, records):
+        """Bulk insert readings that already carry user_id, device and timestamp; returns the count written"""
+        if not records:
+            return 0
         if self.db is None:
-            return False
+            for record in records:
+                self.memory.save_health_metrics(record)
+            return len(records)
+        documents = [self._metrics_document(r, r["user_id"], r.get("device", "import")) for r in records]
+        try:
+            result = self.health_metrics_collection.insert_many(documents, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            logging.error(f"Bulk metrics insert partially failed: {e.details.get('writeErrors', [])[:1]}")
+            return e.details.get("nInserted", 0)
+    
+    def existing_metric_keys(self, user_ids, start, end):
+        """(user_id, timestamp) pairs already stored for the given users within [start, end]"""
+        if self.db is None:
+            return self.memory.existing_metric_keys(user_ids, start, end)
+        cursor = self.health_metrics_collection.find(
+            {"meta.user_id": {"$in": list(user_ids)}, "timestamp": {"$gte": start, "$lte": end}},
+            {"_id": 0, "meta.user_id": 1, "timestamp": 1}
+        )
+        return {(doc["meta"]["user_id"], doc["timestamp"]) for doc in cursor}
+    
+    def iter_documents(self, collection_name, user_id=None, start=None, end=None, batch_size=10000):
+        """Yield health_metrics or chat_history documents oldest first, one cursor batch at a time"""
+        if collection_name not in EXPORT_FIELDS:
+            raise ValueError(f"Unsupported export collection: {collection_name}")
+        if self.db is None:
+            yield from self.memory.iter_documents(collection_name, user_id, start, end, batch_size)
+            return
+        
+        query = {}
+        if user_id:
+            query["meta.user_id" if collection_name == "health_metrics" else "user_id"] = user_id
+        if start or end:
+            query["timestamp"] = {}
+            if start:
+                query["timestamp"]["$gte"] = start
+            if end:
+                query["timestamp"]["$lt"] = end
+        
+        cursor = self.db[collection_name].find(query, EXPORT_FIELDS[collection_name]).sort("timestamp", ASCENDING).batch_size(batch_size)
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def export_users(self, collection_name, start=None, end=None):
+        """Users with health_metrics or chat_history documents in [start, end)"""
+        if collection_name not in EXPORT_FIELDS:
+            raise ValueError(f"Unsupported export collection: {collection_name}")
+        if self.db is None:
+            return self.memory.export_users(collection_name, start, end)
+        query = {}
+        if start or end:
+            query["timestamp"] = {}
+            if start:
+                query["timestamp"]["$gte"] = start
+            if end:
+                query["timestamp"]["$lt"] = end
+        field = "meta.user_id" if collection_name == "health_metrics" else "user_id"
+        return sorted(self.db[collection_name].distinct(field, query))
+    
+    def delete_health_metrics(self, before, user_id=None):
+        """Remove readings older than a cutoff once they have been archived; returns the count deleted"""
+        if self.db is None:
+            # The in-memory ring buffer already evicts its oldest readings
+            return 0
+        query = {"timestamp": {"$lt": before}}
+        if user_id:
+            query["meta.user_id"] = user_id
+        try:
+            return self.health_metrics_collection.delete_many(query).deleted_count
+        except Exception as e:
+            logging.error(f"Error deleting archived health metrics: {e}")
+            return 0
+    
+    def get_health_metrics_summary(self, user_id=None, unit="day", start=None, end=None, metrics=None):
+        """Per-bucket count and min/max/mean/percentiles of each metric, as columnar lists.
+        
+        Hourly and daily summaries read the rollup tier for buckets raw retention may already have
+        expired, and aggregate raw readings only for the recent edge.
+        """
+        if unit not in SUMMARY_UNITS:
+            raise ValueError(f"Unsupported summary unit: {unit}")
+        metrics = metrics or METRIC_COLUMNS
+        if self.db is None:
+            return self.memory.summarize_health_metrics(user_id, unit, start, end, metrics, SUMMARY_PERCENTILES)
+        
+        summary = {"bucket": [], "count": []}
+        for metric in metrics:
+            for stat in ("min", "max", "mean"):
+                summary[f"{metric}_{stat}"] = []
+            if Config.MONGODB_PERCENTILES:
+                for p in SUMMARY_PERCENTILES:
+                    summary[f"{metric}_p{int(p * 100)}"] = []
+        
+        raw_start = start
+        if unit in ROLLUP_COLLECTIONS:
+            # First bucket wholly inside raw retention; everything before it comes from the rollups
+            split = bucket_start(self.raw_metrics_cutoff(), unit) + ROLLUP_BUCKET_SIZES[unit]
+            if start is None or start < split:
+                self._summarize_rollups(summary, user_id, unit, start, min(end, split) if end else split, metrics)
+                raw_start = split
+        if end is None or raw_start is None or raw_start < end:
+            self._summarize_raw(summary, user_id, unit, raw_start, end, metrics)
+        return summary
+    
+    def _summarize_raw(self, summary, user_id, unit, start, end, metrics):
+        """Append buckets aggregated from raw readings in [start, end)"""
+        match = {}
+        if user_id:
+            match["meta.user_id"] = user_id
+        if start or end:
+            match["timestamp"] = {}
+            if start:
+                match["timestamp"]["$gte"] = start
+            if end:
+                match["timestamp"]["$lt"] = end
+        
+        group = {
+            "_id": {"$dateTrunc": {"date": "$timestamp", "unit": unit}},
+            "count": {"$sum": 1}
+        }
+        for metric in metrics:
+            group[f"{metric}_min"] = {"$min": f"${metric}"}
+            group[f"{metric}_max"] = {"$max": f"${metric}"}
+            group[f"{metric}_mean"] = {"$avg": f"${metric}"}
+            if Config.MONGODB_PERCENTILES:
+                group[f"{metric}_pct"] = {"$percentile": {"input": f"${metric}", "p": list(SUMMARY_PERCENTILES), "method": "approximate"}}
+        
+        pipeline = [{"$match": match}, {"$group": group}, {"$sort": {"_id": 1}}]
+        
+        try:
+            for row in self.health_metrics_collection.aggregate(pipeline, allowDiskUse=True):
+                summary["bucket"].append(row["_id"])
+                summary["count"].append(row["count"])
+                for metric in metrics:
+                    for stat in ("min", "max", "mean"):
+                        summary[f"{metric}_{stat}"].append(row.get(f"{metric}_{stat}"))
+                    if Config.MONGODB_PERCENTILES:
+                        values = row.get(f"{metric}_pct") or [None] * len(SUMMARY_PERCENTILES)
+                        for p, value in zip(SUMMARY_PERCENTILES, values):
+                            summary[f"{metric}_p{int(p * 100)}"].append(value)
+        except Exception as e:
+            logging.error(f"Error aggregating health metrics: {e}")
+    
+    def _summarize_rollups(self, summary, user_id, unit, start, end, metrics):
+        """Append buckets from the rollup tier in [start, end); percentiles are not kept there"""
+        match = {"bucket": {"$lt": end}}
+        if start:
+            match["bucket"]["$gte"] = start
+        if user_id:
+            match["user_id"] = user_id
+        
+        # Rollups are per user; combining users weights each mean by its reading count
+        group = {"_id": "$bucket", "count": {"$sum": "$count"}}
+        for metric in metrics:
+            group[f"{metric}_min"] = {"$min": f"${metric}_min"}
+            group[f"{metric}_max"] = {"$max": f"${metric}_max"}
+            group[f"{metric}_total"] = {"$sum": {"$multiply": [f"${metric}_mean", "$count"]}}
+            group[f"{metric}_weight"] = {"$sum": {"$cond": [{"$eq": [f"${metric}_mean", None]}, 0, "$count"]}}
+        
+        pipeline = [{"$match": match}, {"$group": group}, {"$sort": {"_id": 1}}]
+        
+        try:
+            for row in self.db[ROLLUP_COLLECTIONS[unit]].aggregate(pipeline):
+                summary["bucket"].append(row["_id"])
+                summary["count"].append(row["count"])
+                for metric in metrics:
+                    summary[f"{metric}_min"].append(row.get(f"{metric}_min"))
+                    summary[f"{metric}_max"].append(row.get(f"{metric}_max"))
+                    weight = row.get(f"{metric}_weight")
+                    summary[f"{metric}_mean"].append(row[f"{metric}_total"] / weight if weight else None)
+                    if Config.MONGODB_PERCENTILES:
+                        for p in SUMMARY_PERCENTILES:
+                            summary[f"{metric}_p{int(p * 100)}"].append(None)
+        except Exception as e:
+            logging.error(f"Error reading {ROLLUP_COLLECTIONS[unit]}: {e}")
+    
+    def save_chat_message(self, user_id, message, response, summary=None, timestamp=None):
+        """Save chat conversation, with the conversation digest current as of this turn"""
         try:
             chat_data = {
                 "user_id": user_id,
                 "message": message,
                 "response": response,
-                "timestamp": datetime.now()
+                "timestamp": timestamp or datetime.now()
             }
+            if summary:
+                chat_data["summary"] = summary
+            if self.db is None:
+                return self.memory.save_chat_message(chat_data)
+            if self.writer is not None:
+                return self.writer.enqueue("chat_history", chat_data)
             self.chat_history_collection.insert_one(chat_data)
             return True
         except Exception as e:
             logging.error(f"Error saving chat message: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def get_chat_history(self, user_id, limit=50, skip=0, before=None):
+        """Get chat messages for a user, newest first; paging passes a fixed `before` cursor so
+        messages still being written behind cannot shift the `skip` offsets"""
+        if self.db is None:
+            return self.memory.get_chat_history(user_id, limit, skip, before)
+        query = {"user_id": user_id}
+        if before is not None:
+            query["timestamp"] = {"$lt": before}
+        cursor = self.chat_history_collection.find(query, CHAT_FIELDS).sort("timestamp", DESCENDING)
+        return list(cursor.skip(skip).limit(limit))
+    
+    def count_chat_messages(self, user_id, before=None):
+        """Number of stored chat messages for a user, optionally only those older than `before`"""
+        if self.db is None:
+            return self.memory.count_chat_messages(user_id, before)
+        query = {"user_id": user_id}
+        if before is not None:
+            query["timestamp"] = {"$lt": before}
+        return self.chat_history_collection.count_documents(query)
+    
+    def write_metrics(self):
+        """Write-behind queue depth and flush latency, if the queue is enabled"""
+        if self.writer is None:
+            return None
+        return self.writer.metrics()
+    
+    def close(self):
+        """Flush pending writes and close the connection"""
+        self.reference.stop()
+        if self.rollups is not None:
+            self.rollups.stop()
+        if self.memory is not None:
+            self.memory.snapshot()
+        if self.writer is not None:
+            self.writer.close()
+        if self.client is not None:
+            self.client.close()
\ No newline at end of file
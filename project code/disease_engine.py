@@ -0,0 +1,105 @@
+import numpy as np
+from scipy import sparse
+from typing import List, Dict, Any, Callable, Iterable, Optional, Sequence
+
+RISK_RECOMMENDATIONS = {
+    "low": ["Rest", "Stay hydrated", "Monitor your symptoms"],
+    "medium": ["Consult a healthcare provider if symptoms persist", "Rest", "Stay hydrated"],
+    "high": ["Seek medical attention promptly", "Do not ignore worsening symptoms"]
+}
+
+
+class DiseaseScoringEngine:
+    """Vectorized symptom-to-disease scoring over a sparse incidence matrix"""
+
+    def __init__(self, diseases: Iterable[Dict[str, Any]], canonicalize: Optional[Callable[[str], str]] = None):
+        # Symptoms are compared in canonical form so aliases and misspellings share a column
+        self.canonicalize = canonicalize or (lambda symptom: symptom.strip().lower())
+        self.diseases = [d for d in diseases if d.get("symptoms")]
+        self.vocabulary: Dict[str, int] = {}
+
+        rows, cols = [], []
+        for row, disease in enumerate(self.diseases):
+            for symptom in {self.canonicalize(s) for s in disease["symptoms"]}:
+                cols.append(self.vocabulary.setdefault(symptom, len(self.vocabulary)))
+                rows.append(row)
+
+        # diseases x symptoms, one nonzero per (disease, symptom) pair
+        self.incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(self.diseases), len(self.vocabulary))
+        )
+        self.symptom_counts = np.asarray(self.incidence.sum(axis=1), dtype=np.float32).ravel()
+        self.probability_base = np.array(
+            [float(d.get("probability_base", 0.5)) for d in self.diseases], dtype=np.float32
+        )
+
+    def __len__(self):
+        return len(self.diseases)
+
+    def _vectorize(self, symptom_sets: Sequence[Iterable[str]]):
+        """Encode symptom sets as a sparse query matrix plus their input sizes"""
+        rows, cols = [], []
+        sizes = np.zeros(len(symptom_sets), dtype=np.float32)
+        for row, symptoms in enumerate(symptom_sets):
+            normalized = {self.canonicalize(s) for s in symptoms}
+            sizes[row] = len(normalized)
+            for symptom in normalized:
+                col = self.vocabulary.get(symptom)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+
+        queries = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(symptom_sets), len(self.vocabulary))
+        )
+        return queries, sizes
+
+    def score_batch(self, symptom_sets: Sequence[Iterable[str]]) -> np.ndarray:
+        """Score every disease for every symptom set, returning a sets x diseases array in [0, 1]"""
+        if not self.diseases or not symptom_sets:
+            return np.zeros((len(symptom_sets), len(self.diseases)), dtype=np.float32)
+
+        queries, sizes = self._vectorize(symptom_sets)
+        overlap = (queries @ self.incidence.T).toarray()
+
+        # Cosine similarity between the query and disease symptom sets, scaled by the disease's base rate
+        norms = np.sqrt(np.outer(np.maximum(sizes, 1), self.symptom_counts))
+        return overlap / norms * self.probability_base
+
+    def rank_batch(self, symptom_sets: Sequence[Iterable[str]], top_k: int = 5,
+                   min_probability: int = 1) -> List[List[Dict[str, Any]]]:
+        """Rank diseases for each symptom set in the prediction dict shape"""
+        scores = self.score_batch(symptom_sets)
+        top_k = min(top_k, len(self.diseases))
+        results = []
+
+        for row in scores:
+            if top_k == 0:
+                results.append([])
+                continue
+            candidates = np.argpartition(-row, top_k - 1)[:top_k]
+            candidates = candidates[np.argsort(-row[candidates], kind="stable")]
+
+            predictions = []
+            for idx in candidates:
+                probability = int(round(float(row[idx]) * 100))
+                if probability < min_probability:
+                    break
+                disease = self.diseases[idx]
+                risk_level = disease.get("risk_level", "low")
+                predictions.append({
+                    "name": disease.get("name", "Unknown Condition"),
+                    "probability": probability,
+                    "risk_level": risk_level,
+                    "description": disease.get("description", ""),
+                    "recommendations": disease.get("recommendations") or RISK_RECOMMENDATIONS.get(risk_level, [])
+                })
+            results.append(predictions)
+
+        return results
+
+    def rank(self, symptoms: Iterable[str], top_k: int = 5) -> List[Dict[str, Any]]:
+        """Rank diseases for a single symptom set"""
+        return self.rank_batch([list(symptoms)], top_k=top_k)[0]
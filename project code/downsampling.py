@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Tuple
+
+# Rollup levels from finest to coarsest as (label, pandas frequency)
+ROLLUP_LEVELS = [("hourly", "h"), ("daily", "D"), ("weekly", "W")]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of n_out points that preserve the series' visual shape"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x[0]
+    y = np.asarray(y, dtype=np.float64)
+    # n_out - 2 buckets between the fixed first and last points
+    bounds = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.int64), n)
+    starts, ends = bounds[:-2], bounds[1:-1]
+
+    # Each bucket triangulates against the mean of the bucket after it (the last point for the final bucket)
+    next_starts, next_ends = bounds[1:-1], bounds[2:]
+    counts = np.maximum(next_ends - next_starts, 1)
+    cum_x = np.concatenate([[0.0], np.cumsum(x)])
+    cum_y = np.concatenate([[0.0], np.cumsum(y)])
+    avg_x = (cum_x[next_ends] - cum_x[next_starts]) / counts
+    avg_y = (cum_y[next_ends] - cum_y[next_starts]) / counts
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = starts[i]
+        end = max(ends[i], start + 1)
+        area = np.abs(
+            (x[a] - avg_x[i]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y[i] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Min/max bucketing: keep each bucket's extremes so every peak and trough survives"""
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    size = n // n_buckets
+    buckets = np.asarray(y[:size * n_buckets], dtype=np.float64).reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    indices = np.concatenate([offsets + buckets.argmin(axis=1), offsets + buckets.argmax(axis=1), [n - 1]])
+    return np.unique(indices)
+
+
+def build_rollups(frame: pd.DataFrame, metric: str) -> Dict[str, pd.DataFrame]:
+    """Mean/min/max of a metric per hour, day and week"""
+    series = frame.set_index(pd.DatetimeIndex(frame['date']))[metric].dropna()
+    rollups = {}
+    for label, freq in ROLLUP_LEVELS:
+        grouped = series.resample(freq).agg(['mean', 'min', 'max']).dropna()
+        rollups[label] = grouped.rename_axis('date').reset_index()
+    return rollups
+
+
+def visible(frame: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """Rows of a frame with a 'date' column inside [start, end]"""
+    if start is None and end is None:
+        return frame
+    mask = np.ones(len(frame), dtype=bool)
+    if start is not None:
+        mask &= (frame['date'] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (frame['date'] <= pd.Timestamp(end)).to_numpy()
+    return frame[mask]
+
+
+def choose_rollup(rollups: Dict[str, pd.DataFrame], max_points: int, start=None, end=None) -> Tuple[str, pd.DataFrame]:
+    """Finest rollup level whose buckets in the visible range fit the point budget, else the coarsest"""
+    for label, _ in ROLLUP_LEVELS:
+        window = visible(rollups[label], start, end)
+        if len(window) <= max_points:
+            return label, window
+    label = ROLLUP_LEVELS[-1][0]
+    return label, visible(rollups[label], start, end)
+
+
+def downsample_series(dates, values, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduce a raw series to at most max_points with LTTB"""
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    dates, values = dates[valid], values[valid]
+    indices = lttb_indices(dates.astype(np.int64), values, max_points)
+    return dates[indices], values[indices]
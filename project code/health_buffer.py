@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict
+
+# Column dtypes for the six tracked metrics (units in utils.get_metric_unit)
+HEALTH_METRIC_SCHEMA = {
+    'heart_rate': np.int64,
+    'systolic_bp': np.int64,
+    'diastolic_bp': np.int64,
+    'glucose': np.int64,
+    'weight': np.float64,
+    'temperature': np.float64
+}
+
+
+class HealthDataBuffer:
+    """Append-only columnar time series of health readings backed by preallocated NumPy arrays"""
+
+    def __init__(self, capacity=256):
+        capacity = max(int(capacity), 1)
+        self._size = 0
+        self._dates = np.empty(capacity, dtype='datetime64[ns]')
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in HEALTH_METRIC_SCHEMA.items()}
+        # Chart rollups per metric, dropped whenever a reading is appended
+        self._rollups: Dict[str, Dict[str, pd.DataFrame]] = {}
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "HealthDataBuffer":
+        """Build a buffer from a frame with a 'date' column and the schema's metric columns"""
+        buffer = cls(capacity=max(len(frame) * 2, 256))
+        n = len(frame)
+        buffer._dates[:n] = pd.to_datetime(frame['date']).to_numpy(dtype='datetime64[ns]')
+        for name, column in buffer._columns.items():
+            column[:n] = frame[name].to_numpy(dtype=column.dtype)
+        buffer._size = n
+        return buffer
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def empty(self) -> bool:
+        return self._size == 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._dates)
+
+    def _grow(self):
+        """Double capacity so appends stay amortized O(1)"""
+        capacity = self.capacity * 2
+        dates = np.empty(capacity, dtype=self._dates.dtype)
+        dates[:self._size] = self._dates[:self._size]
+        self._dates = dates
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, reading: Dict[str, Any]):
+        """Append one reading with a 'date' and a value for every metric"""
+        if self._size == self.capacity:
+            self._grow()
+        i = self._size
+        self._dates[i] = np.datetime64(reading.get('date') or datetime.now(), 'ns')
+        for name, column in self._columns.items():
+            column[i] = reading[name]
+        self._size += 1
+        self._rollups.clear()
+
+    def column(self, name: str) -> np.ndarray:
+        """View of one metric column (or 'date') without copying"""
+        if name == 'date':
+            return self._dates[:self._size]
+        return self._columns[name][:self._size]
+
+    def rollups(self, metric: str) -> Dict[str, pd.DataFrame]:
+        """Hourly/daily/weekly rollups of a metric, rebuilt only after new readings arrive"""
+        cached = self._rollups.get(metric)
+        if cached is None:
+            from downsampling import build_rollups
+            cached = self._rollups[metric] = build_rollups(self.to_frame(), metric)
+        return cached
+
+    def latest(self) -> Dict[str, Any]:
+        """Most recent reading as a dict"""
+        if self.empty:
+            return {}
+        i = self._size - 1
+        latest = {'date': pd.Timestamp(self._dates[i])}
+        latest.update({name: column[i].item() for name, column in self._columns.items()})
+        return latest
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame whose columns are views over the buffer's arrays"""
+        data = {'date': self.column('date')}
+        data.update({name: self.column(name) for name in self._columns})
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is rejecting calls"""
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a sliding window of recent calls"""
+
+    def __init__(self, error_rate=None, window=None, min_calls=None, cooldown=None):
+        self.error_rate = error_rate if error_rate is not None else Config.WATSON_BREAKER_ERROR_RATE
+        self.window = window or Config.WATSON_BREAKER_WINDOW
+        self.min_calls = min_calls or Config.WATSON_BREAKER_MIN_CALLS
+        self.cooldown = cooldown if cooldown is not None else Config.WATSON_BREAKER_COOLDOWN
+        self._outcomes = deque(maxlen=self.window)
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current breaker state: closed, open or half-open"""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go through"""
+        with self._lock:
+            return self._state() != "open"
+
+    def record_success(self):
+        """Record a successful call, closing the breaker if it was probing"""
+        with self._lock:
+            if self._opened_at is not None:
+                self._opened_at = None
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        """Record a failed call and trip the breaker past the error threshold"""
+        with self._lock:
+            if self._state() == "half-open":
+                self._opened_at = time.monotonic()
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+                logging.error(f"Circuit breaker opened after {failures}/{len(self._outcomes)} failed calls")
+                self._opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """Token bucket shared by all threads making requests through a transport"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HTTPTransport:
+    """Pooled HTTP transport with timeouts, jittered retries and a circuit breaker"""
+
+    def __init__(self, pool_size=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, breaker: Optional[CircuitBreaker] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.pool_size = pool_size or Config.WATSON_POOL_SIZE
+        self.timeout = (
+            connect_timeout or Config.WATSON_CONNECT_TIMEOUT,
+            read_timeout or Config.WATSON_READ_TIMEOUT
+        )
+        self.max_retries = max_retries if max_retries is not None else Config.WATSON_MAX_RETRIES
+        self.breaker = breaker or CircuitBreaker()
+        if rate_limiter is None and Config.WATSON_RATE_LIMIT > 0:
+            rate_limiter = RateLimiter(Config.WATSON_RATE_LIMIT)
+        self.rate_limiter = rate_limiter
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _session_for(self, url: str) -> requests.Session:
+        """Get the keep-alive session for the endpoint host, creating it on first use"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_size,
+                    max_retries=0
+                )
+                session.mount(origin, adapter)
+                self._sessions[origin] = session
+            return session
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        """Delay before the next attempt, honouring Retry-After when present"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), Config.WATSON_BACKOFF_MAX)
+        delay = min(Config.WATSON_BACKOFF_MAX, Config.WATSON_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, delay)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST with pooling, timeouts and bounded retries on 429/5xx and connection errors"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuit open, skipping request to {url}")
+
+        kwargs.setdefault("timeout", self.timeout)
+        session = self._session_for(url)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            if attempt and not self.breaker.allow_request():
+                raise CircuitOpenError(f"Circuit opened while retrying request to {url}")
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = session.post(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.breaker.record_failure()
+                if last_attempt:
+                    raise
+                logging.warning(f"Request to {url} failed ({e}), retrying")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES:
+                self.breaker.record_failure()
+                if last_attempt:
+                    return response
+                logging.warning(f"Request to {url} returned {response.status_code}, retrying")
+                delay = self._backoff(attempt, response)
+                # Streamed responses hold their pooled connection until closed
+                response.close()
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return response
+
+    def close(self):
+        """Close all pooled sessions"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
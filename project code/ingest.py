@@ -0,0 +1,237 @@
+import argparse
+import logging
+import time
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from health_buffer import HEALTH_METRIC_SCHEMA
+from utils import HEALTH_RANGES
+
+# Column names seen in CSV/Parquet/wearable exports, mapped onto our schema
+COLUMN_ALIASES = {
+    'time': 'timestamp', 'date': 'timestamp', 'datetime': 'timestamp', 'recorded_at': 'timestamp',
+    'user': 'user_id', 'userid': 'user_id', 'patient_id': 'user_id',
+    'device_id': 'device', 'source': 'device',
+    'hr': 'heart_rate', 'bpm': 'heart_rate', 'pulse': 'heart_rate', 'heartrate': 'heart_rate',
+    'systolic': 'systolic_bp', 'sys': 'systolic_bp', 'bp_systolic': 'systolic_bp',
+    'diastolic': 'diastolic_bp', 'dia': 'diastolic_bp', 'bp_diastolic': 'diastolic_bp',
+    'blood_glucose': 'glucose', 'bg': 'glucose',
+    'body_weight': 'weight', 'weight_kg': 'weight',
+    'temp': 'temperature', 'body_temperature': 'temperature', 'temperature_c': 'temperature'
+}
+
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl'}
+
+
+@dataclass
+class IngestReport:
+    """Running totals for one import"""
+    rows_read: int = 0
+    rows_inserted: int = 0
+    duplicates: int = 0
+    invalid_rows: int = 0
+    rejected_values: int = 0
+    expired_rows: int = 0
+    oldest_inserted: Optional[datetime] = None
+    chunks: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+
+def detect_format(name: str) -> str:
+    """File format from a path or upload name"""
+    for suffix, fmt in FORMATS.items():
+        if str(name).lower().endswith(suffix):
+            return fmt
+    raise ValueError(f"Unsupported file type: {name}")
+
+
+def iter_chunks(source, fmt: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Read a path or file object in bounded-size chunks"""
+    if fmt == 'csv':
+        yield from pd.read_csv(source, chunksize=chunksize)
+    elif fmt == 'jsonl':
+        yield from pd.read_json(source, lines=True, chunksize=chunksize)
+    elif fmt == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def normalize_chunk(chunk: pd.DataFrame, user_id: str, device: str) -> pd.DataFrame:
+    """Map export columns onto the metrics schema and parse timestamps to millisecond naive UTC datetimes"""
+    renamed = {}
+    for column in chunk.columns:
+        key = str(column).strip().lower().replace(' ', '_').replace('-', '_')
+        renamed[column] = COLUMN_ALIASES.get(key, key)
+    chunk = chunk.rename(columns=renamed)
+    chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+
+    if 'timestamp' not in chunk.columns:
+        raise ValueError("Import file needs a timestamp column")
+
+    timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce', utc=True)
+    frame = pd.DataFrame({
+        'timestamp': timestamps.dt.tz_localize(None).dt.floor('ms'),
+        'user_id': chunk['user_id'].astype(str) if 'user_id' in chunk.columns else user_id,
+        'device': chunk['device'].astype(str) if 'device' in chunk.columns else device
+    })
+    for name in HEALTH_METRIC_SCHEMA:
+        if name in chunk.columns:
+            frame[name] = pd.to_numeric(chunk[name], errors='coerce').astype(np.float64)
+    return frame
+
+
+def validate_chunk(frame: pd.DataFrame, report: IngestReport) -> pd.DataFrame:
+    """Null out values outside HEALTH_RANGES and drop rows with no timestamp or no valid metric"""
+    metrics = [name for name in HEALTH_METRIC_SCHEMA if name in frame.columns]
+    for name in metrics:
+        low, high = HEALTH_RANGES[name]
+        values = frame[name].to_numpy(dtype=np.float64)
+        out_of_range = ~np.isnan(values) & ((values < low) | (values > high))
+        report.rejected_values += int(out_of_range.sum())
+        frame.loc[out_of_range, name] = np.nan
+
+    keep = frame['timestamp'].notna()
+    if metrics:
+        keep &= frame[metrics].notna().any(axis=1)
+    else:
+        keep &= False
+    report.invalid_rows += int((~keep).sum())
+    return frame[keep]
+
+
+def deduplicate_chunk(frame: pd.DataFrame, db_manager, report: IngestReport) -> pd.DataFrame:
+    """Drop repeated (user_id, timestamp) pairs within the chunk and against stored readings"""
+    before = len(frame)
+    frame = frame.drop_duplicates(subset=['user_id', 'timestamp'])
+    if not frame.empty:
+        existing = db_manager.existing_metric_keys(
+            frame['user_id'].unique().tolist(),
+            frame['timestamp'].min().to_pydatetime(),
+            frame['timestamp'].max().to_pydatetime()
+        )
+        if existing:
+            existing_index = pd.MultiIndex.from_tuples(
+                [(user, pd.Timestamp(ts).floor('ms')) for user, ts in existing], names=['user_id', 'timestamp']
+            )
+            stored = pd.MultiIndex.from_frame(frame[['user_id', 'timestamp']]).isin(existing_index)
+            frame = frame[~stored]
+    report.duplicates += before - len(frame)
+    return frame
+
+
+def drop_expired(frame: pd.DataFrame, cutoff: Optional[datetime], report: IngestReport) -> pd.DataFrame:
+    """Drop readings the raw collection would expire straight away, so they are not reported as imported"""
+    if cutoff is None or frame.empty:
+        return frame
+    expired = frame['timestamp'] < pd.Timestamp(cutoff)
+    report.expired_rows += int(expired.sum())
+    return frame[~expired]
+
+
+def column_values(column: pd.Series) -> list:
+    """Column as a list of native Python values, datetimes included"""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return list(column.dt.to_pydatetime())
+    return column.tolist()
+
+
+def to_records(frame: pd.DataFrame):
+    """Rows as documents, omitting missing metrics.
+
+    Rows are grouped by which metrics they carry and each group is converted column by column,
+    so values are unboxed in bulk rather than cell by cell.
+    """
+    if frame.empty:
+        return []
+    metrics = [name for name in HEALTH_METRIC_SCHEMA if name in frame.columns]
+    base = [column for column in frame.columns if column not in metrics]
+    present = frame[metrics].notna().to_numpy()
+    patterns, inverse = np.unique(present, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    records = []
+    for i, pattern in enumerate(patterns):
+        group = frame[inverse == i]
+        columns = base + [name for name, has in zip(metrics, pattern) if has]
+        values = [column_values(group[column]) for column in columns]
+        records.extend(dict(zip(columns, row)) for row in zip(*values))
+    return records
+
+
+def ingest_file(db_manager, source, fmt: Optional[str] = None, user_id: Optional[str] = None,
+                device: str = "import", chunksize: Optional[int] = None,
+                progress: Optional[Callable[[IngestReport], None]] = None) -> IngestReport:
+    """Stream a CSV/Parquet/JSON-lines export into health_metrics in validated, deduplicated batches"""
+    fmt = fmt or detect_format(getattr(source, 'name', source))
+    user_id = user_id or Config.DEFAULT_USER_ID
+    chunksize = chunksize or Config.INGEST_CHUNK_SIZE
+    report = IngestReport()
+    cutoff = db_manager.raw_metrics_cutoff()
+
+    for chunk in iter_chunks(source, fmt, chunksize):
+        report.rows_read += len(chunk)
+        report.chunks += 1
+        frame = normalize_chunk(chunk, user_id, device)
+        frame = validate_chunk(frame, report)
+        frame = drop_expired(frame, cutoff, report)
+        frame = deduplicate_chunk(frame, db_manager, report)
+        inserted = db_manager.insert_health_metrics(to_records(frame))
+        report.rows_inserted += inserted
+        if inserted:
+            oldest = frame['timestamp'].min().to_pydatetime()
+            report.oldest_inserted = min(report.oldest_inserted or oldest, oldest)
+        if progress is not None:
+            progress(report)
+
+    # The scheduler only recomputes recent buckets, so backfilled history is rolled up here
+    if report.oldest_inserted is not None:
+        db_manager.refresh_rollups(report.oldest_inserted)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import health metrics from CSV, Parquet or JSON-lines exports")
+    parser.add_argument("path", help="File to import")
+    parser.add_argument("--user", default=Config.DEFAULT_USER_ID, help="user_id for rows without one")
+    parser.add_argument("--device", default="import", help="device for rows without one")
+    parser.add_argument("--chunksize", type=int, default=Config.INGEST_CHUNK_SIZE, help="rows per batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from database import DatabaseManager
+    db_manager = DatabaseManager()
+
+    def print_progress(report: IngestReport):
+        print(f"\r{report.rows_read:,} rows read, {report.rows_inserted:,} inserted "
+              f"({report.rows_per_second:,.0f} rows/s)", end="", flush=True)
+
+    try:
+        report = ingest_file(db_manager, args.path, user_id=args.user, device=args.device,
+                             chunksize=args.chunksize, progress=print_progress)
+    finally:
+        db_manager.close()
+
+    print()
+    print(f"Read {report.rows_read:,} rows in {report.elapsed:.1f}s ({report.rows_per_second:,.0f} rows/s): "
+          f"{report.rows_inserted:,} inserted, {report.duplicates:,} duplicates, "
+          f"{report.invalid_rows:,} invalid rows, {report.rejected_values:,} out-of-range values, "
+          f"{report.expired_rows:,} older than the {Config.METRICS_RAW_RETENTION_DAYS}-day raw retention")
+
+
+if __name__ == "__main__":
+    main()
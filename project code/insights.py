@@ -0,0 +1,178 @@
+import math
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import Any, Dict, List
+
+from health_buffer import HEALTH_METRIC_SCHEMA
+from utils import HEALTH_RANGES, get_metric_unit
+
+METRIC_LABELS = {
+    'heart_rate': 'Heart rate',
+    'systolic_bp': 'Systolic blood pressure',
+    'diastolic_bp': 'Diastolic blood pressure',
+    'glucose': 'Blood glucose',
+    'weight': 'Weight',
+    'temperature': 'Temperature'
+}
+
+RISK_LABELS = ['Low Risk', 'Medium Risk', 'High Risk']
+
+WINDOW = 14            # readings in the rolling window
+Z_THRESHOLD = 2.0      # |z| at or above this is an anomaly
+MIN_HISTORY = 5        # readings needed before z-scores are trusted
+TREND_THRESHOLD = 0.05 # window drift, as a fraction of the mean, that counts as a trend
+
+
+class MetricStats:
+    """Running statistics for one metric, updated in O(1) per reading"""
+
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.window = deque(maxlen=window)
+        self.index = 0
+        # Sums over the window for the least-squares trend slope
+        self._sx = self._sy = self._sxy = self._sxx = 0.0
+        self.last_value = None
+        self.last_z = 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / self.count) if self.count else 0.0
+
+    @property
+    def rolling_mean(self) -> float:
+        return self._sy / len(self.window) if self.window else 0.0
+
+    @property
+    def slope(self) -> float:
+        """Change per reading over the window"""
+        n = len(self.window)
+        denominator = n * self._sxx - self._sx ** 2
+        if n < 2 or denominator == 0:
+            return 0.0
+        return (n * self._sxy - self._sx * self._sy) / denominator
+
+    def z_score(self, value: float) -> float:
+        """Standardized distance of value from the history so far"""
+        std = self.std
+        if self.count < MIN_HISTORY or std == 0:
+            return 0.0
+        return (value - self.mean) / std
+
+    def update(self, value: float):
+        self.last_z = self.z_score(value)
+        self.last_value = value
+
+        # Welford's running mean and variance
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if len(self.window) == self.window.maxlen:
+            old_x, old_y = self.window[0]
+            self._sx -= old_x
+            self._sy -= old_y
+            self._sxy -= old_x * old_y
+            self._sxx -= old_x * old_x
+        x = float(self.index)
+        self.window.append((x, value))
+        self._sx += x
+        self._sy += value
+        self._sxy += x * value
+        self._sxx += x * x
+        self.index += 1
+
+
+class HealthInsightsEngine:
+    """Rolling means, anomalies, trends, range breaches and risk distribution over health readings"""
+
+    def __init__(self, window=WINDOW):
+        self.stats = {name: MetricStats(window) for name in HEALTH_METRIC_SCHEMA}
+        self.risk_counts = np.zeros(3, dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, window=WINDOW) -> "HealthInsightsEngine":
+        """Build the engine from a full history with vectorized window operations"""
+        engine = cls(window)
+        if frame.empty:
+            return engine
+
+        risk = np.zeros(len(frame), dtype=np.int64)
+        for name, stats in engine.stats.items():
+            values = frame[name].to_numpy(dtype=np.float64)
+            series = pd.Series(values)
+            low, high = HEALTH_RANGES[name]
+
+            # z-score of each reading against everything before it
+            prior_mean = series.expanding().mean().shift(1).to_numpy()
+            prior_std = series.expanding().std(ddof=0).shift(1).to_numpy()
+            history = np.arange(len(values))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = np.where((history >= MIN_HISTORY) & (prior_std > 0), (values - prior_mean) / prior_std, 0.0)
+
+            breach = (values < low) | (values > high)
+            risk = np.maximum(risk, np.where(breach, 2, np.where(np.abs(z) >= Z_THRESHOLD, 1, 0)))
+
+            # Carry the final state forward so later readings update in O(1)
+            stats.count = len(values)
+            stats.mean = float(values.mean())
+            stats._m2 = float(values.var() * len(values))
+            stats.index = len(values) - len(values[-window:])
+            for value in values[-window:]:
+                x = float(stats.index)
+                stats.window.append((x, float(value)))
+                stats._sx += x
+                stats._sy += value
+                stats._sxy += x * value
+                stats._sxx += x * x
+                stats.index += 1
+            stats.last_value = float(values[-1])
+            stats.last_z = float(z[-1])
+
+        engine.risk_counts = np.bincount(risk, minlength=3)
+        return engine
+
+    def update(self, reading: Dict[str, Any]):
+        """Fold a new reading into every metric's running statistics"""
+        risk = 0
+        for name, stats in self.stats.items():
+            value = float(reading[name])
+            stats.update(value)
+            low, high = HEALTH_RANGES[name]
+            if not low <= value <= high:
+                risk = 2
+            elif abs(stats.last_z) >= Z_THRESHOLD:
+                risk = max(risk, 1)
+        self.risk_counts[risk] += 1
+
+    def risk_distribution(self) -> Dict[str, float]:
+        """Share of readings at each risk level, in percent"""
+        total = self.risk_counts.sum()
+        if total == 0:
+            return {label: 0.0 for label in RISK_LABELS}
+        return {label: round(100.0 * int(count) / int(total), 1) for label, count in zip(RISK_LABELS, self.risk_counts)}
+
+    def insights(self) -> List[str]:
+        """One status line per metric, prefixed with ✅, ⚠️ or ℹ️"""
+        messages = []
+        for name, stats in self.stats.items():
+            if stats.last_value is None:
+                continue
+            label, unit = METRIC_LABELS[name], get_metric_unit(name)
+            low, high = HEALTH_RANGES[name]
+            value = stats.last_value
+
+            if not low <= value <= high:
+                messages.append(f"⚠️ {label} of {value:g} {unit} is outside the expected range ({low}-{high} {unit}).")
+            elif abs(stats.last_z) >= Z_THRESHOLD:
+                messages.append(f"⚠️ {label} of {value:g} {unit} is unusual compared with your history (z = {stats.last_z:+.1f}).")
+            elif stats.rolling_mean and abs(stats.slope * len(stats.window)) >= TREND_THRESHOLD * abs(stats.rolling_mean):
+                direction = "rising" if stats.slope > 0 else "falling"
+                messages.append(f"ℹ️ {label} has been {direction} over your last {len(stats.window)} readings (average {stats.rolling_mean:.1f} {unit}).")
+            else:
+                messages.append(f"✅ {label} is stable around {stats.rolling_mean:.1f} {unit}.")
+        return messages
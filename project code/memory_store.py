@@ -0,0 +1,280 @@
+import atexit
+import os
+import pickle
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+
+# $dateTrunc units as pandas period frequencies (weeks start on Sunday, as in MongoDB)
+PERIOD_FREQUENCIES = {"hour": "h", "day": "D", "week": "W-SAT", "month": "M"}
+
+METRIC_COLUMNS = ["heart_rate", "systolic_bp", "diastolic_bp", "glucose", "weight", "temperature"]
+
+
+class MetricsColumns:
+    """Fixed-capacity columnar ring buffer of health readings; the oldest readings are evicted first"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0
+        self.timestamps = np.zeros(capacity, dtype="datetime64[us]")
+        self.users = np.zeros(capacity, dtype=np.int32)
+        self.values = {name: np.full(capacity, np.nan, dtype=np.float64) for name in METRIC_COLUMNS}
+        self.user_codes: Dict[str, int] = {}
+        self.user_names: List[str] = []
+
+    def _user_code(self, user_id: str) -> int:
+        code = self.user_codes.get(user_id)
+        if code is None:
+            code = self.user_codes[user_id] = len(self.user_names)
+            self.user_names.append(user_id)
+        return code
+
+    def append(self, user_id: str, timestamp: datetime, metrics: Dict[str, Any]):
+        slot = self.head
+        self.timestamps[slot] = np.datetime64(timestamp, "us")
+        self.users[slot] = self._user_code(user_id)
+        for name, column in self.values.items():
+            value = metrics.get(name)
+            column[slot] = np.nan if value is None else float(value)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def ordered_slots(self) -> np.ndarray:
+        """Slot indices from oldest to newest"""
+        if self.size < self.capacity:
+            return np.arange(self.size)
+        return (np.arange(self.capacity) + self.head) % self.capacity
+
+    def select(self, user_id: Optional[str] = None) -> np.ndarray:
+        """Slots for a user (or all users) sorted by timestamp, oldest first"""
+        slots = self.ordered_slots()
+        if user_id is not None:
+            code = self.user_codes.get(user_id)
+            if code is None:
+                return slots[:0]
+            slots = slots[self.users[slots] == code]
+        return slots[np.argsort(self.timestamps[slots], kind="stable")]
+
+    def to_document(self, slot: int) -> Dict[str, Any]:
+        timestamp = self.timestamps[slot].astype(datetime)
+        doc = {"user_id": self.user_names[self.users[slot]], "timestamp": timestamp, "date": timestamp}
+        for name, column in self.values.items():
+            if not np.isnan(column[slot]):
+                doc[name] = column[slot].item()
+        return doc
+
+
+class InMemoryStore:
+    """In-process storage backend supporting the same queries as the MongoDB collections"""
+
+    def __init__(self, max_metrics=None, max_chat_per_user=None, snapshot_path=None):
+        self.max_chat_per_user = max_chat_per_user or Config.MEMORY_MAX_CHAT_PER_USER
+        self.snapshot_path = snapshot_path if snapshot_path is not None else Config.MEMORY_SNAPSHOT_PATH
+        self.diseases: Dict[str, Dict[str, Any]] = {}
+        self.remedies: Dict[str, Dict[str, Any]] = {}
+        self.generated_remedies: Dict[str, Dict[str, Any]] = {}
+        self.metrics = MetricsColumns(max_metrics or Config.MEMORY_MAX_METRICS)
+        self.chat_history: Dict[str, deque] = {}
+        self._lock = threading.RLock()
+
+        if self.snapshot_path:
+            if os.path.exists(self.snapshot_path):
+                self.load(self.snapshot_path)
+            # Streamlit never calls DatabaseManager.close(), so persist on interpreter exit too
+            atexit.register(self.snapshot)
+
+    def seed(self, diseases: List[Dict[str, Any]], remedies: List[Dict[str, Any]]):
+        """Load reference data into empty indexes"""
+        with self._lock:
+            if not self.diseases:
+                for disease in diseases:
+                    self.diseases[disease["name"].lower()] = dict(disease)
+            if not self.remedies:
+                for remedy in remedies:
+                    self.remedies[remedy["condition"].lower()] = dict(remedy)
+
+    def get_diseases(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(d) for d in self.diseases.values()]
+
+    def get_remedies(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(r) for r in self.remedies.values()]
+
+    def get_generated_remedy(self, condition: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            remedy = self.generated_remedies.get(condition)
+            if remedy is None:
+                return None
+            return {k: v for k, v in remedy.items() if k not in ("model_id", "prompt_version", "created_at")}
+
+    def save_generated_remedy(self, remedy_data: Dict[str, Any]) -> bool:
+        with self._lock:
+            self.generated_remedies.setdefault(remedy_data["condition"], dict(remedy_data))
+        return True
+
+    def save_health_metrics(self, metrics_data: Dict[str, Any]) -> bool:
+        with self._lock:
+            self.metrics.append(metrics_data["user_id"], metrics_data["timestamp"], metrics_data)
+        return True
+
+    def get_health_metrics(self, limit: int = 30, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            slots = self.metrics.select(user_id)[::-1][:limit]
+            return [self.metrics.to_document(slot) for slot in slots]
+
+    def existing_metric_keys(self, user_ids, start, end) -> set:
+        with self._lock:
+            keys = set()
+            for user_id in user_ids:
+                slots = self.metrics.select(user_id)
+                timestamps = self.metrics.timestamps[slots]
+                in_range = (timestamps >= np.datetime64(start, "us")) & (timestamps <= np.datetime64(end, "us"))
+                keys.update((user_id, ts) for ts in timestamps[in_range].astype(datetime))
+            return keys
+
+    def iter_documents(self, collection_name, user_id, start, end, batch_size):
+        """Documents oldest first in lists of batch_size, mirroring a MongoDB cursor"""
+        with self._lock:
+            if collection_name == "health_metrics":
+                slots = self.metrics.select(user_id)
+                timestamps = self.metrics.timestamps[slots]
+                keep = np.ones(len(slots), dtype=bool)
+                if start:
+                    keep &= timestamps >= np.datetime64(start, "us")
+                if end:
+                    keep &= timestamps < np.datetime64(end, "us")
+                documents = [self.metrics.to_document(slot) for slot in slots[keep]]
+            else:
+                histories = [self.chat_history.get(user_id, ())] if user_id else list(self.chat_history.values())
+                documents = sorted(
+                    (dict(m) for history in histories for m in history
+                     if (not start or m["timestamp"] >= start) and (not end or m["timestamp"] < end)),
+                    key=lambda m: m["timestamp"]
+                )
+        for i in range(0, len(documents), batch_size):
+            yield documents[i:i + batch_size]
+    
+    def export_users(self, collection_name, start, end) -> List[str]:
+        """Users with documents in [start, end)"""
+        users = set()
+        for batch in self.iter_documents(collection_name, None, start, end, Config.EXPORT_BATCH_SIZE):
+            users.update(doc["user_id"] for doc in batch)
+        return sorted(users)
+    
+    def summarize_health_metrics(self, user_id, unit, start, end, metrics, percentiles) -> Dict[str, list]:
+        """Bucketed min/max/mean/percentiles computed over the metric columns"""
+        import pandas as pd
+        
+        with self._lock:
+            slots = self.metrics.select(user_id)
+            timestamps = self.metrics.timestamps[slots]
+            columns = {name: self.metrics.values[name][slots] for name in metrics}
+
+        keep = np.ones(len(slots), dtype=bool)
+        if start:
+            keep &= timestamps >= np.datetime64(start, "us")
+        if end:
+            keep &= timestamps < np.datetime64(end, "us")
+
+        frame = pd.DataFrame({name: column[keep] for name, column in columns.items()})
+        frame["bucket"] = pd.Series(timestamps[keep]).dt.to_period(PERIOD_FREQUENCIES[unit]).dt.start_time
+        grouped = frame.groupby("bucket", sort=True)
+
+        summary = {"bucket": [b.to_pydatetime() for b in grouped.size().index], "count": grouped.size().tolist()}
+        for name in metrics:
+            column = grouped[name]
+            summary[f"{name}_min"] = column.min().tolist()
+            summary[f"{name}_max"] = column.max().tolist()
+            summary[f"{name}_mean"] = column.mean().tolist()
+            if Config.MONGODB_PERCENTILES:
+                for p in percentiles:
+                    summary[f"{name}_p{int(p * 100)}"] = column.quantile(p).tolist()
+        return summary
+
+    def save_chat_message(self, chat_data: Dict[str, Any]) -> bool:
+        with self._lock:
+            history = self.chat_history.get(chat_data["user_id"])
+            if history is None:
+                history = self.chat_history[chat_data["user_id"]] = deque(maxlen=self.max_chat_per_user)
+            message = dict(chat_data)
+            if not history or history[-1]["timestamp"] <= message["timestamp"]:
+                history.append(message)
+                return True
+            # Back-dated turns (imports, replayed writes) are filed in timestamp order, as the
+            # database sorts them, so paging back from a cursor sees the same sequence in both
+            position = len(history)
+            while position and history[position - 1]["timestamp"] > message["timestamp"]:
+                position -= 1
+            if len(history) == history.maxlen:
+                if position == 0:
+                    return True
+                history.popleft()
+                position -= 1
+            history.insert(position, message)
+        return True
+
+    def _chat_before(self, user_id: str, before: Optional[datetime]) -> List[Dict[str, Any]]:
+        history = list(self.chat_history.get(user_id, ()))
+        if before is not None:
+            history = [m for m in history if m["timestamp"] < before]
+        return history
+    
+    def get_chat_history(self, user_id: str, limit: int = 50, skip: int = 0,
+                         before: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            history = self._chat_before(user_id, before)
+            return [dict(m) for m in history[::-1][skip:skip + limit]]
+    
+    def count_chat_messages(self, user_id: str, before: Optional[datetime] = None) -> int:
+        with self._lock:
+            if before is None:
+                return len(self.chat_history.get(user_id, ()))
+            return len(self._chat_before(user_id, before))
+
+    def snapshot(self, path: Optional[str] = None) -> bool:
+        """Write the store to a local file, replacing any previous snapshot atomically"""
+        path = path or self.snapshot_path
+        if not path:
+            return False
+        try:
+            with self._lock:
+                state = {
+                    "diseases": self.diseases,
+                    "remedies": self.remedies,
+                    "generated_remedies": self.generated_remedies,
+                    "metrics": self.metrics,
+                    "chat_history": self.chat_history
+                }
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logging.error(f"Error writing in-memory snapshot: {e}")
+            return False
+
+    def load(self, path: str) -> bool:
+        """Restore the store from a snapshot file"""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            with self._lock:
+                self.diseases = state["diseases"]
+                self.remedies = state["remedies"]
+                self.generated_remedies = state.get("generated_remedies", {})
+                self.metrics = state["metrics"]
+                self.chat_history = state["chat_history"]
+            return True
+        except Exception as e:
+            logging.error(f"Error loading in-memory snapshot: {e}")
+            return False
@@ -0,0 +1,195 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from config import Config
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+SCHEMA_VERSION_ID = "schema_version"
+MIGRATION_LOCK_ID = "migration_lock"
+
+
+class MigrationLockTimeout(RuntimeError):
+    """Raised when another replica still holds the migration lock after the wait"""
+
+
+def load_seed(name: str) -> List[Dict[str, Any]]:
+    """Reference records bundled in data/<name>.json"""
+    with open(os.path.join(DATA_DIR, f"{name}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Any], None]
+
+
+def upsert_seed(collection, records: List[Dict[str, Any]], key: str):
+    """Insert records missing by natural key; existing documents are left untouched"""
+    operations = [UpdateOne({key: record[key]}, {"$setOnInsert": record}, upsert=True) for record in records]
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+
+
+def deduplicate(collection, key: str):
+    """Keep the oldest document for each natural key, e.g. after replicas raced to seed"""
+    pipeline = [
+        {"$sort": {"_id": ASCENDING}},
+        {"$group": {"_id": f"${key}", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    duplicates = [i for group in collection.aggregate(pipeline, allowDiskUse=True) for i in group["ids"][1:]]
+    if duplicates:
+        collection.delete_many({"_id": {"$in": duplicates}})
+        logging.warning(f"Removed {len(duplicates)} duplicate {collection.name} documents by {key}")
+
+
+def unique_index(collection, key: str, name: str):
+    """Replace a non-unique natural-key index with a unique one"""
+    existing = collection.index_information().get(name)
+    if existing and not existing.get("unique"):
+        collection.drop_index(name)
+    collection.create_index([(key, ASCENDING)], name=name, unique=True)
+
+
+def _health_metrics_timeseries(manager):
+    manager._ensure_health_metrics_collection()
+
+
+def _seed_reference_data(manager):
+    upsert_seed(manager.diseases_collection, load_seed("diseases"), "name")
+    upsert_seed(manager.remedies_collection, load_seed("remedies"), "condition")
+
+
+def _unique_natural_keys(manager):
+    deduplicate(manager.diseases_collection, "name")
+    deduplicate(manager.remedies_collection, "condition")
+    unique_index(manager.diseases_collection, "name", "name_1")
+    unique_index(manager.remedies_collection, "condition", "condition_1")
+
+
+# Append only: each entry runs once per database, in version order
+MIGRATIONS = [
+    Migration(1, "health_metrics as a time-series collection", _health_metrics_timeseries),
+    Migration(2, "seed diseases and remedies from data files", _seed_reference_data),
+    Migration(3, "unique indexes on disease name and remedy condition", _unique_natural_keys)
+]
+
+
+class MigrationRunner:
+    """Applies pending migrations once across replicas, recording progress in a schema-version document"""
+
+    def __init__(self, manager, migrations=None, lock_ttl=None, lock_wait=None):
+        self.manager = manager
+        self.meta = manager.db[Config.MIGRATIONS_COLLECTION]
+        self.migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+        self.lock_ttl = lock_ttl or Config.MIGRATION_LOCK_TTL
+        self.lock_wait = lock_wait if lock_wait is not None else Config.MIGRATION_LOCK_WAIT
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    @property
+    def latest_version(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def current_version(self) -> int:
+        doc = self.meta.find_one({"_id": SCHEMA_VERSION_ID}, {"version": 1})
+        return doc["version"] if doc else 0
+
+    def pending(self) -> List[Migration]:
+        current = self.current_version()
+        return [m for m in self.migrations if m.version > current]
+
+    def _acquire_lock(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            # Matches only a free, expired or already-owned lock; otherwise the upsert collides on _id
+            self.meta.update_one(
+                {"_id": MIGRATION_LOCK_ID, "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.lock_ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def _release_lock(self):
+        self.meta.delete_one({"_id": MIGRATION_LOCK_ID, "owner": self.owner})
+
+    def run(self) -> int:
+        """Bring the database to the latest version; returns the version reached"""
+        current = self.current_version()
+        if current >= self.latest_version:
+            return current
+
+        deadline = time.monotonic() + self.lock_wait
+        while not self._acquire_lock():
+            # Another replica is migrating; wait for it rather than racing
+            if self.current_version() >= self.latest_version:
+                return self.latest_version
+            if time.monotonic() >= deadline:
+                # Running index builds against a half-migrated schema would race the holder's steps
+                raise MigrationLockTimeout(
+                    f"Schema is at version {self.current_version()} of {self.latest_version} and another "
+                    f"replica still holds the migration lock after {self.lock_wait}s"
+                )
+            time.sleep(1)
+
+        try:
+            for migration in self.pending():
+                logging.info(f"Applying migration {migration.version}: {migration.description}")
+                migration.apply(self.manager)
+                self.meta.update_one(
+                    {"_id": SCHEMA_VERSION_ID},
+                    {
+                        "$set": {"version": migration.version},
+                        "$push": {"applied": {
+                            "version": migration.version,
+                            "description": migration.description,
+                            "applied_at": datetime.utcnow(),
+                            "by": self.owner
+                        }}
+                    },
+                    upsert=True
+                )
+                # Extend the lease so long migrations are not taken over mid-way
+                self._acquire_lock()
+            return self.current_version()
+        finally:
+            self._release_lock()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or inspect database migrations")
+    parser.add_argument("--status", action="store_true", help="show the schema version and pending migrations")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from database import DatabaseManager
+    db_manager = DatabaseManager()
+    try:
+        if db_manager.db is None:
+            print("No MongoDB connection; the in-memory backend does not use migrations")
+            return
+        runner = MigrationRunner(db_manager)
+        if not args.status:
+            runner.run()
+        print(f"Schema version {runner.current_version()} of {runner.latest_version}")
+        for migration in runner.pending():
+            print(f"  pending {migration.version}: {migration.description}")
+    finally:
+        db_manager.close()
+
+
+if __name__ == "__main__":
+    main()
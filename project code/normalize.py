@@ -0,0 +1,148 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from config import Config
+
+APOSTROPHES = re.compile(r"['’`]")
+SEPARATORS = re.compile(r"[^\w\s]|_")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents, and reduce punctuation and separators to single spaces"""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = APOSTROPHES.sub("", text.lower())
+    return " ".join(SEPARATORS.sub(" ", text).split())
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions), capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def deletes(term: str, distance: int) -> List[str]:
+    """Every string made by removing up to distance characters from term"""
+    variants = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        variants |= frontier
+    return list(variants)
+
+
+class Match(NamedTuple):
+    term: str
+    canonical: str
+    distance: int
+
+
+class TermIndex:
+    """Maps free-text symptoms and conditions to canonical terms, tolerating aliases and typos.
+
+    Exact and alias hits are one dictionary read. Near misses use a symmetric-delete index:
+    each term is filed under the strings left by deleting up to its edit limit of characters,
+    so a query only looks up its own deletes and verifies the few candidates by edit distance,
+    rather than comparing against the whole vocabulary.
+    """
+
+    def __init__(self, synonyms: Optional[Dict[str, List[str]]] = None, terms: Iterable[str] = (),
+                 max_distance: Optional[int] = None):
+        self.max_distance = max_distance if max_distance is not None else Config.NORMALIZE_MAX_DISTANCE
+        self.canonical: Dict[str, str] = {}
+        self._deletes: Dict[str, List[str]] = {}
+        for canonical, aliases in (synonyms or {}).items():
+            self.add(canonical)
+            for alias in aliases:
+                self.add(alias, canonical)
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return len(self.canonical)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize_text(text) in self.canonical
+
+    def add(self, term: str, canonical: Optional[str] = None):
+        """Register a term, or an alias of a canonical term; the first mapping of a term wins"""
+        key = normalize_text(term)
+        if not key or key in self.canonical:
+            return
+        target = normalize_text(canonical) if canonical else key
+        # Aliases of aliases resolve to the final canonical term
+        self.canonical[key] = self.canonical.get(target, target)
+        # Terms and queries both file their deletes up to the edit limit; a query whose deletes stop
+        # short of that misses terms two omissions or substitutions away
+        for variant in deletes(key, self._limit(key)):
+            self._deletes.setdefault(variant, []).append(key)
+
+    def _limit(self, key: str) -> int:
+        """Edits tolerated for a query of this length, so short words do not match everything"""
+        if len(key) < 4:
+            return 0
+        if len(key) < 8:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def match(self, text: str) -> Optional[Match]:
+        """Closest known term within the edit limit, or None"""
+        key = normalize_text(text)
+        if key in self.canonical:
+            return Match(key, self.canonical[key], 0)
+        limit = self._limit(key)
+        if not key or limit == 0:
+            return None
+
+        candidates = set()
+        for variant in deletes(key, limit):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best = None
+        for term in candidates:
+            distance = edit_distance(key, term, limit)
+            if distance > limit:
+                continue
+            # Prefer fewer edits, then canonical terms over aliases, then a stable order
+            rank = (distance, term != self.canonical[term], term)
+            if best is None or rank < best[0]:
+                best = (rank, Match(term, self.canonical[term], distance))
+        return best[1] if best else None
+
+    def canonicalize(self, text: str) -> str:
+        """Canonical form of a term, or its normalized text when nothing is close enough"""
+        match = self.match(text)
+        return match.canonical if match else normalize_text(text)
+
+
+@lru_cache(maxsize=1)
+def load_synonyms() -> Dict[str, List[str]]:
+    """Alias table bundled in data/synonyms.json, canonical term -> aliases"""
+    from migrations import load_seed
+    return load_seed("synonyms")
+
+
+@lru_cache(maxsize=1)
+def default_index() -> TermIndex:
+    """Index of the synonym table alone, for callers without the reference data"""
+    return TermIndex(load_synonyms())
+
+
+def canonicalize(text: str, index: Optional[TermIndex] = None) -> str:
+    """Canonical form of a symptom or condition entered as free text"""
+    return (index if index is not None else default_index()).canonicalize(text)
@@ -0,0 +1,349 @@
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Generations are asked to end with this marker so the model stops right after the JSON
+JSON_STOP_SEQUENCE = "END_OF_JSON"
+
+RISK_LEVELS = ("low", "medium", "high")
+
+OPENERS = {"[": "]", "{": "}"}
+CLOSERS = {"]": "[", "}": "{"}
+
+UNQUOTED_KEY = re.compile(r"([{,]\s*)([A-Za-z_][A-Za-z0-9_ \-]*?)(\s*:)")
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+PYTHON_LITERAL = re.compile(r"\b(True|False|None)\b")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+DANGLING_KEY = re.compile(r',?\s*"(?:[^"\\]|\\.)*"\s*$')
+
+
+class OutputParseError(ValueError):
+    """Raised when a generation holds no usable JSON of the expected shape"""
+
+
+def _repair_bare(segment: str) -> str:
+    """Fix the parts of a JSON text that lie outside string literals"""
+    segment = UNQUOTED_KEY.sub(lambda m: f'{m.group(1)}"{m.group(2).strip()}"{m.group(3)}', segment)
+    segment = TRAILING_COMMA.sub(r"\1", segment)
+    return PYTHON_LITERAL.sub(lambda m: PYTHON_LITERALS[m.group(1)], segment)
+
+
+def repair_json(text: str) -> str:
+    """Best-effort fix of common LLM JSON mistakes: single or smart quotes, unquoted keys,
+    trailing commas, Python literals, raw newlines in strings, and truncated output"""
+    text = text.translate(SMART_QUOTES).strip()
+    out, bare, stack = [], [], []
+    quote = None
+    escaped = False
+
+    for ch in text:
+        if quote:
+            if escaped:
+                escaped = False
+                if ch == "'":
+                    out[-1] = ch
+                else:
+                    out.append(ch)
+            elif ch == "\\":
+                escaped = True
+                out.append(ch)
+            elif ch == quote:
+                quote = None
+                out.append('"')
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+            continue
+
+        if ch in "\"'":
+            out.append(_repair_bare("".join(bare)))
+            bare = []
+            quote = ch
+            out.append('"')
+            continue
+        if ch in OPENERS:
+            stack.append(OPENERS[ch])
+        elif ch in CLOSERS and stack:
+            stack.pop()
+        bare.append(ch)
+
+    tail = "".join(bare)
+    if quote:
+        if escaped:
+            out.pop()
+        out.append('"')
+    else:
+        # Output cut off by max_new_tokens: drop a dangling separator before closing the brackets
+        tail = re.sub(r"[,:\s]+$", "", tail)
+    out.append(_repair_bare(tail))
+    closing = "".join(reversed(stack))
+    repaired = "".join(out)
+    if stack and not _parses(repaired + closing):
+        # The cut fell on or inside an object key, which has no value to keep
+        repaired = DANGLING_KEY.sub("", repaired, count=1)
+    return repaired + closing
+
+
+def _parses(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+
+def loads_lenient(text: str) -> Any:
+    """json.loads, retrying once on the repaired text"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(repair_json(text))
+
+
+class JSONExtractor:
+    """Incremental scanner that pulls the first acceptable JSON block out of streamed text.
+
+    Brackets are balanced outside string literals, so several blocks or prose around them
+    are handled; each complete block is passed to `convert` and the first one it accepts wins.
+    """
+
+    def __init__(self, openers: str = "[{", convert: Optional[Callable[[Any], Any]] = None):
+        self.openers = openers
+        self.convert = convert or (lambda value: value)
+        self.value = None
+        self.done = False
+        self.rejected = 0
+        self._block: List[str] = []
+        self._stack: List[str] = []
+        self._quote = None
+        self._escaped = False
+
+    def _accept(self, text: str) -> bool:
+        try:
+            self.value = self.convert(loads_lenient(text))
+            self.done = True
+        except (ValueError, TypeError, KeyError, AttributeError):
+            self.rejected += 1
+        return self.done
+
+    def feed(self, chunk: str) -> bool:
+        """Scan the next chunk; returns True once a block has been accepted"""
+        if self.done:
+            return True
+        for ch in chunk:
+            if not self._stack:
+                if ch in self.openers:
+                    self._block = [ch]
+                    self._stack = [ch]
+                continue
+
+            self._block.append(ch)
+            if self._quote:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == self._quote:
+                    self._quote = None
+            elif ch in "\"'":
+                self._quote = ch
+            elif ch in OPENERS:
+                self._stack.append(ch)
+            elif ch in CLOSERS:
+                self._stack.pop()
+                if not self._stack and self._accept("".join(self._block)):
+                    return True
+        return False
+
+    def finish(self) -> Any:
+        """Accepted value, repairing a block left open by a truncated generation"""
+        if not self.done and self._stack:
+            self._accept("".join(self._block))
+        if not self.done:
+            raise OutputParseError("No valid JSON block in model output")
+        return self.value
+
+
+def extract_json(text: str, openers: str = "[{", convert: Optional[Callable[[Any], Any]] = None) -> Any:
+    """First acceptable JSON block in a complete generation"""
+    extractor = JSONExtractor(openers, convert)
+    extractor.feed(text)
+    return extractor.finish()
+
+
+def _field(data: Dict[str, Any], *names: str, default=None):
+    """Value of the first matching key, ignoring case, spaces and underscores"""
+    normalized = {re.sub(r"[\s_\-]", "", str(k)).lower(): v for k, v in data.items()}
+    for name in names:
+        value = normalized.get(name)
+        if value not in (None, ""):
+            return value
+    return default
+
+
+def _as_list(value) -> List[str]:
+    """List of non-empty strings from a list or a newline/semicolon separated string"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"\n|;", value)
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    items = []
+    for item in value:
+        if isinstance(item, dict):
+            item = ", ".join(str(v) for v in item.values())
+        item = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", str(item)).strip()
+        if item:
+            items.append(item)
+    return items
+
+
+@dataclass
+class DiseasePrediction:
+    name: str
+    probability: int
+    risk_level: str
+    description: str = ""
+    recommendations: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DiseasePrediction":
+        """Validate one model-produced condition, tolerating common key and value variants"""
+        if not isinstance(data, dict):
+            raise OutputParseError(f"Expected an object, got {type(data).__name__}")
+        name = _field(data, "name", "condition", "conditionname", "disease")
+        if not name:
+            raise OutputParseError("Prediction has no condition name")
+
+        probability = _field(data, "probability", "probabilitypercentage", "likelihood", default=0)
+        match = re.search(r"\d+(?:\.\d+)?", str(probability))
+        probability = float(match.group()) if match else 0.0
+        if 0 < probability < 1 and "%" not in str(data.get("probability", "")):
+            probability *= 100
+
+        risk_level = str(_field(data, "risklevel", "risk", "severity", default="medium")).strip().lower()
+        if risk_level not in RISK_LEVELS:
+            risk_level = next((level for level in RISK_LEVELS if level in risk_level), "medium")
+
+        return cls(
+            name=str(name).strip(),
+            probability=int(round(min(max(probability, 0.0), 100.0))),
+            risk_level=risk_level,
+            description=str(_field(data, "description", "briefdescription", "summary", default="")).strip(),
+            recommendations=_as_list(_field(data, "recommendations", "recommendation", "advice"))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class Remedy:
+    title: str
+    ingredients: List[str]
+    instructions: List[str]
+    benefits: List[str] = field(default_factory=list)
+    precautions: List[str] = field(default_factory=list)
+    duration: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Remedy":
+        """Validate a model-produced remedy; ingredients and instructions are required"""
+        if not isinstance(data, dict):
+            raise OutputParseError(f"Expected an object, got {type(data).__name__}")
+        nested = _field(data, "remedy", "homeremedy")
+        if isinstance(nested, dict):
+            data = nested
+        remedy = cls(
+            title=str(_field(data, "title", "name", default="")).strip(),
+            ingredients=_as_list(_field(data, "ingredients", "listofingredients")),
+            instructions=_as_list(_field(data, "instructions", "steps", "stepbystepinstructions")),
+            benefits=_as_list(_field(data, "benefits")),
+            precautions=_as_list(_field(data, "precautions", "warnings")),
+            duration=str(_field(data, "duration", "durationoftreatment", default="")).strip()
+        )
+        if not remedy.ingredients or not remedy.instructions:
+            raise OutputParseError("Remedy needs ingredients and instructions")
+        return remedy
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class TreatmentStep:
+    type: str
+    title: str
+    description: str
+    duration: str = ""
+    frequency: str = ""
+    instructions: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TreatmentStep":
+        """Validate one model-produced treatment plan item"""
+        if not isinstance(data, dict):
+            raise OutputParseError(f"Expected an object, got {type(data).__name__}")
+        title = _field(data, "title", "name")
+        description = _field(data, "description", "details")
+        if not title or not description:
+            raise OutputParseError("Treatment step needs a title and description")
+        return cls(
+            type=str(_field(data, "type", "category", default="consultation")).strip().lower(),
+            title=str(title).strip(),
+            description=str(description).strip(),
+            duration=str(_field(data, "duration", default="")).strip(),
+            frequency=str(_field(data, "frequency", default="")).strip(),
+            instructions=_as_list(_field(data, "instructions", "steps"))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plan item for display, without empty optional fields"""
+        return {k: v for k, v in asdict(self).items() if v}
+
+
+def parse_predictions(value: Any) -> List[DiseasePrediction]:
+    """Predictions from a JSON array, a single object, or an object wrapping the array"""
+    if isinstance(value, dict):
+        wrapped = _field(value, "predictions", "conditions", "diseases", "results")
+        value = wrapped if isinstance(wrapped, list) else [value]
+    if not isinstance(value, list):
+        raise OutputParseError("Expected a JSON array of conditions")
+
+    predictions = []
+    for item in value:
+        try:
+            predictions.append(DiseasePrediction.from_dict(item))
+        except OutputParseError:
+            continue
+    if not predictions:
+        raise OutputParseError("No valid conditions in model output")
+    return sorted(predictions, key=lambda p: p.probability, reverse=True)
+
+
+def parse_remedy(value: Any) -> Remedy:
+    return Remedy.from_dict(value)
+
+
+def parse_treatment_plan(value: Any) -> List[TreatmentStep]:
+    """Plan items from a JSON array or an object wrapping it"""
+    if isinstance(value, dict):
+        wrapped = _field(value, "plan", "treatmentplan", "steps", "items")
+        value = wrapped if isinstance(wrapped, list) else [value]
+    if not isinstance(value, list):
+        raise OutputParseError("Expected a JSON array of plan items")
+    steps = []
+    for item in value:
+        try:
+            steps.append(TreatmentStep.from_dict(item))
+        except OutputParseError:
+            continue
+    if not steps:
+        raise OutputParseError("No valid plan items in model output")
+    return steps
@@ -0,0 +1,243 @@
+import logging
+import math
+import textwrap
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Dict, Optional, Tuple
+
+from output_parser import JSON_STOP_SEQUENCE
+
+DEFAULT_MODEL_ID = "ibm/granite-13b-instruct-v2"
+
+# Rough characters per token for English text with the Granite tokenizer; used for budgets only
+CHARS_PER_TOKEN = 4
+
+
+class PromptBudgetError(ValueError):
+    """Raised when a rendered prompt cannot be brought within its input token budget"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a prompt"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def trim_head(text: str, keep: int) -> str:
+    """Last keep characters of text, starting at a line or word boundary"""
+    if keep <= 0:
+        return ""
+    if len(text) <= keep:
+        return text
+    tail = text[-keep:]
+    for boundary in ("\n", " "):
+        cut = tail.find(boundary)
+        if cut != -1:
+            return tail[cut + 1:].lstrip()
+    return tail
+
+
+def minimize(text: str) -> str:
+    """Strip indentation and blank lines so whitespace is not billed as input tokens"""
+    lines = (line.strip() for line in textwrap.dedent(text).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A named, versioned generation task: minimized prompt text plus model and parameters"""
+    name: str
+    version: int
+    text: str
+    parameters: Dict[str, Any]
+    model_id: str = DEFAULT_MODEL_ID
+    max_input_tokens: int = 1024
+    # Bracket characters of the JSON answer; empty for free-text tasks
+    openers: str = ""
+    # Values that may be shortened to fit the budget, longest first
+    truncatable: Tuple[str, ...] = ()
+    # Truncatable values whose newest text is at the end, so they lose their start instead
+    truncate_head: Tuple[str, ...] = ()
+    fields: Tuple[str, ...] = field(init=False)
+    base_tokens: int = field(init=False)
+
+    def __post_init__(self):
+        text = minimize(self.text)
+        object.__setattr__(self, "text", text)
+        object.__setattr__(self, "fields", tuple(sorted({f for _, f, _, _ in Formatter().parse(text) if f})))
+        object.__setattr__(self, "base_tokens", estimate_tokens(text.format(**{f: "" for f in self.fields})))
+
+    def _format(self, values: Dict[str, str]) -> str:
+        # Optional values left empty would otherwise leave blank lines behind
+        return "\n".join(line for line in self.text.format(**values).split("\n") if line.strip())
+
+    def render(self, **values) -> str:
+        """Fill the template, trimming truncatable values if the prompt exceeds its budget"""
+        missing = set(self.fields) - set(values)
+        if missing:
+            raise KeyError(f"Prompt {self.name} v{self.version} is missing {', '.join(sorted(missing))}")
+        values = {k: minimize(str(v)) for k, v in values.items()}
+
+        prompt = self._format(values)
+        overflow = estimate_tokens(prompt) - self.max_input_tokens
+        if overflow <= 0:
+            return prompt
+
+        for key in sorted(self.truncatable, key=lambda k: len(values.get(k, "")), reverse=True):
+            keep = max(len(values[key]) - overflow * CHARS_PER_TOKEN, 0)
+            if key in self.truncate_head:
+                values[key] = trim_head(values[key], keep)
+            else:
+                values[key] = values[key][:keep].rstrip()
+            prompt = self._format(values)
+            overflow = estimate_tokens(prompt) - self.max_input_tokens
+            if overflow <= 0:
+                logging.warning(f"Truncated '{key}' to fit prompt {self.name} in {self.max_input_tokens} tokens")
+                return prompt
+        raise PromptBudgetError(f"Prompt {self.name} needs ~{estimate_tokens(prompt)} tokens, budget is {self.max_input_tokens}")
+
+    def payload(self, project_id: Optional[str], **values) -> Dict[str, Any]:
+        """Generation request body for this template"""
+        return {
+            "input": self.render(**values),
+            "parameters": self.parameters,
+            "model_id": self.model_id,
+            "project_id": project_id
+        }
+
+
+PROMPTS: Dict[Tuple[str, int], PromptTemplate] = {}
+LATEST: Dict[str, int] = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    """Add a template to the registry; the highest version of a name is its default"""
+    PROMPTS[(template.name, template.version)] = template
+    LATEST[template.name] = max(LATEST.get(template.name, 0), template.version)
+    return template
+
+
+def get_prompt(name: str, version: Optional[int] = None) -> PromptTemplate:
+    """Registered template by name, latest version unless one is pinned"""
+    version = version or LATEST.get(name)
+    template = PROMPTS.get((name, version))
+    if template is None:
+        raise KeyError(f"Unknown prompt: {name} v{version}")
+    return template
+
+
+JSON_FOOTER = f"Respond with only the JSON, then write {JSON_STOP_SEQUENCE}."
+JSON_PARAMETERS = {"temperature": 0.3, "stop_sequences": [JSON_STOP_SEQUENCE]}
+
+register(PromptTemplate(
+    name="disease_prediction",
+    version=1,
+    text=f"""
+        Based on the following symptoms: {{symptoms}}
+        {{candidates}}
+        Please analyze and provide potential medical conditions with:
+        1. Condition name
+        2. Probability percentage (0-100)
+        3. Risk level (low/medium/high)
+        4. Brief description
+        5. Recommendations
+        Format as a JSON array of objects with keys name, probability, risk_level, description and recommendations.
+        {JSON_FOOTER}
+    """,
+    parameters={"max_new_tokens": 500, **JSON_PARAMETERS},
+    max_input_tokens=512,
+    openers="[{",
+    truncatable=("symptoms",)
+))
+
+register(PromptTemplate(
+    name="home_remedy",
+    version=1,
+    text=f"""
+        Generate a natural home remedy for {{condition}}.
+        Please provide:
+        1. Title
+        2. List of ingredients
+        3. Step-by-step instructions
+        4. Benefits
+        5. Precautions
+        6. Duration of treatment
+        Format as a JSON object with keys title, ingredients, instructions, benefits, precautions and duration.
+        {JSON_FOOTER}
+    """,
+    parameters={"max_new_tokens": 600, **JSON_PARAMETERS},
+    max_input_tokens=256,
+    openers="{",
+    truncatable=("condition",)
+))
+
+register(PromptTemplate(
+    name="chat_response",
+    version=1,
+    text="""
+        You are a helpful medical AI assistant. A patient asks: "{message}"
+        Provide a helpful, empathetic response that:
+        1. Addresses their concern
+        2. Provides general medical information
+        3. Includes appropriate disclaimers
+        4. Suggests when to seek professional help
+        Keep the response conversational and supportive.
+    """,
+    parameters={"max_new_tokens": 400, "temperature": 0.5},
+    max_input_tokens=1024,
+    truncatable=("message",)
+))
+
+register(PromptTemplate(
+    name="chat_response",
+    version=2,
+    text="""
+        You are a helpful medical AI assistant continuing a conversation with a patient.
+        {context}
+        The patient now asks: "{message}"
+        Provide a helpful, empathetic response that:
+        1. Addresses their concern, using the earlier conversation where relevant
+        2. Provides general medical information
+        3. Includes appropriate disclaimers
+        4. Suggests when to seek professional help
+        Keep the response conversational and supportive.
+    """,
+    parameters={"max_new_tokens": 400, "temperature": 0.5},
+    max_input_tokens=1536,
+    truncatable=("context", "message"),
+    # Context runs oldest to newest, so overflow drops the oldest turns first
+    truncate_head=("context",)
+))
+
+register(PromptTemplate(
+    name="conversation_summary",
+    version=1,
+    text="""
+        Update the summary of a patient's conversation with a medical assistant.
+        Current summary: {summary}
+        New turns:
+        {turns}
+        Write an updated summary of at most {max_words} words keeping symptoms, conditions, medications, advice given and open questions.
+        Reply with the summary only.
+    """,
+    parameters={"max_new_tokens": 300, "temperature": 0.2},
+    max_input_tokens=1536,
+    truncatable=("turns",)
+))
+
+register(PromptTemplate(
+    name="treatment_plan",
+    version=1,
+    text=f"""
+        Create a treatment plan for a patient with {{condition}}.
+        Patient: age {{age}}, weight {{weight}} kg.
+        Known allergies: {{allergies}}
+        Current medications: {{medications}}
+        Provide 2-4 plan items covering medication, lifestyle and activity where appropriate, avoiding the allergies and interactions with current medications.
+        Format as a JSON array of objects with keys type (medication/lifestyle/activity/consultation), title, description, duration, frequency and instructions.
+        {JSON_FOOTER}
+    """,
+    parameters={"max_new_tokens": 700, **JSON_PARAMETERS},
+    max_input_tokens=768,
+    openers="[{",
+    truncatable=("medications", "allergies")
+))
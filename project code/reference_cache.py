@@ -0,0 +1,177 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from config import Config
+from normalize import Match, TermIndex, load_synonyms
+
+REFERENCE_COLLECTIONS = ("diseases", "remedies")
+
+
+class ReferenceData:
+    """Immutable snapshot of the disease and remedy collections with prebuilt lookup indexes"""
+
+    def __init__(self, diseases: List[Dict[str, Any]], remedies: List[Dict[str, Any]], version: int = 0):
+        self.version = version
+        self.diseases = diseases
+        # Vocabulary of every disease name, symptom and remedy condition plus the synonym table
+        self.terms = TermIndex(load_synonyms(), [
+            *(d["name"] for d in diseases),
+            *(s for d in diseases for s in d.get("symptoms", [])),
+            *(r["condition"] for r in remedies)
+        ])
+        canonical = self.terms.canonicalize
+        self.diseases_by_name = {canonical(d["name"]): d for d in diseases}
+        self.remedies_by_condition = {}
+        for remedy in remedies:
+            self.remedies_by_condition.setdefault(canonical(remedy["condition"]), remedy)
+        self.diseases_by_symptom: Dict[str, List[Dict[str, Any]]] = {}
+        for disease in diseases:
+            for symptom in {canonical(s) for s in disease.get("symptoms", [])}:
+                self.diseases_by_symptom.setdefault(symptom, []).append(disease)
+
+
+class ReferenceCache:
+    """Read-through cache of reference data shared by every session in the process.
+
+    Readers get dictionary lookups on the current snapshot. A background thread rebuilds the
+    snapshot when a change stream reports edits to the collections, or, on deployments without
+    change streams (standalone servers), when a polled content hash changes.
+    """
+
+    def __init__(self, loader: Callable[[], Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]],
+                 db=None, poll_interval=None):
+        self.loader = loader
+        self.db = db
+        self.poll_interval = poll_interval or Config.REFERENCE_POLL_INTERVAL
+        self._data: Optional[ReferenceData] = None
+        self._listeners: List[Callable[[ReferenceData], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "ReferenceCache":
+        """Begin watching the database for edits"""
+        if self.db is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="reference-cache", daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def data(self) -> ReferenceData:
+        """Current snapshot, loading it on first use"""
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._load()
+                data = self._data
+        return data
+
+    def _load(self) -> ReferenceData:
+        diseases, remedies = self.loader()
+        version = self._data.version + 1 if self._data is not None else 1
+        return ReferenceData(diseases, remedies, version)
+
+    def refresh(self):
+        """Rebuild the snapshot; readers keep the previous one until the swap"""
+        try:
+            data = self._load()
+        except Exception as e:
+            logging.error(f"Error reloading reference data: {e}")
+            return
+        with self._lock:
+            self._data = data
+        logging.info(f"Reference data reloaded ({len(data.diseases)} diseases, {len(data.remedies_by_condition)} remedies)")
+        for listener in list(self._listeners):
+            try:
+                listener(data)
+            except Exception as e:
+                logging.error(f"Error in reference data listener: {e}")
+
+    def subscribe(self, listener: Callable[[ReferenceData], None]):
+        """Call listener with each new snapshot, e.g. to rebuild structures derived from it"""
+        self._listeners.append(listener)
+
+    def get_diseases(self) -> List[Dict[str, Any]]:
+        return [dict(d) for d in self.data.diseases]
+
+    def get_disease(self, name: str) -> Optional[Dict[str, Any]]:
+        data = self.data
+        disease = data.diseases_by_name.get(data.terms.canonicalize(name))
+        return dict(disease) if disease is not None else None
+
+    def get_diseases_by_symptom(self, symptom: str) -> List[Dict[str, Any]]:
+        data = self.data
+        return [dict(d) for d in data.diseases_by_symptom.get(data.terms.canonicalize(symptom), [])]
+
+    def get_remedy(self, condition: str) -> Optional[Dict[str, Any]]:
+        data = self.data
+        remedy = data.remedies_by_condition.get(data.terms.canonicalize(condition))
+        return dict(remedy) if remedy is not None else None
+
+    def match_term(self, text: str) -> Optional[Match]:
+        return self.data.terms.match(text)
+
+    def canonicalize(self, text: str) -> str:
+        return self.data.terms.canonicalize(text)
+
+    def _run(self):
+        if Config.REFERENCE_CACHE_WATCH:
+            try:
+                self._watch()
+                return
+            except OperationFailure as e:
+                logging.info(f"Change streams unavailable ({e.code}), polling reference data every {self.poll_interval:g}s")
+        self._poll()
+
+    def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(REFERENCE_COLLECTIONS)}}}]
+        resume_token = None
+        while not self._stop.is_set():
+            try:
+                with self.db.watch(pipeline, resume_after=resume_token, max_await_time_ms=1000) as stream:
+                    if resume_token is None:
+                        # Edits made before the stream opened would otherwise be missed
+                        self.refresh()
+                    while stream.alive and not self._stop.is_set():
+                        if stream.try_next() is None:
+                            continue
+                        # Drain the burst from a bulk edit so it costs one reload
+                        while stream.try_next() is not None:
+                            pass
+                        resume_token = stream.resume_token
+                        self.refresh()
+            except OperationFailure:
+                if resume_token is None:
+                    raise
+                logging.warning("Reference data change stream could not resume, reloading")
+                resume_token = None
+            except PyMongoError as e:
+                logging.error(f"Reference data change stream error: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def _stamp(self) -> Dict[str, Any]:
+        """Content hash of the reference collections; any insert, edit or delete changes it"""
+        result = self.db.command("dbHash", collections=list(REFERENCE_COLLECTIONS))
+        return result["collections"]
+
+    def _poll(self):
+        stamp = None
+        delay = 0
+        while not self._stop.wait(delay):
+            delay = self.poll_interval
+            try:
+                current = self._stamp()
+            except PyMongoError as e:
+                logging.error(f"Error polling reference data version: {e}")
+                continue
+            # The first stamp may postdate a snapshot already served, so reload once to line them up
+            if current != stamp and (stamp is not None or self._data is not None):
+                self.refresh()
+            stamp = current
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,103 @@
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from normalize import Match, normalize_text
+from prompts import get_prompt
+
+# Where a resolved remedy came from, cheapest first
+SOURCE_CURATED = "curated"
+SOURCE_CURATED_FUZZY = "curated_fuzzy"
+SOURCE_SAVED = "saved_generation"
+SOURCE_GENERATED = "generated"
+SOURCE_FALLBACK = "fallback"
+
+SOURCE_LABELS = {
+    SOURCE_CURATED: "Curated remedy from the database",
+    SOURCE_CURATED_FUZZY: "Curated remedy from the database (closest match)",
+    SOURCE_SAVED: "Previously generated by IBM Watson AI",
+    SOURCE_GENERATED: "Generated by IBM Watson AI",
+    SOURCE_FALLBACK: "General guidance (IBM Watson AI unavailable)"
+}
+
+
+@dataclass
+class ResolvedRemedy:
+    remedy: Dict[str, Any]
+    source: str
+    condition: str
+
+    @property
+    def label(self) -> str:
+        return SOURCE_LABELS.get(self.source, self.source)
+
+
+class RemedyResolver:
+    """Remedy lookup that tries curated data, then saved generations, and calls the model last.
+
+    Model output is written back so the next request for the same condition is an indexed read.
+    """
+
+    def __init__(self, db_manager, watson_ai):
+        self.db_manager = db_manager
+        self.watson_ai = watson_ai
+        # key -> [lock, sessions using it]; entries are dropped once the last session leaves
+        self._inflight: Dict[str, List[Any]] = {}
+        self._inflight_lock = threading.Lock()
+
+    def _curated(self, match: Optional[Match]) -> Optional[ResolvedRemedy]:
+        if match is None:
+            return None
+        remedy = self.db_manager.get_remedy(match.canonical)
+        if remedy is None:
+            return None
+        # Aliases are exact matches; only typo corrections are reported as approximate
+        source = SOURCE_CURATED if match.distance == 0 else SOURCE_CURATED_FUZZY
+        return ResolvedRemedy(remedy, source, match.canonical)
+
+    def _saved(self, key: str) -> Optional[ResolvedRemedy]:
+        remedy = self.db_manager.get_generated_remedy(key)
+        if remedy is not None:
+            return ResolvedRemedy(remedy, SOURCE_SAVED, key)
+        return None
+
+    @contextmanager
+    def _key_lock(self, key: str):
+        with self._inflight_lock:
+            entry = self._inflight.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._inflight_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._inflight[key]
+
+    def resolve(self, condition: str) -> ResolvedRemedy:
+        """Remedy for a condition from the cheapest tier that has one"""
+        match = self.db_manager.match_term(condition)
+        key = match.canonical if match else normalize_text(condition)
+        resolved = self._curated(match) or self._saved(key)
+        if resolved is not None:
+            return resolved
+
+        # Sessions asking for the same new condition share one generation
+        with self._key_lock(key):
+            resolved = self._saved(key)
+            if resolved is not None:
+                return resolved
+
+            remedy = self.watson_ai.generate_remedy(key, fallback=False)
+            if remedy is None:
+                return ResolvedRemedy(self.watson_ai.fallback_remedy(key), SOURCE_FALLBACK, key)
+
+            template = get_prompt("home_remedy")
+            try:
+                self.db_manager.save_generated_remedy(key, remedy, template.model_id, template.version)
+            except Exception as e:
+                logging.error(f"Error saving generated remedy for {key}: {e}")
+            return ResolvedRemedy(remedy, SOURCE_GENERATED, key)
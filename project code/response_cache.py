@@ -0,0 +1,108 @@
+import hashlib
+import json
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from config import Config
+
+
+class ResponseCache:
+    """Two-tier cache for model generations: in-process LRU plus optional MongoDB collection"""
+
+    def __init__(self, max_entries=None, ttl=None, collection=None):
+        self.max_entries = max_entries or Config.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else Config.RESPONSE_CACHE_TTL
+        self.collection = collection
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+        if self.collection is not None:
+            try:
+                self.collection.create_index("expires_at", expireAfterSeconds=0)
+            except Exception as e:
+                logging.error(f"Response cache index error: {e}")
+                self.collection = None
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Key a generation request on its prompt, model and parameters"""
+        key_data = {
+            "input": " ".join(payload.get("input", "").split()),
+            "model_id": payload.get("model_id"),
+            "parameters": payload.get("parameters", {})
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached generation, checking memory before the persistent tier"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.collection is not None:
+            try:
+                doc = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+                if doc is not None:
+                    remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+                    self._store(key, doc["value"], now + remaining)
+                    with self._lock:
+                        self.persistent_hits += 1
+                    return doc["value"]
+            except Exception as e:
+                logging.error(f"Response cache read error: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: str):
+        """Cache a generation in both tiers"""
+        self._store(key, value, time.time() + self.ttl)
+
+        if self.collection is not None:
+            try:
+                self.collection.replace_one(
+                    {"_id": key},
+                    {"_id": key, "value": value, "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)},
+                    upsert=True
+                )
+            except Exception as e:
+                logging.error(f"Response cache write error: {e}")
+
+    def _store(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all in-process entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,47 @@
+import threading
+import logging
+from datetime import datetime, timedelta
+
+from config import Config
+
+
+def bucket_start(moment: datetime, unit: str) -> datetime:
+    """Start of the hour or day containing moment, matching $dateTrunc"""
+    if unit == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class RollupScheduler:
+    """Background job that refreshes the hourly and daily health metric rollups"""
+
+    # How far back each run recomputes. The current bucket is still filling, so its rollup is partial
+    # and is replaced on every run until it closes; summaries read rollups only for long-closed buckets
+    LOOKBACK = {"hour": timedelta(hours=2), "day": timedelta(days=1)}
+
+    def __init__(self, db_manager, interval=None):
+        self.db_manager = db_manager
+        self.interval = interval or Config.ROLLUP_INTERVAL
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-rollup", daemon=True)
+        self._thread.start()
+
+    def run_once(self, now=None):
+        """Roll up the most recent buckets of every tier"""
+        # Readings are stored as naive UTC, so bucket on the same clock
+        now = now or datetime.utcnow()
+        for unit, lookback in self.LOOKBACK.items():
+            since = bucket_start(now - lookback, unit)
+            self.db_manager.rollup_health_metrics(unit, since=since)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Health metrics rollup failed: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        """Stop the background job"""
+        self._stop.set()
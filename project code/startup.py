@@ -0,0 +1,171 @@
+import builtins
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class StartupProfiler:
+    """Import and initialization timings, similar to python -X importtime but readable from the app"""
+
+    def __init__(self):
+        self.imports: Dict[str, Dict[str, float]] = {}
+        self.phases: List[Dict[str, Any]] = []
+        self._original_import = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self):
+        """Time every first-time module import from now on"""
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        # Children are timed separately so each module reports its own (self) time
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self.imports.setdefault(name, {
+                    "cumulative": elapsed,
+                    "self": elapsed - children,
+                    "thread": threading.current_thread().name
+                })
+
+    @contextmanager
+    def phase(self, label: str):
+        """Time a named startup step, e.g. constructing a service"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append({
+                    "phase": label,
+                    "seconds": time.perf_counter() - start,
+                    "thread": threading.current_thread().name
+                })
+
+    def report(self, top: int = 15) -> Dict[str, List[Dict[str, Any]]]:
+        """Slowest imports by self time and every timed phase"""
+        with self._lock:
+            imports = sorted(
+                ({"module": name, **timing} for name, timing in self.imports.items()),
+                key=lambda row: row["self"], reverse=True
+            )
+            return {"imports": imports[:top], "phases": list(self.phases)}
+
+    def log(self, top: int = 15):
+        report = self.report(top)
+        for row in report["imports"]:
+            logging.info(f"import {row['module']}: {row['self'] * 1000:.1f} ms self, {row['cumulative'] * 1000:.1f} ms cumulative")
+        for row in report["phases"]:
+            logging.info(f"{row['phase']}: {row['seconds'] * 1000:.1f} ms ({row['thread']})")
+
+
+PROFILER = StartupProfiler()
+
+
+class LazyService:
+    """A service constructed on a background thread, so callers only wait if they need it before it is ready
+
+    A failed construction is reported to everyone already waiting and then forgotten, so the
+    next access (e.g. a Streamlit rerun) tries again instead of re-raising a stale error.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self._future: Optional[Future] = None
+        self._callbacks: List[Callable[[Any], None]] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> "LazyService":
+        """Begin construction if it has not started or the last attempt failed"""
+        self._current()
+        return self
+
+    def _current(self) -> Future:
+        with self._lock:
+            if self._future is None:
+                self._future = Future()
+                threading.Thread(target=self._build, args=(self._future,), name=f"init-{self.name}", daemon=True).start()
+            return self._future
+
+    def _build(self, future: Future):
+        try:
+            with PROFILER.phase(f"init {self.name}"):
+                service = self.factory()
+        except Exception as e:
+            logging.error(f"Error initializing {self.name}: {e}")
+            with self._lock:
+                if self._future is future:
+                    self._future = None
+            future.set_exception(e)
+            return
+
+        # Resolved under the lock so on_ready never sees a pending future after the callbacks are taken
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+            future.set_result(service)
+        for callback in callbacks:
+            self._notify(callback, service)
+
+    def _notify(self, callback: Callable[[Any], None], service: Any):
+        try:
+            callback(service)
+        except Exception as e:
+            logging.error(f"Error in {self.name} ready callback: {e}")
+
+    def on_ready(self, callback: Callable[[Any], None]):
+        """Call back with the service once it is built, immediately if it already is; failed attempts are skipped"""
+        with self._lock:
+            future = self._future
+            if future is None or not future.done():
+                self._callbacks.append(callback)
+                return
+        self._notify(callback, future.result())
+
+    @property
+    def ready(self) -> bool:
+        future = self._future
+        return future is not None and future.done() and future.exception() is None
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """The service, blocking until construction finishes; raises if this attempt failed"""
+        return self._current().result(timeout)
+
+
+class ServiceProxy:
+    """Stands in for a lazily built service; the first attribute access waits for it"""
+
+    def __init__(self, service: LazyService):
+        object.__setattr__(self, "_service", service)
+
+    def __getattr__(self, name):
+        return getattr(self._service.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._service.get(), name, value)
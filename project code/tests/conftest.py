@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Tests never reach IBM Cloud or MongoDB
+os.environ["IBM_WATSON_API_KEY"] = ""
+os.environ["STORAGE_BACKEND"] = "memory"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+
+class StubResponse:
+    """One scripted reply: a status, headers and a body sent whole or as separate writes"""
+
+    def __init__(self, status=200, body=b"", headers=None, chunks=None):
+        self.status = status
+        self.body = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.headers = headers or {}
+        self.chunks = chunks
+
+
+class StubServer:
+    """Local HTTP server that answers POSTs from a queue of scripted responses"""
+
+    def __init__(self):
+        self.responses = deque()
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                stub.requests.append((self.path, dict(self.headers), self.rfile.read(length)))
+                reply = stub.responses.popleft() if stub.responses else StubResponse(500)
+                self.send_response(reply.status)
+                for name, value in reply.headers.items():
+                    self.send_header(name, value)
+                if reply.chunks is not None:
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    for chunk in reply.chunks:
+                        self.wfile.write(chunk.encode())
+                        self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.send_header("Content-Length", str(len(reply.body)))
+                self.end_headers()
+                self.wfile.write(reply.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def reply(self, *responses: StubResponse):
+        self.responses.extend(responses)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.thread.start()
+    yield server
+    server.close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Retry immediately so retry tests run in milliseconds"""
+    monkeypatch.setattr(Config, "WATSON_BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(Config, "WATSON_BACKOFF_MAX", 0.0)
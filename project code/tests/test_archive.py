@@ -0,0 +1,41 @@
+import numpy as np
+
+from archive import archive_frame, export_collection, open_archive
+from database import DatabaseManager
+
+
+def test_export_streams_batches_and_keeps_users_contiguous(tmp_path):
+    db_manager = DatabaseManager()
+    for i in range(25):
+        db_manager.save_health_metrics({"heart_rate": 60 + i}, user_id="archive_a")
+        db_manager.save_health_metrics({"heart_rate": 90 + i}, user_id="archive_b")
+    path = str(tmp_path / "metrics.feather")
+
+    rows = export_collection(db_manager, "health_metrics", path, user_id=None, batch_size=10)
+    table = open_archive(path)
+
+    assert rows == table.num_rows
+    # Cursor batches are written as they arrive rather than combined per user
+    assert table.column("heart_rate").num_chunks >= 6
+    users = [batch.column(batch.schema.get_field_index("user_id")).unique().to_pylist() for batch in table.to_batches()]
+    assert all(len(u) == 1 for u in users)
+    first_b = [u[0] for u in users].index("archive_b")
+    assert all(u == ["archive_b"] for u in users[first_b:first_b + 3])
+
+    frame = archive_frame(table, "archive_b")
+    assert frame["heart_rate"].tolist() == [90.0 + i for i in range(25)]
+    assert "date" in frame
+
+
+def test_single_batch_user_is_a_view_over_the_mapped_file(tmp_path):
+    db_manager = DatabaseManager()
+    for i in range(5):
+        db_manager.save_health_metrics({"heart_rate": 70 + i}, user_id="archive_view")
+    path = str(tmp_path / "one.feather")
+    export_collection(db_manager, "health_metrics", path, user_id="archive_view")
+    table = open_archive(path)
+
+    frame = archive_frame(table, "archive_view")
+
+    mapped = np.frombuffer(table.column("heart_rate").chunk(0).buffers()[1], dtype=np.float64)
+    assert np.shares_memory(frame["heart_rate"].to_numpy(), mapped)
@@ -0,0 +1,84 @@
+import json
+import threading
+
+import pandas as pd
+
+from batch_predict import SOURCE_FALLBACK, SOURCE_WATSON, run_batch
+
+
+class FakeWatson:
+    """Records predict calls; returns None (Watson unavailable) while offline is set"""
+
+    def __init__(self, offline=False):
+        self.offline = offline
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def predict_disease(self, symptoms, fallback=True):
+        with self._lock:
+            self.calls.append(tuple(symptoms))
+        if self.offline:
+            return None
+        return [{"name": "Watson " + "+".join(symptoms), "probability": 80}]
+
+    def fallback_prediction(self, symptoms):
+        return [{"name": "Local " + "+".join(symptoms), "probability": 50}]
+
+
+def write_intake(path, rows):
+    pd.DataFrame(rows, columns=["record_id", "symptoms"]).to_csv(path, index=False)
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rerun_resumes_after_checkpointed_records(tmp_path):
+    intake, output = tmp_path / "intake.csv", tmp_path / "out.jsonl"
+    write_intake(intake, [(f"r{i}", f"symptom {i}") for i in range(6)])
+    with open(output, "w", encoding="utf-8") as f:
+        for i in range(3):
+            f.write(json.dumps({"record_id": f"r{i}", "predictions": [], "source": SOURCE_WATSON}) + "\n")
+        # Left behind by a crash mid-write
+        f.write('{"record_id": "r3", "predic')
+
+    watson = FakeWatson()
+    report = run_batch(watson, str(intake), str(output), workers=2)
+
+    rows = read_output(output)
+    assert (report.records, report.skipped, report.predicted) == (6, 3, 3)
+    assert sorted(watson.calls) == [("symptom 3",), ("symptom 4",), ("symptom 5",)]
+    assert sorted(row["record_id"] for row in rows) == [f"r{i}" for i in range(6)]
+
+
+def test_retry_fallback_sends_local_answers_back_to_watson(tmp_path):
+    intake, output = tmp_path / "intake.csv", tmp_path / "out.jsonl"
+    write_intake(intake, [("a", "fever"), ("b", "cough")])
+
+    first = run_batch(FakeWatson(offline=True), str(intake), str(output), workers=1)
+    assert first.fallback == 2
+
+    watson = FakeWatson()
+    plain = run_batch(watson, str(intake), str(output), workers=1)
+    assert plain.skipped == 2 and watson.calls == []
+
+    retried = run_batch(watson, str(intake), str(output), workers=1, retry_fallback=True)
+
+    rows = read_output(output)
+    assert (retried.skipped, retried.predicted, retried.fallback) == (0, 2, 0)
+    assert {row["record_id"]: row["source"] for row in rows} == {"a": SOURCE_WATSON, "b": SOURCE_WATSON}
+
+
+def test_equivalent_symptom_sets_share_one_prediction(tmp_path):
+    intake, output = tmp_path / "intake.csv", tmp_path / "out.jsonl"
+    write_intake(intake, [("a", "Fever; cough"), ("b", "cough,fever"), ("c", ""), ("d", "headache")])
+
+    watson = FakeWatson()
+    report = run_batch(watson, str(intake), str(output), workers=1)
+
+    rows = {row["record_id"]: row for row in read_output(output)}
+    assert len(watson.calls) == 2
+    assert (report.predicted, report.deduplicated, report.failed) == (2, 1, 1)
+    assert rows["a"]["predictions"] == rows["b"]["predictions"]
+    assert rows["c"]["error"] == "no symptoms"
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from database import DatabaseManager
+
+
+def test_pages_before_a_cursor_ignore_newer_writes():
+    db_manager = DatabaseManager()
+    start = datetime(2024, 1, 1)
+    for i in range(10):
+        db_manager.save_chat_message("paging_user", f"question {i}", f"answer {i}", timestamp=start + timedelta(minutes=i))
+    oldest_shown = start + timedelta(minutes=7)
+
+    first = db_manager.get_chat_history("paging_user", limit=3, before=oldest_shown)
+    # A message written after the page was computed must not shift the next page
+    db_manager.save_chat_message("paging_user", "question 10", "answer 10", timestamp=start + timedelta(minutes=10))
+    second = db_manager.get_chat_history("paging_user", limit=3, skip=3, before=oldest_shown)
+
+    assert [m["message"] for m in first] == ["question 6", "question 5", "question 4"]
+    assert [m["message"] for m in second] == ["question 3", "question 2", "question 1"]
+    assert db_manager.count_chat_messages("paging_user", before=oldest_shown) == 7
+    assert db_manager.count_chat_messages("paging_user") == 11
+
+
+def test_back_dated_messages_page_in_timestamp_order():
+    db_manager = DatabaseManager()
+    start = datetime(2024, 1, 1)
+    for i in (0, 1, 3, 4):
+        db_manager.save_chat_message("backdated_user", f"question {i}", f"answer {i}", timestamp=start + timedelta(minutes=i))
+    db_manager.save_chat_message("backdated_user", "question 2", "answer 2", timestamp=start + timedelta(minutes=2))
+
+    newest = db_manager.get_chat_history("backdated_user", limit=2)
+    older = db_manager.get_chat_history("backdated_user", limit=2, before=newest[-1]["timestamp"])
+
+    assert [m["message"] for m in newest] == ["question 4", "question 3"]
+    assert [m["message"] for m in older] == ["question 2", "question 1"]
@@ -0,0 +1,34 @@
+from conversation import extractive_summary
+from prompts import CHARS_PER_TOKEN, get_prompt, trim_head
+
+
+def test_extractive_summary_keeps_recent_whole_sentences():
+    turns = [("I have had a cough for a week. It gets worse at night.", ""), ("Could it be asthma?", "")]
+
+    digest = extractive_summary("Patient reported a fever. Took paracetamol.", turns, max_tokens=22)
+
+    assert digest == "Patient asked: I have had a cough for a week. Patient asked: Could it be asthma?"
+    assert len(digest) <= 22 * CHARS_PER_TOKEN
+
+
+def test_extractive_summary_cuts_an_oversized_sentence_on_a_word():
+    digest = extractive_summary("", [("pain " * 100, "")], max_tokens=5)
+
+    assert digest == "Patient asked: pain"
+
+
+def test_trim_head_starts_on_a_line_boundary():
+    assert trim_head("first line\nsecond line\nthird", 12) == "third"
+    assert trim_head("short", 10) == "short"
+    assert trim_head("anything", 0) == ""
+
+
+def test_chat_context_loses_its_oldest_turns_first():
+    turns = "\n".join(f"Patient: question {i} {'detail ' * 30}\nAssistant: answer {i}" for i in range(60))
+    context = f"Summary of earlier conversation: early symptoms\nRecent conversation:\n{turns}"
+
+    prompt = get_prompt("chat_response").render(context=context, message="What now?")
+
+    assert "answer 59" in prompt
+    assert "question 0 " not in prompt
+    assert 'The patient now asks: "What now?"' in prompt
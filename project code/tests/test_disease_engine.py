@@ -0,0 +1,55 @@
+import numpy as np
+
+from disease_engine import RISK_RECOMMENDATIONS, DiseaseScoringEngine
+from migrations import load_seed
+
+
+def dense_scores(diseases, symptom_sets):
+    """Reference scoring with plain Python sets, one disease at a time"""
+    scores = np.zeros((len(symptom_sets), len(diseases)))
+    for row, symptoms in enumerate(symptom_sets):
+        query = {s.strip().lower() for s in symptoms}
+        for col, disease in enumerate(diseases):
+            known = {s.strip().lower() for s in disease["symptoms"]}
+            norm = np.sqrt(max(len(query), 1) * len(known))
+            scores[row, col] = len(query & known) / norm * float(disease.get("probability_base", 0.5))
+    return scores
+
+
+def test_sparse_scores_match_dense_baseline():
+    diseases = load_seed("diseases")
+    engine = DiseaseScoringEngine(diseases)
+    vocabulary = sorted(engine.vocabulary)
+    rng = np.random.default_rng(7)
+    symptom_sets = [list(rng.choice(vocabulary, size=size, replace=False)) for size in (1, 2, 3, 5, 8)]
+    symptom_sets += [["Fever ", "HEADACHE"], ["not a symptom"], []]
+
+    np.testing.assert_allclose(engine.score_batch(symptom_sets), dense_scores(engine.diseases, symptom_sets), rtol=1e-5)
+
+
+def test_ranking_orders_by_score_and_drops_zero_matches():
+    engine = DiseaseScoringEngine([
+        {"name": "Cold", "symptoms": ["cough", "sneezing", "runny nose"], "probability_base": 0.8},
+        {"name": "Flu", "symptoms": ["cough", "fever", "body aches"], "probability_base": 0.9, "risk_level": "medium"},
+        {"name": "Migraine", "symptoms": ["headache", "nausea"], "probability_base": 0.7},
+        {"name": "No symptoms recorded", "symptoms": []}
+    ])
+
+    ranked = engine.rank(["cough", "fever"], top_k=5)
+
+    assert len(engine) == 3
+    assert [p["name"] for p in ranked] == ["Flu", "Cold"]
+    assert ranked[0]["probability"] == round(2 / np.sqrt(6) * 0.9 * 100)
+    assert ranked[0]["recommendations"] == RISK_RECOMMENDATIONS["medium"]
+    assert engine.rank(["unknown"]) == []
+
+
+def test_canonicalizer_merges_aliases_into_one_column():
+    aliases = {"high temperature": "fever"}
+    engine = DiseaseScoringEngine(
+        [{"name": "Flu", "symptoms": ["fever", "High Temperature", "cough"], "probability_base": 1.0}],
+        canonicalize=lambda s: aliases.get(s.strip().lower(), s.strip().lower())
+    )
+
+    assert sorted(engine.vocabulary) == ["cough", "fever"]
+    np.testing.assert_allclose(engine.score_batch([["high temperature"], ["fever"]]), [[1 / np.sqrt(2)], [1 / np.sqrt(2)]], rtol=1e-6)
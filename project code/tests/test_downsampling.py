@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsampling import build_rollups, choose_rollup, lttb_indices, minmax_indices
+from health_buffer import HealthDataBuffer
+from utils import generate_sample_health_data
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 3), (1000, 100), (1001, 37), (50_000, 1000)])
+def test_lttb_keeps_endpoints_and_exact_length(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.integers(1, 60, n)).astype(np.int64)
+    y = rng.normal(size=n)
+
+    indices = lttb_indices(x, y, n_out)
+
+    assert len(indices) == n_out
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_returns_everything_when_the_budget_covers_the_series():
+    assert lttb_indices(np.arange(5), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb_indices(np.arange(5), np.arange(5.0), 2).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_lttb_keeps_an_isolated_spike():
+    y = np.zeros(10_000)
+    y[4321] = 50.0
+
+    assert 4321 in lttb_indices(np.arange(10_000), y, 200)
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    y = np.sin(np.linspace(0, 40, 10_000))
+    y[777], y[8888] = 9.0, -9.0
+
+    indices = minmax_indices(y, 200)
+
+    assert {777, 8888, 9999} <= set(indices.tolist())
+    assert len(indices) <= 201
+
+
+def minute_readings(days):
+    start = datetime(2024, 1, 1)
+    n = days * 24 * 60
+    return pd.DataFrame({"date": [start + timedelta(minutes=i) for i in range(n)], "heart_rate": 70 + np.sin(np.arange(n) / 500)})
+
+
+def test_zooming_in_picks_a_finer_rollup_level():
+    frame = minute_readings(120)
+    rollups = build_rollups(frame, "heart_rate")
+
+    whole, _ = choose_rollup(rollups, 1000)
+    zoomed, window = choose_rollup(rollups, 1000, datetime(2024, 2, 1), datetime(2024, 2, 8))
+
+    assert whole == "daily"
+    assert zoomed == "hourly"
+    assert window["date"].min() >= pd.Timestamp(2024, 2, 1) and len(window) <= 1000
+
+
+def test_buffer_rollups_are_cached_until_an_append():
+    buffer = HealthDataBuffer.from_frame(generate_sample_health_data())
+
+    first = buffer.rollups("heart_rate")
+    assert buffer.rollups("heart_rate") is first
+
+    buffer.append({"date": datetime.now(), "heart_rate": 200, "systolic_bp": 120, "diastolic_bp": 80,
+                   "glucose": 90, "weight": 70.0, "temperature": 36.6})
+    rebuilt = buffer.rollups("heart_rate")
+    assert rebuilt is not first
+    assert rebuilt["hourly"]["max"].max() == 200
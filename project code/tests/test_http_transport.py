@@ -0,0 +1,133 @@
+import socket
+
+import pytest
+import requests
+
+from config import Config
+from http_transport import CircuitBreaker, CircuitOpenError, HTTPTransport
+from tests.conftest import StubResponse
+
+
+def make_transport(**kwargs):
+    breaker = kwargs.pop("breaker", None) or CircuitBreaker(error_rate=0.5, window=10, min_calls=4, cooldown=60)
+    return HTTPTransport(pool_size=2, connect_timeout=1, read_timeout=2, breaker=breaker, **kwargs)
+
+
+def closed_port_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/generate"
+
+
+def test_retries_transient_status_then_succeeds(stub_server):
+    stub_server.reply(StubResponse(503), StubResponse(429), StubResponse(200, {"ok": True}))
+    transport = make_transport(max_retries=3)
+
+    response = transport.post(f"{stub_server.url}/generate", json={})
+
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
+    assert len(stub_server.requests) == 3
+
+
+def test_returns_last_response_when_retries_run_out(stub_server):
+    stub_server.reply(*(StubResponse(502) for _ in range(3)))
+    transport = make_transport(max_retries=2, breaker=CircuitBreaker(min_calls=100))
+
+    response = transport.post(f"{stub_server.url}/generate", json={})
+
+    assert response.status_code == 502
+    assert len(stub_server.requests) == 3
+
+
+def test_client_errors_are_not_retried(stub_server):
+    stub_server.reply(StubResponse(400, {"error": "bad request"}))
+    transport = make_transport(max_retries=3)
+
+    response = transport.post(f"{stub_server.url}/generate", json={})
+
+    assert response.status_code == 400
+    assert len(stub_server.requests) == 1
+    assert transport.breaker.state == "closed"
+
+
+def test_retry_after_header_sets_the_delay(monkeypatch):
+    monkeypatch.setattr(Config, "WATSON_BACKOFF_MAX", 5.0)
+    transport = make_transport()
+    response = requests.Response()
+    response.headers["Retry-After"] = "2"
+    assert transport._backoff(0, response) == 2.0
+
+    response.headers["Retry-After"] = "120"
+    assert transport._backoff(0, response) == 5.0
+
+
+def test_connection_errors_raise_after_retries():
+    transport = make_transport(max_retries=1, breaker=CircuitBreaker(min_calls=100))
+
+    with pytest.raises(requests.ConnectionError):
+        transport.post(closed_port_url(), json={})
+
+
+def test_breaker_opens_and_stops_calling_the_server(stub_server):
+    stub_server.reply(*(StubResponse(500) for _ in range(4)))
+    transport = make_transport(max_retries=0)
+
+    for _ in range(4):
+        assert transport.post(f"{stub_server.url}/generate", json={}).status_code == 500
+
+    assert transport.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        transport.post(f"{stub_server.url}/generate", json={})
+    assert len(stub_server.requests) == 4
+
+
+def test_breaker_opening_mid_retry_stops_the_retries(stub_server):
+    stub_server.reply(*(StubResponse(503) for _ in range(10)))
+    transport = make_transport(max_retries=9)
+
+    with pytest.raises(CircuitOpenError):
+        transport.post(f"{stub_server.url}/generate", json={})
+    assert len(stub_server.requests) == 4
+
+
+def test_half_open_probe_closes_or_reopens_the_breaker(stub_server, monkeypatch):
+    breaker = CircuitBreaker(error_rate=0.5, window=10, min_calls=2, cooldown=0)
+    transport = make_transport(max_retries=0, breaker=breaker)
+    stub_server.reply(StubResponse(500), StubResponse(500), StubResponse(500), StubResponse(200, {}))
+
+    transport.post(f"{stub_server.url}/generate", json={})
+    transport.post(f"{stub_server.url}/generate", json={})
+    # A zero cooldown means the open breaker immediately lets one probe through
+    assert breaker.state == "half-open"
+
+    transport.post(f"{stub_server.url}/generate", json={})
+    assert breaker._opened_at is not None
+
+    assert transport.post(f"{stub_server.url}/generate", json={}).status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_sessions_are_pooled_per_host(stub_server):
+    stub_server.reply(StubResponse(200, {}), StubResponse(200, {}))
+    transport = make_transport()
+
+    transport.post(f"{stub_server.url}/a", json={})
+    transport.post(f"{stub_server.url}/b", json={})
+
+    assert len(transport._sessions) == 1
+    transport.close()
+    assert not transport._sessions
+
+
+def test_retried_streaming_responses_release_their_connection(stub_server, monkeypatch):
+    stub_server.reply(StubResponse(503), StubResponse(503), StubResponse(200, {"ok": True}))
+    transport = make_transport(max_retries=2)
+    closed = []
+    original_close = requests.Response.close
+    monkeypatch.setattr(requests.Response, "close", lambda self: closed.append(self.status_code) or original_close(self))
+
+    response = transport.post(f"{stub_server.url}/generate", json={}, stream=True)
+
+    assert response.status_code == 200
+    assert closed == [503, 503]
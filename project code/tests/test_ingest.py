@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from database import DatabaseManager
+from ingest import ingest_file
+
+
+def write_export(path, start, count):
+    pd.DataFrame({
+        'Date': [(start + timedelta(minutes=i)).isoformat() for i in range(count)],
+        'BPM': [70 + i % 10 for i in range(count)],
+        'sys': [120] * count,
+        'Temp': [36.8] * count
+    }).to_csv(path, index=False)
+
+
+def test_reimporting_an_export_inserts_nothing(tmp_path):
+    db_manager = DatabaseManager()
+    path = tmp_path / "export.csv"
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(days=1)
+    write_export(path, start, 25)
+
+    first = ingest_file(db_manager, str(path), user_id="ingest_user", chunksize=10)
+    second = ingest_file(db_manager, str(path), user_id="ingest_user", chunksize=10)
+
+    assert (first.rows_read, first.rows_inserted, first.duplicates, first.chunks) == (25, 25, 0, 3)
+    assert (second.rows_read, second.rows_inserted, second.duplicates) == (25, 0, 25)
+    assert second.oldest_inserted is None
+
+
+def test_overlapping_export_adds_only_new_readings(tmp_path):
+    db_manager = DatabaseManager()
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(days=1)
+    write_export(tmp_path / "week1.csv", start, 20)
+    write_export(tmp_path / "week2.csv", start + timedelta(minutes=15), 20)
+
+    ingest_file(db_manager, str(tmp_path / "week1.csv"), user_id="overlap_user", chunksize=8)
+    report = ingest_file(db_manager, str(tmp_path / "week2.csv"), user_id="overlap_user", chunksize=8)
+
+    assert (report.rows_inserted, report.duplicates) == (15, 5)
+    assert report.oldest_inserted == start + timedelta(minutes=20)
+
+
+def test_duplicates_within_a_file_and_invalid_rows_are_counted(tmp_path):
+    db_manager = DatabaseManager()
+    stamp = (datetime.utcnow() - timedelta(hours=1)).replace(microsecond=0).isoformat()
+    path = tmp_path / "export.jsonl"
+    pd.DataFrame({
+        'time': [stamp, stamp, "not a date", stamp],
+        'hr': [72, 72, 80, 500],
+        'user': ["dup_user", "dup_user", "dup_user", "other_user"]
+    }).to_json(path, orient="records", lines=True)
+
+    report = ingest_file(db_manager, str(path))
+
+    assert (report.rows_inserted, report.duplicates, report.invalid_rows, report.rejected_values) == (1, 1, 2, 1)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insights import WINDOW, HealthInsightsEngine, MetricStats
+
+
+def readings(count, seed=3):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'heart_rate': rng.integers(60, 100, count),
+        'systolic_bp': rng.integers(110, 140, count),
+        'diastolic_bp': rng.integers(70, 90, count),
+        'glucose': rng.integers(80, 130, count),
+        'weight': np.round(rng.normal(70, 1.5, count), 1),
+        'temperature': np.round(rng.normal(36.8, 0.3, count), 1)
+    })
+    # One out-of-range and one statistically unusual reading
+    frame.loc[count // 2, 'heart_rate'] = 210
+    frame.loc[count - 1, 'glucose'] = 200
+    return frame
+
+
+def test_welford_and_window_sums_match_numpy():
+    values = np.random.default_rng(11).normal(100, 15, 500)
+    stats = MetricStats()
+    for value in values:
+        stats.update(value)
+
+    window = values[-WINDOW:]
+    x = np.arange(len(values) - WINDOW, len(values))
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std())
+    assert stats.rolling_mean == pytest.approx(window.mean())
+    assert stats.slope == pytest.approx(np.polyfit(x, window, 1)[0], abs=1e-6)
+    assert stats.last_z == pytest.approx((values[-1] - values[:-1].mean()) / values[:-1].std())
+
+
+def test_vectorized_history_matches_streaming_updates():
+    frame = readings(60)
+    streamed = HealthInsightsEngine()
+    for reading in frame.to_dict('records'):
+        streamed.update(reading)
+    built = HealthInsightsEngine.from_frame(frame)
+
+    for name, stats in built.stats.items():
+        expected = streamed.stats[name]
+        assert stats.count == expected.count
+        assert stats.mean == pytest.approx(expected.mean)
+        assert stats.std == pytest.approx(expected.std)
+        assert stats.rolling_mean == pytest.approx(expected.rolling_mean)
+        assert stats.slope == pytest.approx(expected.slope, abs=1e-9)
+        assert stats.last_z == pytest.approx(expected.last_z)
+    np.testing.assert_array_equal(built.risk_counts, streamed.risk_counts)
+    assert built.insights() == streamed.insights()
+
+
+def test_insights_flag_range_breaches_and_anomalies():
+    engine = HealthInsightsEngine.from_frame(readings(60))
+    glucose = next(line for line in engine.insights() if "Blood glucose" in line)
+
+    assert glucose.startswith("⚠️ Blood glucose of 200") and "unusual" in glucose
+    assert engine.risk_counts[2] == 1
+    assert sum(engine.risk_distribution().values()) == pytest.approx(100.0, abs=0.2)
+    assert HealthInsightsEngine().risk_distribution() == {'Low Risk': 0.0, 'Medium Risk': 0.0, 'High Risk': 0.0}
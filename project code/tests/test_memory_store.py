@@ -0,0 +1,32 @@
+import atexit
+from datetime import datetime
+
+from memory_store import InMemoryStore
+
+
+def test_snapshot_round_trip_restores_every_collection(tmp_path):
+    path = str(tmp_path / "store.pkl")
+    store = InMemoryStore(max_metrics=16, snapshot_path=path)
+    store.seed([{"name": "Flu", "symptoms": ["fever"]}], [{"condition": "flu", "title": "Rest"}])
+    store.save_health_metrics({"user_id": "u1", "timestamp": datetime(2024, 1, 1, 8), "heart_rate": 72.0})
+    store.save_chat_message({"user_id": "u1", "message": "hi", "response": "hello", "timestamp": datetime(2024, 1, 1, 9)})
+    store.save_generated_remedy({"condition": "hiccups", "title": "Hold your breath"})
+
+    assert store.snapshot()
+    restored = InMemoryStore(snapshot_path=path)
+
+    assert [d["name"] for d in restored.get_diseases()] == ["Flu"]
+    assert [r["condition"] for r in restored.get_remedies()] == ["flu"]
+    assert restored.get_health_metrics(user_id="u1")[0]["heart_rate"] == 72.0
+    assert restored.get_chat_history("u1")[0]["response"] == "hello"
+    assert restored.get_generated_remedy("hiccups")["title"] == "Hold your breath"
+
+
+def test_snapshot_is_registered_for_interpreter_exit(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+
+    store = InMemoryStore(snapshot_path=str(tmp_path / "store.pkl"))
+    InMemoryStore(snapshot_path="")
+
+    assert registered == [store.snapshot]
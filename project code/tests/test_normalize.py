@@ -0,0 +1,53 @@
+import pytest
+
+from normalize import TermIndex, edit_distance, normalize_text
+
+
+@pytest.fixture(scope="module")
+def index():
+    return TermIndex(
+        {"abdominal pain": ["stomach ache"], "shortness of breath": ["short of breath"]},
+        ["headache", "fever", "runny nose", "sore throat", "fatigue"],
+        max_distance=2
+    )
+
+
+def test_normalize_text_folds_case_accents_and_punctuation():
+    assert normalize_text("  Café-Au_Lait's  FEVER!! ") == "cafe au laits fever"
+
+
+def test_exact_and_alias_matches_cost_no_edits(index):
+    assert index.match("Stomach-Ache").canonical == "abdominal pain"
+    assert index.match("stomach ache").distance == 0
+
+
+@pytest.mark.parametrize("query", [
+    "shortnes of breth",      # two omissions
+    "shortnass of braath",    # two substitutions
+    "abdominel paim",         # two substitutions
+    "abdomnal pin",           # two omissions
+    "sorre throatt",          # two insertions
+])
+def test_two_edit_typos_match_long_terms(index, query):
+    match = index.match(query)
+
+    assert match is not None
+    assert match.distance == 2
+    assert match.canonical in ("shortness of breath", "abdominal pain", "sore throat")
+
+
+def test_short_terms_tolerate_fewer_edits(index):
+    assert index.match("fevr").canonical == "fever"
+    assert index.match("fvr") is None
+    assert index.match("fatgu") is None
+
+
+def test_unknown_text_canonicalizes_to_its_normal_form(index):
+    assert index.match("broken arm") is None
+    assert index.canonicalize("Broken  Arm") == "broken arm"
+
+
+def test_edit_distance_counts_transpositions_once():
+    assert edit_distance("fever", "fevre", 2) == 1
+    assert edit_distance("headache", "haedahce", 2) == 2
+    assert edit_distance("cold", "heat", 1) == 2
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from output_parser import (JSONExtractor, OutputParseError, extract_json, parse_predictions,
+                           parse_remedy, repair_json)
+
+PREDICTIONS = ('Here are the likely conditions:\n'
+               '[{"name": "Common Cold", "probability": 70, "risk_level": "low", '
+               '"description": "Viral infection", "recommendations": ["Rest", "Fluids"]}, '
+               '{"name": "Flu", "probability": 40, "risk_level": "medium", "description": "Influenza"}]\n'
+               'END_OF_JSON')
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("{'name': 'Cold', 'ok': True, 'extra': None}", {"name": "Cold", "ok": True, "extra": None}),
+    ('{name: "Cold", risk level: "low",}', {"name": "Cold", "risk level": "low"}),
+    ('{“title”: “Ginger tea”}', {"title": "Ginger tea"}),
+    ('{"text": "line one\nline two"}', {"text": "line one\nline two"}),
+    ("{'note': 'it\\'s fine', \"quote\": 'say \"hi\"'}", {"note": "it's fine", "quote": 'say "hi"'}),
+])
+def test_repairs_common_model_mistakes(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('[{"name": "Cold", "probability": 70}, {"name": "Fl', [{"name": "Cold", "probability": 70}, {"name": "Fl"}]),
+    ('{"ingredients": ["ginger", "honey",', {"ingredients": ["ginger", "honey"]}),
+    ('{"title": "Tea", "duration":', {"title": "Tea"}),
+    ('{"title": "Tea", "dura', {"title": "Tea"}),
+    ('[{"name": "Cold"}, {"na', [{"name": "Cold"}, {}]),
+    ('{"title": "Tea\\', {"title": "Tea"}),
+])
+def test_closes_output_truncated_by_the_token_limit(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_streamed_chunks_give_the_same_result_however_they_are_split():
+    expected = extract_json(PREDICTIONS, convert=parse_predictions)
+    for size in (1, 2, 3, 7, 64):
+        extractor = JSONExtractor(convert=parse_predictions)
+        chunks = [PREDICTIONS[i:i + size] for i in range(0, len(PREDICTIONS), size)]
+        # The block is accepted as soon as its closing bracket arrives
+        finished_at = next(i for i, chunk in enumerate(chunks) if extractor.feed(chunk))
+        assert PREDICTIONS.index("]\n") < (finished_at + 1) * size
+        assert extractor.finish() == expected
+    assert [p.name for p in expected] == ["Common Cold", "Flu"]
+
+
+def test_truncated_stream_is_repaired_on_finish():
+    extractor = JSONExtractor("{", convert=parse_remedy)
+    for chunk in ['Remedy: {"title": "Ginger tea", "ingre', 'dients": ["ginger", "honey"], ', '"instructions": ["Steep for 10 min']:
+        assert not extractor.feed(chunk)
+
+    remedy = extractor.finish()
+
+    assert remedy.ingredients == ["ginger", "honey"]
+    assert remedy.instructions == ["Steep for 10 min"]
+
+
+def test_rejected_blocks_are_skipped_until_one_converts():
+    text = 'Example: {"note": "not a remedy"} Answer: {"ingredients": "ginger; honey", "steps": "1. Boil\n2. Steep"}'
+
+    remedy = extract_json(text, "{", parse_remedy)
+
+    assert remedy.ingredients == ["ginger", "honey"]
+    assert remedy.instructions == ["Boil", "Steep"]
+
+
+def test_no_usable_block_raises():
+    with pytest.raises(OutputParseError):
+        extract_json("I cannot help with that.", convert=parse_predictions)
+    with pytest.raises(OutputParseError):
+        extract_json('[{"probability": 50}]', convert=parse_predictions)
@@ -0,0 +1,49 @@
+import copy
+import json
+import os
+
+import pytest
+
+from database import plan_stages
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def timeseries_explain():
+    with open(os.path.join(DATA_DIR, "explain_timeseries_find.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_timeseries_find_plan_is_read_from_the_cursor_stage(timeseries_explain):
+    stages, indexes = plan_stages(timeseries_explain)
+
+    assert stages[:4] == ["$_internalUnpackBucket", "$sort", "$project", "FETCH"]
+    assert "IXSCAN" in stages
+    assert indexes == ["meta.user_id_1_timestamp_-1"]
+
+
+def test_timeseries_collection_scan_is_visible(timeseries_explain):
+    explained = copy.deepcopy(timeseries_explain)
+    explained["stages"][0]["$cursor"]["queryPlanner"]["winningPlan"] = {"stage": "COLLSCAN", "direction": "forward"}
+
+    stages, indexes = plan_stages(explained)
+
+    assert "COLLSCAN" in stages
+    assert indexes == []
+
+
+def test_plain_collection_plan_with_sbe_query_plan():
+    explained = {
+        "queryPlanner": {
+            "winningPlan": {
+                "queryPlan": {
+                    "stage": "PROJECTION_COVERED",
+                    "inputStage": {"stage": "IXSCAN", "indexName": "condition_1"}
+                },
+                "slotBasedPlan": {"slots": "..."}
+            }
+        }
+    }
+
+    assert plan_stages(explained) == (["PROJECTION_COVERED", "IXSCAN"], ["condition_1"])
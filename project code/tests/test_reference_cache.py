@@ -0,0 +1,106 @@
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from config import Config
+from migrations import load_seed
+from reference_cache import ReferenceCache
+
+
+class Loader:
+    """Serves the seeded reference data; the disease list can be swapped or made to fail"""
+
+    def __init__(self):
+        self.diseases = load_seed("diseases")
+        self.remedies = load_seed("remedies")
+        self.error = None
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return list(self.diseases), list(self.remedies)
+
+
+class StandaloneDB:
+    """A database without change streams whose dbHash answers come from a script"""
+
+    def __init__(self, stamps):
+        self.stamps = list(stamps)
+        self.watch_calls = 0
+
+    def watch(self, *args, **kwargs):
+        self.watch_calls += 1
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+    def command(self, name, **kwargs):
+        stamp = self.stamps.pop(0) if len(self.stamps) > 1 else self.stamps[0]
+        if isinstance(stamp, Exception):
+            raise stamp
+        return {"collections": stamp}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_lookups_resolve_aliases_and_typos():
+    cache = ReferenceCache(Loader())
+
+    assert cache.get_disease("common  cold")["name"] == "Common Cold"
+    assert cache.get_remedy("Common Cld")["condition"] == "common cold"
+    assert "Common Cold" in {d["name"] for d in cache.get_diseases_by_symptom("sneezin")}
+    assert cache.get_disease("not a disease") is None
+
+
+def test_failed_reload_keeps_serving_the_previous_snapshot():
+    loader = Loader()
+    cache = ReferenceCache(loader)
+    snapshot = cache.data
+    notified = []
+    cache.subscribe(notified.append)
+
+    loader.error = PyMongoError("connection reset")
+    cache.refresh()
+
+    assert cache.data is snapshot
+    assert notified == []
+    assert cache.get_disease("Common Cold") is not None
+
+
+def test_a_failing_listener_does_not_stop_the_others():
+    cache = ReferenceCache(Loader())
+    seen = []
+
+    def broken(data):
+        raise RuntimeError("listener bug")
+
+    cache.subscribe(broken)
+    cache.subscribe(seen.append)
+    cache.refresh()
+
+    assert [data.version for data in seen] == [1]
+
+
+def test_standalone_server_falls_back_to_polling_the_content_hash(monkeypatch):
+    monkeypatch.setattr(Config, "REFERENCE_CACHE_WATCH", True)
+    loader = Loader()
+    db = StandaloneDB([{"diseases": "a"}, PyMongoError("timeout"), {"diseases": "a"}, {"diseases": "b"}])
+    cache = ReferenceCache(loader, db=db, poll_interval=0.01)
+    assert cache.data.version == 1
+
+    loader.diseases = loader.diseases[:1]
+    cache.start()
+    try:
+        # Reloaded once to line up with the first stamp, then again when the hash changes
+        assert wait_for(lambda: cache.data.version == 3)
+        assert db.watch_calls == 1
+        assert len(cache.get_diseases()) == 1
+        time.sleep(0.05)
+        assert cache.data.version == 3
+    finally:
+        cache.stop()
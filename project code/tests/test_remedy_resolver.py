@@ -0,0 +1,91 @@
+import threading
+import time
+
+from database import DatabaseManager
+from remedy_resolver import (SOURCE_CURATED, SOURCE_CURATED_FUZZY, SOURCE_FALLBACK, SOURCE_GENERATED,
+                             SOURCE_SAVED, RemedyResolver)
+
+GENERATED = {"title": "Generated", "ingredients": ["water"], "instructions": ["Rest"]}
+
+
+class FakeWatson:
+    """Counts generations; returns None (Watson unavailable) while offline is set"""
+
+    def __init__(self, offline=False, delay=0.0):
+        self.offline = offline
+        self.delay = delay
+        self.generated = []
+
+    def generate_remedy(self, condition, fallback=True):
+        time.sleep(self.delay)
+        self.generated.append(condition)
+        return None if self.offline else dict(GENERATED, title=f"Generated for {condition}")
+
+    def fallback_remedy(self, condition):
+        return {"title": "General guidance", "ingredients": [], "instructions": ["See a doctor"]}
+
+
+def test_curated_remedies_are_found_exactly_and_through_typos():
+    watson = FakeWatson()
+    resolver = RemedyResolver(DatabaseManager(), watson)
+
+    exact = resolver.resolve("Common Cold")
+    fuzzy = resolver.resolve("comon cold")
+
+    assert (exact.source, exact.condition) == (SOURCE_CURATED, "common cold")
+    assert (fuzzy.source, fuzzy.condition) == (SOURCE_CURATED_FUZZY, "common cold")
+    assert watson.generated == []
+
+
+def test_new_condition_is_generated_once_then_read_back():
+    watson = FakeWatson()
+    resolver = RemedyResolver(DatabaseManager(), watson)
+
+    first = resolver.resolve("Chronic hiccups ")
+    second = resolver.resolve("chronic hiccups")
+
+    assert first.source == SOURCE_GENERATED
+    assert second.source == SOURCE_SAVED
+    assert second.remedy["title"] == first.remedy["title"]
+    assert watson.generated == ["chronic hiccups"]
+
+
+def test_unavailable_model_falls_back_without_saving():
+    watson = FakeWatson(offline=True)
+    resolver = RemedyResolver(DatabaseManager(), watson)
+
+    first = resolver.resolve("restless legs")
+    watson.offline = False
+    second = resolver.resolve("restless legs")
+
+    assert first.source == SOURCE_FALLBACK
+    assert first.label == "General guidance (IBM Watson AI unavailable)"
+    assert second.source == SOURCE_GENERATED
+
+
+def test_failed_save_still_returns_the_generation():
+    db_manager = DatabaseManager()
+
+    def broken_save(*args):
+        raise RuntimeError("disk full")
+
+    db_manager.save_generated_remedy = broken_save
+    resolved = RemedyResolver(db_manager, FakeWatson()).resolve("ingrown toenail")
+
+    assert resolved.source == SOURCE_GENERATED
+
+
+def test_concurrent_requests_share_one_generation():
+    watson = FakeWatson(delay=0.05)
+    resolver = RemedyResolver(DatabaseManager(), watson)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(resolver.resolve("night sweats"))) for _ in range(6)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert watson.generated == ["night sweats"]
+    assert sorted(r.source for r in results) == [SOURCE_GENERATED] + [SOURCE_SAVED] * 5
+    assert resolver._inflight == {}
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import response_cache
+from response_cache import ResponseCache
+
+
+class FakeCollection:
+    """Minimal stand-in for the Mongo generation cache collection"""
+
+    def __init__(self):
+        self.docs = {}
+        self.indexes = []
+
+    def create_index(self, field, **options):
+        self.indexes.append((field, options))
+
+    def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and doc["expires_at"] > query["expires_at"]["$gt"]:
+            return doc
+        return None
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = doc
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.set("a", "first")
+    cache.set("b", "second")
+    assert cache.get("a") == "first"
+
+    cache.set("c", "third")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "first"
+    assert cache.get("c") == "third"
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    cache = ResponseCache(max_entries=8, ttl=30)
+    cache.set("a", "value")
+
+    clock.now += 29
+    assert cache.get("a") == "value"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 0, "memory_hits": 1, "persistent_hits": 0, "misses": 1, "hit_rate": 0.5}
+
+
+def test_persistent_tier_refills_memory_after_eviction():
+    collection = FakeCollection()
+    cache = ResponseCache(max_entries=1, ttl=60, collection=collection)
+    assert collection.indexes == [("expires_at", {"expireAfterSeconds": 0})]
+
+    cache.set("a", "first")
+    cache.set("b", "second")
+
+    assert cache.get("a") == "first"
+    assert cache.get("a") == "first"
+    assert cache.stats()["persistent_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+    assert collection.docs["a"]["expires_at"] > datetime.utcnow()
+
+
+def test_keys_ignore_prompt_whitespace_but_not_parameters():
+    payload = {"input": "Patient  reports\n headache", "model_id": "granite", "parameters": {"max_new_tokens": 200}}
+    same = dict(payload, input="Patient reports headache")
+    different = dict(payload, parameters={"max_new_tokens": 300})
+
+    assert ResponseCache.make_key(payload) == ResponseCache.make_key(same)
+    assert ResponseCache.make_key(payload) != ResponseCache.make_key(different)
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from startup import LazyService, ServiceProxy
+
+
+class Flaky:
+    """Factory that fails a set number of times before building"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise TimeoutError("migration lock busy")
+        return {"attempt": self.calls}
+
+
+def test_failed_build_is_retried_on_next_access():
+    factory = Flaky(failures=1)
+    service = LazyService("database", factory).start()
+
+    with pytest.raises(TimeoutError):
+        service.get(timeout=5)
+    assert not service.ready
+
+    assert service.get(timeout=5) == {"attempt": 2}
+    assert service.ready
+    assert service.get(timeout=5) == {"attempt": 2}
+    assert factory.calls == 2
+
+
+def test_proxy_retries_through_the_service():
+    proxy = ServiceProxy(LazyService("database", Flaky(failures=1)))
+
+    with pytest.raises(TimeoutError):
+        proxy.get("attempt")
+    assert proxy.get("attempt") == 2
+
+
+def test_on_ready_waits_for_a_successful_build():
+    release = threading.Event()
+
+    def factory():
+        release.wait(5)
+        return "db"
+
+    service = LazyService("database", factory).start()
+    seen = []
+    service.on_ready(seen.append)
+    assert seen == []
+
+    release.set()
+    assert service.get(timeout=5) == "db"
+    assert seen == ["db"]
+
+    service.on_ready(seen.append)
+    assert seen == ["db", "db"]
+
+
+def test_on_ready_skips_failed_attempts():
+    service = LazyService("database", Flaky(failures=1)).start()
+    seen = []
+    service.on_ready(seen.append)
+
+    with pytest.raises(TimeoutError):
+        service.get(timeout=5)
+    assert seen == []
+
+    service.get(timeout=5)
+    assert seen == [{"attempt": 2}]
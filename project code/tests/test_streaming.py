@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from http_transport import CircuitBreaker, HTTPTransport
+from response_cache import ResponseCache
+from tests.conftest import StubResponse
+from watson_ai import WatsonAIService
+
+
+class StaticTokens:
+    """Token manager stand-in that hands out numbered tokens"""
+
+    def __init__(self):
+        self.issued = 1
+        self.invalidated = []
+
+    def get_token(self):
+        return f"token-{self.issued}"
+
+    def invalidate(self, token):
+        self.invalidated.append(token)
+        self.issued += 1
+
+
+class FakeResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def event(text):
+    return f"data: {json.dumps({'results': [{'generated_text': text}]})}\n\n"
+
+
+@pytest.fixture
+def service(stub_server):
+    service = WatsonAIService(
+        transport=HTTPTransport(max_retries=0, breaker=CircuitBreaker(min_calls=100)),
+        cache=ResponseCache(max_entries=16)
+    )
+    service.url = stub_server.url
+    service.tokens = StaticTokens()
+    yield service
+    service.transport.close()
+
+
+def test_sse_parser_skips_comments_blank_lines_and_bad_events():
+    response = FakeResponse([
+        ": keep-alive",
+        "",
+        "id: 1",
+        "event: message",
+        'data: {"results": [{"generated_text": "Hello"}]}',
+        "data: {not json",
+        "data:",
+        'data:{"results": [{"generated_text": " there"}]}',
+        "data: [DONE]"
+    ])
+
+    events = list(WatsonAIService._iter_sse_data(response))
+
+    assert [e["results"][0]["generated_text"] for e in events] == ["Hello", " there"]
+
+
+def test_chat_stream_yields_chunks_and_caches_the_generation(stub_server, service):
+    stub_server.reply(StubResponse(chunks=[": ping\n\n", event("  Drink"), event(" water"), "data: [DONE]\n\n"]))
+
+    chunks = list(service.chat_response_stream("I feel dehydrated"))
+
+    assert chunks == ["Drink", " water"]
+    assert stub_server.requests[0][0] == "/ml/v1/text/generation_stream"
+    assert stub_server.requests[0][1]["Authorization"] == "Bearer token-1"
+
+    # The same prompt is served from the cache without another request
+    assert "".join(service.chat_response_stream("I feel dehydrated")) == "Drink water"
+    assert len(stub_server.requests) == 1
+
+
+def test_event_split_across_network_writes_is_reassembled(stub_server, service):
+    first = event("Rest")
+    stub_server.reply(StubResponse(chunks=[first[:10], first[10:], event(" well")]))
+
+    assert "".join(service.chat_response_stream("tired")) == "Rest well"
+
+
+def test_stream_retries_once_with_a_fresh_token_on_401(stub_server, service):
+    stub_server.reply(StubResponse(401), StubResponse(chunks=[event("Hi")]))
+
+    assert list(service.chat_response_stream("hello")) == ["Hi"]
+    assert service.tokens.invalidated == ["token-1"]
+    assert stub_server.requests[1][1]["Authorization"] == "Bearer token-2"
+
+
+def test_stream_falls_back_when_the_server_fails(stub_server, service):
+    stub_server.reply(StubResponse(500))
+
+    chunks = list(service.chat_response_stream("headache"))
+
+    assert len(chunks) == 1
+    assert chunks[0] == service._fallback_chat_response("headache")
+
+
+def test_stop_when_ends_the_stream_before_trailing_text(stub_server, service):
+    text = json.dumps({"condition": "headache", "remedies": [{"name": "Rest"}]})
+    stub_server.reply(StubResponse(chunks=[event(text[:20]), event(text[20:]), event(" and more text")]))
+    payload = service._chat_payload("headache")
+    seen = []
+
+    chunks = list(service._generate_stream(payload, stop_when=lambda chunk: seen.append(chunk) or len(seen) == 2))
+
+    assert "".join(chunks) == text
+    assert service.cache.get(service.cache.make_key(payload)) == text
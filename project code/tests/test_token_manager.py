@@ -0,0 +1,78 @@
+import threading
+import time
+
+from http_transport import CircuitBreaker, HTTPTransport
+from tests.conftest import StubResponse
+from token_manager import IAMTokenManager
+
+
+def token(value, expires_in=3600):
+    return StubResponse(200, {"access_token": value, "expires_in": expires_in})
+
+
+def make_manager(stub_server, refresh_margin=300):
+    transport = HTTPTransport(pool_size=2, max_retries=0, breaker=CircuitBreaker(min_calls=100))
+    return IAMTokenManager("test-key", transport, token_url=f"{stub_server.url}/identity/token", refresh_margin=refresh_margin)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_fresh_token_is_reused(stub_server):
+    stub_server.reply(token("first"))
+    manager = make_manager(stub_server)
+
+    assert manager.get_token() == "first"
+    assert manager.get_token() == "first"
+    assert len(stub_server.requests) == 1
+    assert b"apikey=test-key" in stub_server.requests[0][2]
+
+
+def test_token_is_refreshed_in_the_background_before_it_expires(stub_server):
+    stub_server.reply(token("first"), token("second"))
+    # Refresh is due 0.3s after the fetch, long before the hour-long token expires
+    manager = make_manager(stub_server, refresh_margin=3599.7)
+
+    assert manager.get_token() == "first"
+    assert wait_for(lambda: len(stub_server.requests) == 2)
+    assert wait_for(lambda: manager.get_token() == "second")
+    assert len(stub_server.requests) == 2
+    manager._timer.cancel()
+
+
+def test_concurrent_refreshes_share_one_request(stub_server):
+    stub_server.reply(token("shared"), token("unexpected"))
+    manager = make_manager(stub_server)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.refresh())) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["shared"] * 8
+    assert len(stub_server.requests) == 1
+
+
+def test_rejected_token_is_replaced_but_stale_invalidations_are_ignored(stub_server):
+    stub_server.reply(token("first"), token("second"))
+    manager = make_manager(stub_server)
+    assert manager.get_token() == "first"
+
+    manager.invalidate("first")
+    assert manager.get_token() == "second"
+    manager.invalidate("first")
+    assert manager.get_token() == "second"
+    assert len(stub_server.requests) == 2
+
+
+def test_failed_fetch_returns_none(stub_server):
+    stub_server.reply(StubResponse(400))
+    manager = make_manager(stub_server)
+
+    assert manager.get_token() is None
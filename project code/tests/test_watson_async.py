@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from watson_ai import AsyncWatsonAIService, WatsonAIService
+
+
+@pytest.fixture
+def service():
+    service = WatsonAIService()
+    yield service
+    service.close()
+
+
+def test_async_adapter_matches_sync_results_and_shares_the_pool(service):
+    client = AsyncWatsonAIService(service)
+
+    async def calls():
+        return (
+            await client.chat_response("I have a cough", context="Earlier: fever"),
+            await client.generate_remedy("unknown condition", fallback=False),
+            await client.gather([("predict_disease", ["cough", "sneezing"]), ("chat_response", "hi", "")])
+        )
+
+    chat, remedy, batch = asyncio.run(calls())
+
+    assert chat == service.chat_response("I have a cough", context="Earlier: fever")
+    assert remedy is None
+    assert batch == service.run_batch([("predict_disease", ["cough", "sneezing"]), ("chat_response", "hi", "")])
+    assert service._executor is service.executor
+
+
+def test_unknown_methods_are_rejected(service):
+    with pytest.raises(ValueError):
+        service.run_batch([("delete_everything",)])
+    with pytest.raises(ValueError):
+        asyncio.run(AsyncWatsonAIService(service).gather([("delete_everything",)]))
@@ -0,0 +1,94 @@
+import threading
+import time
+import logging
+from typing import Optional
+
+from config import Config
+from http_transport import HTTPTransport
+
+
+class IAMTokenManager:
+    """IBM Cloud IAM token lifecycle with proactive, coalesced refresh"""
+
+    def __init__(self, api_key: str, transport: HTTPTransport, token_url=None, refresh_margin=None):
+        self.api_key = api_key
+        self.transport = transport
+        self.token_url = token_url or Config.IBM_IAM_TOKEN_URL
+        self.refresh_margin = refresh_margin if refresh_margin is not None else Config.IBM_IAM_REFRESH_MARGIN
+        self._token = None
+        self._expires_at = 0.0
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._timer = None
+
+    def _is_fresh(self, now: float) -> bool:
+        return self._token is not None and now < self._expires_at - self.refresh_margin
+
+    def get_token(self) -> Optional[str]:
+        """Get a valid access token, refreshing only when it is missing or expired"""
+        with self._state_lock:
+            now = time.monotonic()
+            if self._token is not None and now < self._expires_at:
+                if not self._is_fresh(now):
+                    self._schedule_refresh(0)
+                return self._token
+        return self.refresh()
+
+    def refresh(self) -> Optional[str]:
+        """Fetch a new token; concurrent callers share a single IAM request"""
+        with self._refresh_lock:
+            with self._state_lock:
+                if self._is_fresh(time.monotonic()):
+                    return self._token
+            return self._fetch()
+
+    def _fetch(self) -> Optional[str]:
+        try:
+            headers = {"Content-Type": "application/x-www-form-urlencoded"}
+            data = {
+                "grant_type": "urn:iam:params:oauth:grant-type:apikey",
+                "apikey": self.api_key
+            }
+
+            response = self.transport.post(self.token_url, headers=headers, data=data)
+            if response.status_code != 200:
+                logging.error(f"Failed to get access token: {response.status_code}")
+                return None
+
+            body = response.json()
+            expires_in = float(body.get("expires_in", 3600))
+            with self._state_lock:
+                self._token = body.get("access_token")
+                self._expires_at = time.monotonic() + expires_in
+                self._schedule_refresh(max(expires_in - self.refresh_margin, 0))
+                return self._token
+        except Exception as e:
+            logging.error(f"Error getting access token: {e}")
+            return None
+
+    def _schedule_refresh(self, delay: float):
+        """Arm a single background refresh; callers must hold the state lock"""
+        if self._timer is not None and self._timer.is_alive():
+            if delay > 0:
+                self._timer.cancel()
+            else:
+                return
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        with self._refresh_lock:
+            self._fetch()
+
+    def prefetch(self):
+        """Start fetching the first token in the background"""
+        with self._state_lock:
+            self._schedule_refresh(0)
+
+    def invalidate(self, token: Optional[str]):
+        """Drop a token the API rejected, unless it has already been replaced"""
+        with self._state_lock:
+            if token is not None and token == self._token:
+                self._token = None
+                self._expires_at = 0.0
@@ -1,12 +1,23 @@
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
-import streamlit as st
+
+# NumPy, pandas and plotly are imported inside the functions that need them so importing
+# utils for its constants (as insights and ingest do) stays cheap
+
+# Accepted range for each health metric
+HEALTH_RANGES = {
+    'heart_rate': (40, 200),
+    'systolic_bp': (70, 250),
+    'diastolic_bp': (40, 150),
+    'glucose': (50, 400),
+    'weight': (20, 300),
+    'temperature': (35, 42)
+}
 
 def generate_sample_health_data(days=30):
     """Generate sample health metrics data"""
+    import numpy as np
+    import pandas as pd
+    
     dates = [datetime.now() - timedelta(days=i) for i in range(days, 0, -1)]
     
     # Generate realistic health data with some variation
@@ -24,14 +35,39 @@ def generate_sample_health_data(days=30):
     
     return pd.DataFrame(data)
 
-def create_health_chart(data, metric, title):
-    """Create interactive health metric chart"""
+def create_health_chart(data, metric, title, max_points=1000, rollups=None, start=None, end=None):
+    """Create interactive health metric chart for the [start, end] window, downsampled to a fixed point budget.
+    
+    rollups are precomputed build_rollups output for data; without them they are built on each call.
+    """
+    import plotly.graph_objects as go
+    from downsampling import build_rollups, choose_rollup, downsample_series, visible
+    
     fig = go.Figure()
+    window = visible(data, start, end)
+    
+    if len(window) <= max_points:
+        x, y = window['date'], window[metric]
+    else:
+        # Long windows are drawn from the finest hourly/daily/weekly rollup that fits, with a min-max band so peaks stay visible
+        if rollups is None:
+            rollups = build_rollups(data, metric)
+        level, rollup = choose_rollup(rollups, max_points, start, end)
+        if len(rollup) > max_points:
+            x, y = downsample_series(window['date'], window[metric], max_points)
+        else:
+            x, y = rollup['date'], rollup['mean']
+            fig.add_trace(go.Scatter(x=rollup['date'], y=rollup['max'], mode='lines', line=dict(width=0), hoverinfo='skip'))
+            fig.add_trace(go.Scatter(
+                x=rollup['date'], y=rollup['min'], mode='lines', line=dict(width=0),
+                fill='tonexty', fillcolor='rgba(0, 102, 204, 0.15)', hoverinfo='skip'
+            ))
+            title = f"{title} ({level} average)"
     
     fig.add_trace(go.Scatter(
-        x=data['date'],
-        y=data[metric],
-        mode='lines+markers',
+        x=x,
+        y=y,
+        mode='lines+markers' if len(x) <= 200 else 'lines',
         name=title,
         line=dict(color='#0066CC', width=3),
         marker=dict(size=6, color='#0066CC')
@@ -60,10 +96,13 @@ def get_metric_unit(metric):
     }
     return units.get(metric, '')
 
-def create_risk_pie_chart():
-    """Create risk assessment pie chart"""
+def create_risk_pie_chart(distribution=None):
+    """Create risk assessment pie chart from a {label: share} distribution"""
+    import plotly.graph_objects as go
+    
+    distribution = distribution or {'Low Risk': 70, 'Medium Risk': 25, 'High Risk': 5}
     labels = ['Low Risk', 'Medium Risk', 'High Risk']
-    values = [70, 25, 5]
+    values = [distribution.get(label, 0) for label in labels]
     colors = ['#10B981', '#F59E0B', '#EF4444']
     
     fig = go.Figure(data=[go.Pie(
@@ -98,17 +137,8 @@ def get_risk_color(risk_level):
 
 def validate_health_input(value, metric_type):
     """Validate health metric input"""
-    ranges = {
-        'heart_rate': (40, 200),
-        'systolic_bp': (70, 250),
-        'diastolic_bp': (40, 150),
-        'glucose': (50, 400),
-        'weight': (20, 300),
-        'temperature': (35, 42)
-    }
-    
-    if metric_type in ranges:
-        min_val, max_val = ranges[metric_type]
+    if metric_type in HEALTH_RANGES:
+        min_val, max_val = HEALTH_RANGES[metric_type]
         return min_val <= value <= max_val
     
     return True
@@ -1,187 +1,248 @@
-import requests
+import asyncio
+import functools
 import json
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
+from conversation import format_turns
+from disease_engine import DiseaseScoringEngine
+from http_transport import HTTPTransport
+from normalize import canonicalize
+from output_parser import JSONExtractor, OutputParseError, parse_predictions, parse_remedy, parse_treatment_plan
+from prompts import get_prompt
+from response_cache import ResponseCache
+from token_manager import IAMTokenManager
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Callable, Iterator, Optional, Sequence, Tuple
+
+# Service methods that run_batch and AsyncWatsonAIService.gather may fan out
+BATCH_METHODS = ("predict_disease", "generate_remedy", "chat_response")
 
 class WatsonAIService:
-    def __init__(self):
+    def __init__(self, transport: Optional[HTTPTransport] = None, cache: Optional[ResponseCache] = None,
+                 disease_engine: Optional[DiseaseScoringEngine] = None):
         self.api_key = Config.IBM_WATSON_API_KEY
         self.url = Config.IBM_WATSON_URL
         self.project_id = Config.IBM_WATSON_PROJECT_ID
-        self.access_token = None
+        self.transport = transport or HTTPTransport()
+        self.cache = cache or ResponseCache()
+        self.disease_engine = disease_engine
+        self.tokens = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._cached_headers: Dict[str, str] = {}
         
         if self.api_key and self.url:
-            self._get_access_token()
+            self.tokens = IAMTokenManager(self.api_key, self.transport)
+            self.tokens.prefetch()
     
-    def _get_access_token(self):
-        """Get IBM Watson access token"""
-        try:
-            token_url = "https://iam.cloud.ibm.com/identity/token"
-            headers = {"Content-Type": "application/x-www-form-urlencoded"}
-            data = {
-                "grant_type": "urn:iam:params:oauth:grant-type:apikey",
-                "apikey": self.api_key
-            }
+    @property
+    def access_token(self) -> Optional[str]:
+        """Current IAM access token, refreshed on demand"""
+        if self.tokens is None:
+            return None
+        return self.tokens.get_token()
+    
+    def _headers(self, token: str) -> Dict[str, str]:
+        """Request headers, rebuilt only when the token changes"""
+        if self._cached_headers.get("Authorization") != f"Bearer {token}":
+            self._cached_headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        return self._cached_headers
+    
+    def _post_generation(self, endpoint: str, payload: Dict[str, Any], stream: bool = False):
+        """POST to a text generation endpoint, retrying once with a fresh token on 401"""
+        for attempt in range(2):
+            token = self.access_token
+            if not token:
+                return None
+            
+            response = self.transport.post(
+                f"{self.url}/ml/v1/text/{endpoint}",
+                headers=self._headers(token),
+                json=payload,
+                stream=stream
+            )
             
-            response = requests.post(token_url, headers=headers, data=data)
+            if response.status_code == 401 and attempt == 0:
+                response.close()
+                self.tokens.invalidate(token)
+                continue
             if response.status_code == 200:
-                self.access_token = response.json().get("access_token")
-                return True
-            else:
-                logging.error(f"Failed to get access token: {response.status_code}")
-                return False
-        except Exception as e:
-            logging.error(f"Error getting access token: {e}")
-            return False
+                return response
+            
+            logging.error(f"Watson AI request failed: {response.status_code}")
+            response.close()
+            return None
     
-    def predict_disease(self, symptoms: List[str]) -> List[Dict[str, Any]]:
-        """Predict diseases based on symptoms using Watson AI"""
-        if not self.access_token:
-            return self._fallback_disease_prediction(symptoms)
+    def _generate(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Generate text for a payload, serving repeated prompts from the cache"""
+        cache_key = self.cache.make_key(payload)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        response = self._post_generation("generation", payload)
+        if response is None:
+            return None
+        
+        result = response.json()
+        generated_text = result.get("results", [{}])[0].get("generated_text", "")
+        if generated_text:
+            self.cache.set(cache_key, generated_text)
+        return generated_text
+    
+    def _generate_stream(self, payload: Dict[str, Any], stop_when: Optional[Callable[[str], bool]] = None) -> Iterator[str]:
+        """Stream generated text chunks, caching the completed generation.
+        
+        stop_when sees each chunk and can end the generation early, e.g. once a JSON answer closes.
+        """
+        cache_key = self.cache.make_key(payload)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            if stop_when is not None:
+                stop_when(cached)
+            yield cached
+            return
+        
+        response = self._post_generation("generation_stream", payload, stream=True)
+        if response is None:
+            return
+        
+        chunks = []
+        with response:
+            for event in self._iter_sse_data(response):
+                text = event.get("results", [{}])[0].get("generated_text", "")
+                if text:
+                    chunks.append(text)
+                    yield text
+                    if stop_when is not None and stop_when(text):
+                        # Closing the response stops the server generating tokens we would discard
+                        break
+        
+        generated_text = "".join(chunks)
+        if generated_text:
+            self.cache.set(cache_key, generated_text)
+    
+    @staticmethod
+    def _iter_sse_data(response) -> Iterator[Dict[str, Any]]:
+        """Decode the JSON data fields of a server-sent event stream"""
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if not data or data == "[DONE]":
+                continue
+            try:
+                yield json.loads(data)
+            except ValueError:
+                logging.warning(f"Skipping malformed stream event: {data[:80]}")
+    
+    def _generate_json(self, payload: Dict[str, Any], openers: str, convert: Callable[[Any], Any]):
+        """Generate and parse a JSON answer, ending the generation as soon as the JSON closes"""
+        extractor = JSONExtractor(openers, convert)
+        if Config.WATSON_EARLY_STOP:
+            for _ in self._generate_stream(payload, stop_when=extractor.feed):
+                pass
+        else:
+            generated_text = self._generate(payload)
+            if generated_text is None:
+                return None
+            extractor.feed(generated_text)
+        return extractor.finish()
+    
+    def _complete(self, prompt_name: str, convert: Optional[Callable[[Any], Any]] = None, **values):
+        """Run a registered prompt; JSON tasks are parsed with convert, text tasks return stripped text"""
+        template = get_prompt(prompt_name)
+        payload = template.payload(self.project_id, **values)
+        if template.openers:
+            return self._generate_json(payload, template.openers, convert)
+        generated_text = self._generate(payload)
+        return generated_text.strip() if generated_text is not None else None
+    
+    def run_batch(self, calls: Sequence[Tuple[Any, ...]]) -> List[Any]:
+        """Run independent generation calls on worker threads, e.g. [("predict_disease", symptoms), ("chat_response", message, context)]"""
+        for method, *_ in calls:
+            if method not in BATCH_METHODS:
+                raise ValueError(f"Unknown Watson AI method: {method}")
+        futures = [self.executor.submit(getattr(self, method), *args) for method, *args in calls]
+        return [future.result() for future in futures]
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Worker pool shared by run_batch and AsyncWatsonAIService, sized to the transport's concurrency"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=Config.WATSON_MAX_CONCURRENCY, thread_name_prefix="watson-ai")
+        return self._executor
+    
+    def close(self):
+        """Shut down the worker pool and the pooled HTTP sessions"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.transport.close()
+    
+    def predict_disease(self, symptoms: List[str], fallback: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """Predict diseases based on symptoms using Watson AI; without fallback, returns None when Watson gave no prediction"""
+        symptoms = self._canonical_symptoms(symptoms)
+        if self.tokens is None or not self.transport.breaker.allow_request():
+            return self._fallback_disease_prediction(symptoms) if fallback else None
         
         try:
-            # Prepare the prompt for Granite model
-            symptoms_text = ", ".join(symptoms)
-            prompt = f"""
-            Based on the following symptoms: {symptoms_text}
-            
-            Please analyze and provide potential medical conditions with:
-            1. Condition name
-            2. Probability percentage (0-100)
-            3. Risk level (low/medium/high)
-            4. Brief description
-            5. Recommendations
-            
-            Format as JSON array.
-            """
-            
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "input": prompt,
-                "parameters": {
-                    "max_new_tokens": 500,
-                    "temperature": 0.3
-                },
-                "model_id": "ibm/granite-13b-instruct-v2",
-                "project_id": self.project_id
-            }
-            
-            response = requests.post(
-                f"{self.url}/ml/v1/text/generation",
-                headers=headers,
-                json=payload
+            predictions = self._complete(
+                "disease_prediction", parse_predictions,
+                symptoms=", ".join(symptoms),
+                candidates=self._candidate_conditions(symptoms)
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                # Parse the AI response and return structured data
-                return self._parse_disease_prediction(result.get("results", [{}])[0].get("generated_text", ""))
-            else:
-                logging.error(f"Watson AI request failed: {response.status_code}")
-                return self._fallback_disease_prediction(symptoms)
-                
+            if predictions:
+                return [p.to_dict() for p in predictions]
+        
+        except OutputParseError as e:
+            logging.warning(f"Unusable disease prediction output: {e}")
         except Exception as e:
             logging.error(f"Error in disease prediction: {e}")
-            return self._fallback_disease_prediction(symptoms)
+        return self._fallback_disease_prediction(symptoms) if fallback else None
     
-    def generate_remedy(self, condition: str) -> Dict[str, Any]:
-        """Generate home remedy using Watson AI"""
-        if not self.access_token:
-            return self._fallback_remedy_generation(condition)
+    def fallback_prediction(self, symptoms: List[str]) -> List[Dict[str, Any]]:
+        """Local prediction used when Watson AI is unavailable"""
+        return self._fallback_disease_prediction(self._canonical_symptoms(symptoms))
+    
+    def generate_remedy(self, condition: str, fallback: bool = True) -> Optional[Dict[str, Any]]:
+        """Generate home remedy using Watson AI; without fallback, returns None when no remedy was generated"""
+        if self.tokens is None or not self.transport.breaker.allow_request():
+            return self._fallback_remedy_generation(condition) if fallback else None
         
         try:
-            prompt = f"""
-            Generate a natural home remedy for {condition}.
-            
-            Please provide:
-            1. Title
-            2. List of ingredients
-            3. Step-by-step instructions
-            4. Benefits
-            5. Precautions
-            6. Duration of treatment
-            
-            Format as JSON.
-            """
+            remedy = self._complete("home_remedy", parse_remedy, condition=condition.strip().lower())
             
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "input": prompt,
-                "parameters": {
-                    "max_new_tokens": 600,
-                    "temperature": 0.3
-                },
-                "model_id": "ibm/granite-13b-instruct-v2",
-                "project_id": self.project_id
-            }
-            
-            response = requests.post(
-                f"{self.url}/ml/v1/text/generation",
-                headers=headers,
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return self._parse_remedy_response(result.get("results", [{}])[0].get("generated_text", ""))
-            else:
-                return self._fallback_remedy_generation(condition)
-                
+            if remedy is not None:
+                return remedy.to_dict()
+        
+        except OutputParseError as e:
+            logging.warning(f"Unusable remedy output: {e}")
         except Exception as e:
             logging.error(f"Error in remedy generation: {e}")
-            return self._fallback_remedy_generation(condition)
+        return self._fallback_remedy_generation(condition) if fallback else None
+    
+    def fallback_remedy(self, condition: str) -> Dict[str, Any]:
+        """General remedy guidance used when Watson AI is unavailable"""
+        return self._fallback_remedy_generation(condition)
+    
+    def _chat_payload(self, message: str, context: str = "") -> Dict[str, Any]:
+        """Build the generation payload for a patient chat message and its conversation context"""
+        return get_prompt("chat_response").payload(self.project_id, message=message.strip(), context=context)
     
-    def chat_response(self, message: str) -> str:
+    def chat_response(self, message: str, context: str = "") -> str:
         """Generate chat response using Watson AI"""
-        if not self.access_token:
+        if self.tokens is None or not self.transport.breaker.allow_request():
             return self._fallback_chat_response(message)
         
         try:
-            prompt = f"""
-            You are a helpful medical AI assistant. A patient asks: "{message}"
+            generated_text = self._complete("chat_response", message=message.strip(), context=context)
             
-            Provide a helpful, empathetic response that:
-            1. Addresses their concern
-            2. Provides general medical information
-            3. Includes appropriate disclaimers
-            4. Suggests when to seek professional help
-            
-            Keep the response conversational and supportive.
-            """
-            
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "input": prompt,
-                "parameters": {
-                    "max_new_tokens": 400,
-                    "temperature": 0.5
-                },
-                "model_id": "ibm/granite-13b-instruct-v2",
-                "project_id": self.project_id
-            }
-            
-            response = requests.post(
-                f"{self.url}/ml/v1/text/generation",
-                headers=headers,
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("results", [{}])[0].get("generated_text", "").strip()
+            if generated_text is not None:
+                return generated_text
             else:
                 return self._fallback_chat_response(message)
                 
@@ -189,8 +250,89 @@ class WatsonAIService:
             logging.error(f"Error in chat response: {e}")
             return self._fallback_chat_response(message)
     
+    def chat_response_stream(self, message: str, context: str = "") -> Iterator[str]:
+        """Stream a chat response as text chunks, falling back if nothing was generated"""
+        if self.tokens is None or not self.transport.breaker.allow_request():
+            yield self._fallback_chat_response(message)
+            return
+        
+        produced = False
+        try:
+            for chunk in self._generate_stream(self._chat_payload(message, context)):
+                if not produced:
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                produced = True
+                yield chunk
+        except Exception as e:
+            logging.error(f"Error in streaming chat response: {e}")
+        
+        if not produced:
+            yield self._fallback_chat_response(message)
+    
+    def summarize_conversation(self, summary: str, turns: List[Tuple[str, str]]) -> Optional[str]:
+        """Fold older chat turns into the running conversation summary; None when Watson AI is unavailable"""
+        if self.tokens is None or not self.transport.breaker.allow_request():
+            return None
+        
+        try:
+            return self._complete(
+                "conversation_summary",
+                summary=summary or "none yet",
+                turns=format_turns(turns),
+                max_words=Config.CHAT_SUMMARY_TOKENS * 3 // 4
+            ) or None
+        except Exception as e:
+            logging.error(f"Error summarizing conversation: {e}")
+            return None
+    
+    def generate_treatment_plan(self, condition: str, age: int, weight: float,
+                                allergies: str = "", medications: str = "") -> List[Dict[str, Any]]:
+        """Generate treatment plan items for a patient using Watson AI"""
+        if self.tokens is None or not self.transport.breaker.allow_request():
+            return self._fallback_treatment_plan(condition)
+        
+        try:
+            plan = self._complete(
+                "treatment_plan", parse_treatment_plan,
+                condition=condition.strip(), age=age, weight=weight,
+                allergies=allergies.strip() or "none reported",
+                medications=medications.strip() or "none reported"
+            )
+            
+            if plan:
+                return [step.to_dict() for step in plan]
+            else:
+                return self._fallback_treatment_plan(condition)
+        
+        except OutputParseError as e:
+            logging.warning(f"Unusable treatment plan output: {e}")
+            return self._fallback_treatment_plan(condition)
+        except Exception as e:
+            logging.error(f"Error in treatment plan generation: {e}")
+            return self._fallback_treatment_plan(condition)
+    
+    def _canonical_symptoms(self, symptoms: List[str]) -> List[str]:
+        """Sorted canonical symptoms, so aliases and typos share prompts, cache entries and fallback rules"""
+        canonical = self.disease_engine.canonicalize if self.disease_engine else canonicalize
+        return sorted({canonical(s) for s in symptoms})
+    
+    def _candidate_conditions(self, symptoms: List[str]) -> str:
+        """Pre-rank conditions locally so the prompt can point the model at likely candidates"""
+        if not self.disease_engine:
+            return ""
+        candidates = self.disease_engine.rank(symptoms, top_k=3)
+        if not candidates:
+            return ""
+        names = ", ".join(f"{c['name']} ({c['probability']}%)" for c in candidates)
+        return f"Likely candidates from our medical knowledge base: {names}"
+    
     def _fallback_disease_prediction(self, symptoms: List[str]) -> List[Dict[str, Any]]:
         """Fallback disease prediction when Watson AI is not available"""
+        if self.disease_engine:
+            return self.disease_engine.rank(symptoms)
+        
         # Simple rule-based prediction
         predictions = []
         
@@ -236,34 +378,119 @@ class WatsonAIService:
             "duration": "As advised by doctor"
         })
     
+    def _fallback_treatment_plan(self, condition: str) -> List[Dict[str, Any]]:
+        """Fallback treatment plan when Watson AI is not available"""
+        plans = {
+            "Hypertension": [
+                {
+                    "type": "medication",
+                    "title": "ACE Inhibitor",
+                    "description": "Lisinopril 10mg once daily to lower blood pressure",
+                    "duration": "3 months initially",
+                    "frequency": "Once daily, morning"
+                },
+                {
+                    "type": "lifestyle",
+                    "title": "Dietary Modifications",
+                    "description": "Low sodium diet (less than 2300mg/day), increase potassium-rich foods",
+                    "duration": "Ongoing",
+                    "frequency": "Daily"
+                },
+                {
+                    "type": "activity",
+                    "title": "Regular Exercise",
+                    "description": "Moderate aerobic exercise 30 minutes daily, 5 days per week",
+                    "duration": "Ongoing",
+                    "frequency": "5 times per week"
+                }
+            ],
+            "Type 2 Diabetes": [
+                {
+                    "type": "medication",
+                    "title": "Metformin",
+                    "description": "Metformin 500mg twice daily with meals to control blood sugar",
+                    "duration": "6 months, then review",
+                    "frequency": "Twice daily with meals"
+                },
+                {
+                    "type": "lifestyle",
+                    "title": "Diabetic Diet Plan",
+                    "description": "Carbohydrate counting, portion control, regular meal timing",
+                    "duration": "Ongoing",
+                    "frequency": "Every meal"
+                }
+            ],
+            "Common Cold": [
+                {
+                    "type": "medication",
+                    "title": "Symptom Relief",
+                    "description": "OTC pain relievers for aches and fever",
+                    "duration": "5-7 days",
+                    "frequency": "As needed"
+                },
+                {
+                    "type": "lifestyle",
+                    "title": "Rest and Hydration",
+                    "description": "Adequate sleep, increased fluid intake",
+                    "duration": "Until recovery",
+                    "frequency": "Continuous"
+                }
+            ]
+        }
+    
+        return plans.get(condition, [
+            {
+                "type": "consultation",
+                "title": "Medical Consultation",
+                "description": "Comprehensive evaluation by healthcare provider",
+                "duration": "1 visit initially",
+                "frequency": "As recommended"
+            }
+        ])
+    
     def _fallback_chat_response(self, message: str) -> str:
         """Fallback chat response"""
         return f"Thank you for your question about '{message}'. While I can provide general health information, I recommend consulting with a qualified healthcare provider for personalized medical advice. Is there anything specific about general health and wellness I can help you with?"
+
+
+class AsyncWatsonAIService:
+    """Executor adapter that lets asyncio code await WatsonAIService.
+
+    Each call runs the blocking client on the service's shared worker pool, so the event loop
+    stays responsive but every in-flight request still holds a thread and a pooled connection;
+    this is not asyncio-native I/O. Method signatures match the synchronous service.
+    """
     
-    def _parse_disease_prediction(self, ai_response: str) -> List[Dict[str, Any]]:
-        """Parse AI response for disease prediction"""
-        try:
-            # Try to extract JSON from the response
-            import re
-            json_match = re.search(r'\[.*\]', ai_response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
-        # Fallback parsing
-        return self._fallback_disease_prediction([])
+    METHODS = BATCH_METHODS
     
-    def _parse_remedy_response(self, ai_response: str) -> Dict[str, Any]:
-        """Parse AI response for remedy generation"""
-        try:
-            # Try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
+    def __init__(self, service: Optional[WatsonAIService] = None, max_concurrency: Optional[int] = None):
+        self.service = service or WatsonAIService()
+        self.max_concurrency = max_concurrency or Config.WATSON_MAX_CONCURRENCY
+    
+    async def _run(self, method: str, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.service.executor, functools.partial(getattr(self.service, method), *args))
+    
+    async def predict_disease(self, symptoms: List[str], fallback: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """Predict diseases based on symptoms using Watson AI"""
+        return await self._run("predict_disease", symptoms, fallback)
+    
+    async def generate_remedy(self, condition: str, fallback: bool = True) -> Optional[Dict[str, Any]]:
+        """Generate home remedy using Watson AI"""
+        return await self._run("generate_remedy", condition, fallback)
+    
+    async def chat_response(self, message: str, context: str = "") -> str:
+        """Generate chat response using Watson AI"""
+        return await self._run("chat_response", message, context)
+    
+    async def gather(self, calls: Sequence[Tuple[Any, ...]], limit: Optional[int] = None) -> List[Any]:
+        """Run (method, *arguments) calls concurrently and return results in call order"""
+        semaphore = asyncio.Semaphore(limit or self.max_concurrency)
+        
+        async def run_one(method: str, *args: Any):
+            if method not in self.METHODS:
+                raise ValueError(f"Unknown Watson AI method: {method}")
+            async with semaphore:
+                return await getattr(self, method)(*args)
         
-        # Fallback
-        return self._fallback_remedy_generation("general")
\ No newline at end of file
+        return await asyncio.gather(*(run_one(*call) for call in calls))
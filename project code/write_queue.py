@@ -0,0 +1,139 @@
+import atexit
+import queue
+import threading
+import time
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from pymongo.errors import BulkWriteError
+
+from config import Config
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Bounded write-behind queue drained into MongoDB by a background worker with insert_many"""
+
+    def __init__(self, db, batch_size=None, flush_interval=None, max_size=None, put_timeout=None):
+        self.db = db
+        self.batch_size = batch_size or Config.WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else Config.WRITE_FLUSH_INTERVAL
+        self.put_timeout = put_timeout if put_timeout is not None else Config.WRITE_QUEUE_PUT_TIMEOUT
+        self._queue = queue.Queue(maxsize=max_size or Config.WRITE_QUEUE_MAX_SIZE)
+        self._metrics_lock = threading.Lock()
+        self._closed = False
+
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+        self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def enqueue(self, collection_name: str, document: Dict[str, Any]) -> bool:
+        """Queue a document for insertion, blocking up to put_timeout when the queue is full"""
+        if self._closed:
+            return False
+        try:
+            self._queue.put((collection_name, document), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            with self._metrics_lock:
+                self.dropped += 1
+            logging.error(f"Write queue full, dropped document for {collection_name}")
+            return False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[Tuple[str, Dict[str, Any]]] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            if stopping:
+                # Pick up anything enqueued while the stop marker was being queued
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            if batch:
+                self._flush(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _flush(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Write a batch with one unordered insert_many per collection"""
+        grouped = defaultdict(list)
+        for collection_name, document in batch:
+            grouped[collection_name].append(document)
+
+        started = time.perf_counter()
+        written = failed = 0
+        for collection_name, documents in grouped.items():
+            try:
+                result = self.db[collection_name].insert_many(documents, ordered=False)
+                written += len(result.inserted_ids)
+            except BulkWriteError as e:
+                inserted = e.details.get("nInserted", 0)
+                written += inserted
+                failed += len(documents) - inserted
+                logging.error(f"Bulk write to {collection_name} partially failed: {e.details.get('writeErrors', [])[:1]}")
+            except Exception as e:
+                failed += len(documents)
+                logging.error(f"Error flushing {len(documents)} documents to {collection_name}: {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._metrics_lock:
+            self.written += written
+            self.failed += failed
+            self.batches += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    def flush(self):
+        """Block until every queued document has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Stop accepting writes and flush everything still queued"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput and flush latency counters"""
+        with self._metrics_lock:
+            return {
+                "depth": self._queue.qsize(),
+                "written": self.written,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "avg_flush_ms": round(self._total_flush_ms / self.batches, 2) if self.batches else 0.0,
+                "max_flush_ms": round(self.max_flush_ms, 2)
+            }